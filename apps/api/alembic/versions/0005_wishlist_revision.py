@@ -0,0 +1,25 @@
+"""wishlist revision counter
+
+Revision ID: 0005_wishlist_revision
+Revises: 0004_fx_oauth
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0005_wishlist_revision"
+down_revision = "0004_fx_oauth"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wishlists", sa.Column("revision", sa.Integer(), nullable=False, server_default="0")
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("wishlists", "revision")
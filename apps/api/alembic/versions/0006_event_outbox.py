@@ -0,0 +1,41 @@
+"""event outbox
+
+Revision ID: 0006_event_outbox
+Revises: 0005_wishlist_revision
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0006_event_outbox"
+down_revision = "0005_wishlist_revision"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_outbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("channel", sa.String(length=40), nullable=False),
+        sa.Column("room", sa.String(length=64), nullable=False),
+        sa.Column("event_id", sa.String(length=36), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("relayed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_event_outbox_pending",
+        "event_outbox",
+        ["id"],
+        postgresql_where=sa.text("relayed_at IS NULL"),
+    )
+    op.create_index("ix_event_outbox_relayed_at", "event_outbox", ["relayed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_outbox_relayed_at", table_name="event_outbox")
+    op.drop_index("ix_event_outbox_pending", table_name="event_outbox")
+    op.drop_table("event_outbox")
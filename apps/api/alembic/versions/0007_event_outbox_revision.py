@@ -0,0 +1,23 @@
+"""event outbox revision
+
+Revision ID: 0007_event_outbox_revision
+Revises: 0006_event_outbox
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0007_event_outbox_revision"
+down_revision = "0006_event_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("event_outbox", sa.Column("revision", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("event_outbox", "revision")
@@ -0,0 +1,26 @@
+"""contributions viewer index
+
+Revision ID: 0008_contributions_viewer_index
+Revises: 0007_event_outbox_revision
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0008_contributions_viewer_index"
+down_revision = "0007_event_outbox_revision"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_contributions_viewer_item",
+        "contributions",
+        ["viewer_token_hash", "item_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_contributions_viewer_item", table_name="contributions")
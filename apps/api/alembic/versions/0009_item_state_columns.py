@@ -0,0 +1,62 @@
+"""denormalized item funding and reservation state
+
+Revision ID: 0009_item_state_columns
+Revises: 0008_contributions_viewer_index
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0009_item_state_columns"
+down_revision = "0008_contributions_viewer_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wishlist_items",
+        sa.Column("collected_cents", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "wishlist_items",
+        sa.Column("contributor_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "wishlist_items", sa.Column("reserved_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "wishlist_items",
+        sa.Column("reservation_viewer_hash", sa.String(length=64), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE wishlist_items AS i
+        SET collected_cents = c.collected, contributor_count = c.contributors
+        FROM (
+            SELECT item_id, SUM(amount_cents) AS collected,
+                   COUNT(DISTINCT viewer_token_hash) AS contributors
+            FROM contributions
+            WHERE refunded_at IS NULL
+            GROUP BY item_id
+        ) AS c
+        WHERE c.item_id = i.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE wishlist_items AS i
+        SET reserved_at = r.created_at, reservation_viewer_hash = r.viewer_token_hash
+        FROM reservations AS r
+        WHERE r.item_id = i.id AND r.released_at IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("wishlist_items", "reservation_viewer_hash")
+    op.drop_column("wishlist_items", "reserved_at")
+    op.drop_column("wishlist_items", "contributor_count")
+    op.drop_column("wishlist_items", "collected_cents")
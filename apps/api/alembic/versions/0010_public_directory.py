@@ -0,0 +1,47 @@
+"""public directory index and active item count
+
+Revision ID: 0010_public_directory
+Revises: 0009_item_state_columns
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0010_public_directory"
+down_revision = "0009_item_state_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wishlists",
+        sa.Column("active_item_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE wishlists AS w
+        SET active_item_count = i.active
+        FROM (
+            SELECT wishlist_id, COUNT(*) AS active
+            FROM wishlist_items
+            WHERE is_archived IS FALSE
+            GROUP BY wishlist_id
+        ) AS i
+        WHERE i.wishlist_id = w.id
+        """
+    )
+    op.create_index(
+        "ix_wishlists_public_directory",
+        "wishlists",
+        [sa.text("updated_at DESC"), sa.text("id DESC")],
+        unique=False,
+        postgresql_where=sa.text("is_public IS TRUE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wishlists_public_directory", table_name="wishlists")
+    op.drop_column("wishlists", "active_item_count")
@@ -0,0 +1,49 @@
+"""notification unread counters and keyset index
+
+Revision ID: 0011_notification_counters
+Revises: 0010_public_directory
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0011_notification_counters"
+down_revision = "0010_public_directory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_counters",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("unread", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        INSERT INTO notification_counters (user_id, unread)
+        SELECT user_id, COUNT(*) FROM notifications WHERE read_at IS NULL GROUP BY user_id
+        """
+    )
+    op.drop_index("ix_notifications_user_created", table_name="notifications")
+    op.create_index(
+        "ix_notifications_user_created",
+        "notifications",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_created", table_name="notifications")
+    op.create_index(
+        "ix_notifications_user_created", "notifications", ["user_id", "created_at"], unique=False
+    )
+    op.drop_table("notification_counters")
@@ -0,0 +1,99 @@
+"""monthly range partitions for notifications
+
+Revision ID: 0012_notification_partitions
+Revises: 0011_notification_counters
+Create Date: 2026-10-17
+"""
+
+from datetime import UTC, date, datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0012_notification_partitions"
+down_revision = "0011_notification_counters"
+branch_labels = None
+depends_on = None
+
+PARTITIONS_AHEAD = 2
+
+COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('notifications_id_seq'),
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    wishlist_id INTEGER REFERENCES wishlists (id) ON DELETE SET NULL,
+    item_id INTEGER REFERENCES wishlist_items (id) ON DELETE SET NULL,
+    type VARCHAR(50) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    body TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    read_at TIMESTAMP WITH TIME ZONE
+"""
+
+
+def _month(value: date, offset: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        "ix_notifications_user_created", "notifications", ["user_id", "created_at", "id"]
+    )
+    op.create_index("ix_notifications_user_unread", "notifications", ["user_id", "read_at"])
+
+
+def _swap_out_old_table() -> None:
+    op.drop_index("ix_notifications_user_unread", table_name="notifications")
+    op.drop_index("ix_notifications_user_created", table_name="notifications")
+    op.execute("ALTER TABLE notifications RENAME TO notifications_old")
+    op.execute(
+        "ALTER TABLE notifications_old RENAME CONSTRAINT notifications_pkey "
+        "TO notifications_old_pkey"
+    )
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY NONE")
+
+
+def _drop_old_table() -> None:
+    op.execute("DROP TABLE notifications_old")
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+
+
+def upgrade() -> None:
+    _swap_out_old_table()
+    op.execute(
+        f"CREATE TABLE notifications ({COLUMNS}, PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM notifications_old"))
+    current = _month(datetime.now(UTC).date())
+    month = _month(oldest.date()) if oldest else current
+    while month <= _month(current, PARTITIONS_AHEAD):
+        end = _month(month, 1)
+        op.execute(
+            f"CREATE TABLE notifications_p{month:%Y%m} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{end.isoformat()} 00:00:00+00')"
+        )
+        month = end
+
+    op.execute(
+        "INSERT INTO notifications "
+        "(id, user_id, wishlist_id, item_id, type, title, body, created_at, read_at) "
+        "SELECT id, user_id, wishlist_id, item_id, type, title, body, "
+        "coalesce(created_at, now()), read_at "
+        "FROM notifications_old"
+    )
+    _drop_old_table()
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _swap_out_old_table()
+    op.execute(f"CREATE TABLE notifications ({COLUMNS}, PRIMARY KEY (id))")
+    op.execute("INSERT INTO notifications SELECT * FROM notifications_old")
+    op.execute("DROP TABLE notifications_old CASCADE")
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+    _create_indexes()
@@ -0,0 +1,28 @@
+"""collapsed contribution notifications
+
+Revision ID: 0013_notification_collapse
+Revises: 0012_notification_partitions
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0013_notification_collapse"
+down_revision = "0012_notification_partitions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications",
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column("notifications", sa.Column("amount_cents", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("notifications", "amount_cents")
+    op.drop_column("notifications", "event_count")
@@ -0,0 +1,23 @@
+"""event outbox merge key
+
+Revision ID: 0014_event_outbox_merge_key
+Revises: 0013_notification_collapse
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0014_event_outbox_merge_key"
+down_revision = "0013_notification_collapse"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("event_outbox", sa.Column("merge_key", sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("event_outbox", "merge_key")
@@ -1,9 +1,11 @@
+import hmac
 from typing import Annotated
 
 from fastapi import Cookie, Depends, Header, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.models import User
 from app.utils.security import decode_access_token, hash_viewer_token
@@ -48,6 +50,16 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
+def require_admin_token(
+    admin_token: Annotated[str | None, Header(alias="X-Admin-Token")] = None,
+) -> None:
+    expected = settings.admin_token
+    if not expected or not admin_token:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if not hmac.compare_digest(admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
 def require_viewer_token(
     viewer_token: Annotated[str | None, Header(alias="X-Viewer-Token")] = None,
 ) -> str:
@@ -1,7 +1,7 @@
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import func, select, update
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
@@ -9,30 +9,46 @@ from app.db.session import get_db
 from app.models.models import Notification, User
 from app.schemas.common import ApiMessage
 from app.schemas.notification import NotificationUnreadCount, NotificationView
+from app.services.notification_service import (
+    get_unread_count,
+    list_user_notifications,
+    lock_unread,
+    reset_unread,
+)
 from app.services.realtime import publish_user_event
+from app.utils.cursor import encode_cursor
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
 
 @router.get("", response_model=list[NotificationView])
 async def list_notifications(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, max_length=200),
+    since: str | None = Query(default=None, max_length=200),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> list[NotificationView]:
-    rows = (
-        await db.execute(
-            select(Notification)
-            .where(Notification.user_id == current_user.id)
-            .order_by(Notification.created_at.desc())
-            .limit(50)
+    try:
+        rows = await list_user_notifications(
+            db, current_user.id, limit + 1, cursor=cursor, since=since
         )
-    ).scalars().all()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    if rows:
+        response.headers["X-Latest-Cursor"] = encode_cursor(rows[0].created_at, rows[0].id)
     return [
         NotificationView(
             id=n.id,
             type=n.type,
             title=n.title,
             body=n.body,
+            event_count=n.event_count,
+            amount_cents=n.amount_cents,
             created_at=n.created_at,
             read_at=n.read_at,
         )
@@ -45,13 +61,7 @@ async def unread_count(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> NotificationUnreadCount:
-    unread = await db.scalar(
-        select(func.count(Notification.id)).where(
-            Notification.user_id == current_user.id,
-            Notification.read_at.is_(None),
-        )
-    )
-    return NotificationUnreadCount(unread=int(unread or 0))
+    return NotificationUnreadCount(unread=await get_unread_count(db, current_user.id))
 
 
 @router.post("/read-all", response_model=NotificationUnreadCount)
@@ -60,12 +70,14 @@ async def read_all(
     current_user: User = Depends(get_current_user),
 ) -> NotificationUnreadCount:
     now = datetime.now(UTC)
+    await lock_unread(db, current_user.id)
     await db.execute(
         update(Notification)
         .where(Notification.user_id == current_user.id, Notification.read_at.is_(None))
         .values(read_at=now)
     )
-    await publish_user_event(db, current_user.id, "notifications.updated", {"unread": 0})
+    await reset_unread(db, current_user.id)
+    publish_user_event(db, current_user.id, "notifications.updated", {"unread": 0})
     await db.commit()
     return NotificationUnreadCount(unread=0)
 
@@ -75,11 +87,9 @@ async def clear_notifications(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> ApiMessage:
-    rows = (
-        await db.execute(select(Notification).where(Notification.user_id == current_user.id))
-    ).scalars().all()
-    for row in rows:
-        await db.delete(row)
-    await publish_user_event(db, current_user.id, "notifications.updated", {"unread": 0})
+    await lock_unread(db, current_user.id)
+    await db.execute(delete(Notification).where(Notification.user_id == current_user.id))
+    await reset_unread(db, current_user.id)
+    publish_user_event(db, current_user.id, "notifications.updated", {"unread": 0})
     await db.commit()
     return ApiMessage(message="Notifications cleared")
@@ -1,102 +1,112 @@
 from datetime import datetime, timedelta
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_client_ip, get_current_user, require_viewer_token
+from app.core.config import settings
 from app.db.session import get_db
-from app.models.models import Contribution, Notification, OgCache, User, Wishlist, WishlistItem
+from app.models.models import Contribution, OgCache, User, Wishlist, WishlistItem
 from app.schemas.public import PublicWishlistSummary
 from app.schemas.wishlist import ItemView, WishlistView
 from app.services.fx_service import convert_to_usd_cents
+from app.services.notification_service import notification_events, notify_contribution
+from app.services.public_directory import directory_cache, load_directory_page
 from app.services.realtime import publish_event, publish_user_event
+from app.services.wishlist_resolver import wishlist_resolver
 from app.services.wishlist_service import (
+    bump_wishlist_revision,
     contribute_to_item,
-    get_wishlist_items_with_aggregates,
+    get_item_shared_state,
+    get_viewer_contributions,
     reserve_item,
     unreserve_item,
 )
+from app.services.wishlist_snapshot import snapshot_cache
+from app.utils.etag import cache_headers, etag_matches, not_modified, revision_etag
+from app.utils.fast_json import item_json, json_response, wishlist_json
 from app.utils.og_parser import parse_og
 from app.utils.rate_limit import limiter
 from app.utils.security import hash_url
 
 router = APIRouter(prefix="/api", tags=["public"])
 
-
-@router.get("/public/wishlists", response_model=list[PublicWishlistSummary])
-async def list_public_wishlists(db: AsyncSession = Depends(get_db)) -> list[PublicWishlistSummary]:
-    stmt = (
-        select(Wishlist, User, func.count(WishlistItem.id))
-        .outerjoin(
-            WishlistItem,
-            (WishlistItem.wishlist_id == Wishlist.id) & (WishlistItem.is_archived.is_(False)),
-        )
-        .join(User, User.id == Wishlist.owner_id)
-        .where(Wishlist.is_public.is_(True))
-        .group_by(Wishlist.id, User.id)
-        .order_by(Wishlist.updated_at.desc())
-    )
-    rows = (await db.execute(stmt)).all()
-    return [
-        PublicWishlistSummary(
-            public_id=w.public_id,
-            title=w.title,
-            author_name=(owner.nickname or owner.email),
-            currency=w.currency,
-            item_count=int(count),
-            updated_at=w.updated_at,
-        )
-        for w, owner, count in rows
-    ]
+PUBLIC_VARY = "X-Viewer-Token"
 
 
-def _map_public_item(data: dict) -> ItemView:
-    item = data["item"]
-    return ItemView(
-        id=item.id,
-        name=item.name,
-        url=item.url,
-        image_url=item.image_url,
-        price_cents=item.price_cents,
-        allow_contributions=item.allow_contributions,
-        notes=item.notes,
-        position=item.position,
-        is_archived=item.is_archived,
-        reserved=data["reserved"],
-        reserved_by_me=data["reserved_by_me"],
-        reserved_at=data["reserved_at"],
-        collected_cents=data["collected"],
-        my_contribution_cents=data["mine"],
-        created_at=item.created_at,
-        updated_at=item.updated_at,
-    )
+@router.get("/public/wishlists", response_model=list[PublicWishlistSummary])
+async def list_public_wishlists(
+    response: Response,
+    cursor: str | None = Query(default=None, max_length=200),
+    limit: int = Query(default=settings.public_directory_page_size, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+) -> list[PublicWishlistSummary]:
+    cacheable = limit == settings.public_directory_page_size
+    page = directory_cache.get(cursor) if cacheable else None
+    if page is None:
+        try:
+            page = await load_directory_page(db, cursor, limit)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+        if cacheable:
+            directory_cache.put(cursor, page)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get("/public/w/{public_id}", response_model=WishlistView)
 async def get_public_wishlist(
     public_id: str,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     viewer_hash: str | None = Depends(require_viewer_token),
-) -> WishlistView:
-    wishlist = await db.scalar(select(Wishlist).where(Wishlist.public_id == public_id))
-    if not wishlist or not wishlist.is_public:
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
+) -> WishlistView | Response:
+    resolved = await wishlist_resolver.resolve(db, public_id)
+    if resolved is None or not resolved.is_public:
+        raise HTTPException(status_code=404, detail="Wishlist not found")
+    current = (
+        await db.execute(
+            select(Wishlist.is_public, Wishlist.revision).where(Wishlist.id == resolved.id)
+        )
+    ).first()
+    if current is None or not current.is_public:
+        wishlist_resolver.invalidate(public_id)
         raise HTTPException(status_code=404, detail="Wishlist not found")
+    etag = revision_etag("p", current.revision, viewer_hash)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_VARY)
 
-    items = await get_wishlist_items_with_aggregates(db, wishlist.id, viewer_hash)
-
-    return WishlistView(
-        id=wishlist.id,
-        public_id=wishlist.public_id,
-        title=wishlist.title,
-        description=wishlist.description,
-        currency=wishlist.currency,
-        is_public=wishlist.is_public,
-        is_owner=False,
-        created_at=wishlist.created_at,
-        updated_at=wishlist.updated_at,
-        items=[_map_public_item(i) for i in items],
+    snapshot = await snapshot_cache.get(public_id, current.revision)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Wishlist not found")
+    # Only the viewer's own contributions are queried per request; everything else is shared.
+    mine = (
+        await get_viewer_contributions(db, viewer_hash, snapshot.item_ids) if viewer_hash else None
     )
+    overlay = [
+        (
+            fields,
+            bool(viewer_hash and fields["reserved"] and reserved_by == viewer_hash),
+            mine.get(fields["id"], 0) if mine is not None else None,
+        )
+        for fields, reserved_by in snapshot.items
+    ]
+    # A stale snapshot gets its own revision's tag, so the client revalidates again next time.
+    etag = revision_etag("p", snapshot.revision, viewer_hash)
+    if settings.fast_json_responses:
+        item_dicts = [item_json(*entry) for entry in overlay]
+        content = wishlist_json(snapshot.wishlist, False, item_dicts)
+        return json_response(content, cache_headers(etag, PUBLIC_VARY))
+    response.headers.update(cache_headers(etag, PUBLIC_VARY))
+    item_views = [
+        ItemView(**fields, reserved_by_me=by_me, my_contribution_cents=cents)
+        for fields, by_me, cents in overlay
+    ]
+    return WishlistView(**snapshot.wishlist, is_owner=False, items=item_views)
 
 
 @router.post("/public/items/{item_id}/reserve")
@@ -121,8 +131,12 @@ async def reserve(
         raise HTTPException(status_code=404, detail="Wishlist not found")
 
     reservation = await reserve_item(db, item, viewer_hash)
+    state = await get_item_shared_state(db, item.id)
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(
+        db, wishlist.public_id, "reservation.changed", {"item_id": item.id, "item": state}, revision
+    )
     await db.commit()
-    await publish_event(db, wishlist.public_id, "reservation.changed", {"item_id": item.id})
     return {"reserved": True, "reserved_at": reservation.created_at}
 
 
@@ -146,8 +160,12 @@ async def unreserve(
         raise HTTPException(status_code=404, detail="Wishlist not found")
 
     await unreserve_item(db, item_id, viewer_hash)
+    state = await get_item_shared_state(db, item.id)
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(
+        db, wishlist.public_id, "reservation.changed", {"item_id": item.id, "item": state}, revision
+    )
     await db.commit()
-    await publish_event(db, wishlist.public_id, "reservation.changed", {"item_id": item.id})
     return {"reserved": False}
 
 
@@ -195,27 +213,9 @@ async def contribute(
     contributor_user_id = user_locked.id
 
     if wishlist.owner_id and (contributor_user_id is None or contributor_user_id != wishlist.owner_id):
-        db.add(
-            Notification(
-                user_id=wishlist.owner_id,
-                wishlist_id=wishlist.id,
-                item_id=item.id,
-                type="contribution.received",
-                title=f"Новый вклад в \"{item.name}\"",
-                body=(
-                    f"Someone contributed {amount_cents / 100:.2f} {wishlist.currency}"
-                    + (f". Comment: {message}" if message else ". Без комментария.")
-                ),
-            )
-        )
-        await publish_user_event(db, wishlist.owner_id, "notifications.updated", {"increment": 1})
+        added = await notify_contribution(db, wishlist, item, amount_cents, message)
+        notification_events.publish(db, wishlist.owner_id, added)
 
-    total = await db.scalar(
-        select(func.coalesce(func.sum(Contribution.amount_cents), 0)).where(
-            Contribution.item_id == item.id,
-            Contribution.refunded_at.is_(None),
-        )
-    )
     mine = await db.scalar(
         select(func.coalesce(func.sum(Contribution.amount_cents), 0)).where(
             Contribution.item_id == item.id,
@@ -224,15 +224,20 @@ async def contribute(
         )
     )
 
-    await db.commit()
+    state = await get_item_shared_state(db, item.id)
+    revision = await bump_wishlist_revision(db, wishlist.id)
     if contributor_user_id is not None:
-        await publish_user_event(db, contributor_user_id, "balance.updated", {"delta_cents": -charged_usd_cents})
-    await publish_event(db, wishlist.public_id, "contribution.changed", {"item_id": item.id})
+        publish_user_event(
+            db, contributor_user_id, "balance.updated", {"delta_cents": -charged_usd_cents}
+        )
+    payload = {"item_id": item.id, "item": state}
+    publish_event(db, wishlist.public_id, "contribution.changed", payload, revision)
+    await db.commit()
 
     return {
         "ok": True,
         "contribution_id": contribution.id,
-        "collected_cents": int(total or 0),
+        "collected_cents": state["collected_cents"] if state else 0,
         "my_contribution_cents": int(mine or 0),
     }
 
@@ -0,0 +1,96 @@
+import math
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Cookie, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.realtime import resume_wishlist
+from app.services.wishlist_resolver import wishlist_resolver
+from app.utils.security import token_user_id
+from app.ws.manager import Connection, manager
+
+router = APIRouter(prefix="/api", tags=["realtime"])
+
+
+# Checked without a request-scoped session: these handlers park for a long time and must not
+# hold a pooled connection while they wait.
+async def _ensure_visible(public_id: str, access_token: str | None) -> None:
+    async with SessionLocal() as db:
+        wishlist = await wishlist_resolver.resolve(db, public_id)
+    if wishlist is None or not wishlist.visible_to(token_user_id(access_token)):
+        raise HTTPException(status_code=404, detail="Wishlist not found")
+
+
+def _attach(public_id: str) -> Connection:
+    if not manager.admits(public_id):
+        retry_after = math.ceil(manager.retry_delay_ms() / 1000)
+        raise HTTPException(
+            status_code=503, detail="Room is full", headers={"Retry-After": str(retry_after)}
+        )
+    return manager.attach(public_id)
+
+
+def _sse_frame(payload: bytes, revision: int | None) -> bytes:
+    prefix = b"id: %d\n" % revision if revision is not None else b""
+    return prefix + b"data: " + payload + b"\n\n"
+
+
+@router.get("/public/w/{public_id}/events")
+async def wishlist_events(
+    public_id: str,
+    since: int | None = None,
+    last_event_id: Annotated[str | None, Header(alias="Last-Event-ID")] = None,
+    access_token: Annotated[str | None, Cookie(alias="access_token")] = None,
+) -> StreamingResponse:
+    await _ensure_visible(public_id, access_token)
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    conn = _attach(public_id)
+    try:
+        if since is not None:
+            await resume_wishlist(conn, public_id, since)
+    except BaseException:
+        manager.detach(conn)
+        raise
+
+    async def stream() -> AsyncIterator[bytes]:
+        try:
+            yield b"retry: 3000\n\n"
+            while not conn.closed:
+                entry = await manager.next_payload(conn, settings.sse_keepalive_seconds)
+                yield b": keepalive\n\n" if entry is None else _sse_frame(*entry)
+            # Drained on shutdown: reconnect later than the default retry, at a randomized time.
+            yield b"retry: %d\n\n" % manager.retry_delay_ms()
+        finally:
+            manager.detach(conn)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/public/w/{public_id}/poll")
+async def wishlist_poll(
+    public_id: str,
+    since: int,
+    timeout: Annotated[float, Query(gt=0, le=60)] = 25,
+    access_token: Annotated[str | None, Cookie(alias="access_token")] = None,
+) -> Response:
+    await _ensure_visible(public_id, access_token)
+    conn = _attach(public_id)
+    try:
+        await resume_wishlist(conn, public_id, since)
+        payloads = manager.drain(conn)
+        if not payloads:
+            first = await manager.next_payload(conn, timeout)
+            payloads = ([first[0]] if first is not None else []) + manager.drain(conn)
+    finally:
+        manager.detach(conn)
+    # Messages are the same pre-encoded frames the WebSocket sends, spliced into one array.
+    return Response(b"[" + b",".join(payloads) + b"]", media_type="application/json")
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.db.session import get_db
 from app.models.models import Contribution, Reservation, User, Wishlist, WishlistItem
 from app.schemas.common import ApiMessage
@@ -17,8 +20,21 @@ from app.schemas.wishlist import (
     WishlistView,
 )
 from app.services.realtime import publish_event
-from app.services.wishlist_service import ensure_owner_item, ensure_owner_wishlist, get_wishlist_items_with_aggregates
-from app.services.wishlist_service import refund_item_contributions
+from app.services.wishlist_resolver import wishlist_resolver
+from app.services.wishlist_service import (
+    adjust_active_item_count,
+    bump_wishlist_revision,
+    ensure_owner_item,
+    ensure_owner_wishlist,
+    get_item_shared_state,
+    get_wishlist_items_with_aggregates,
+    refund_item_contributions,
+    shared_item_fields,
+    wishlist_fields,
+)
+from app.services.wishlist_snapshot import snapshot_cache
+from app.utils.etag import cache_headers, etag_matches, not_modified, revision_etag
+from app.utils.fast_json import item_json, json_response, wishlist_json
 
 router = APIRouter(prefix="/api", tags=["wishlists"])
 
@@ -39,6 +55,7 @@ def map_item_view(data: dict, is_owner: bool) -> ItemView:
         reserved_by_me=False if is_owner else data["reserved_by_me"],
         reserved_at=data["reserved_at"],
         collected_cents=data["collected"],
+        contributor_count=data["contributors"],
         my_contribution_cents=None if is_owner else data["mine"],
         created_at=item.created_at,
         updated_at=item.updated_at,
@@ -102,11 +119,24 @@ async def create_wishlist(
 @router.get("/wishlists/{wishlist_id}", response_model=WishlistView)
 async def get_owner_wishlist(
     wishlist_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
-) -> WishlistView:
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
+) -> WishlistView | Response:
     wishlist = await ensure_owner_wishlist(db, wishlist_id, user.id)
+    etag = revision_etag("o", wishlist.revision)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, "Cookie")
     items = await get_wishlist_items_with_aggregates(db, wishlist.id)
+    if settings.fast_json_responses:
+        content = wishlist_json(
+            wishlist_fields(wishlist),
+            True,
+            [item_json(shared_item_fields(i), False, None) for i in items],
+        )
+        return json_response(content, cache_headers(etag, "Cookie"))
+    response.headers.update(cache_headers(etag, "Cookie"))
     return WishlistView(
         id=wishlist.id,
         public_id=wishlist.public_id,
@@ -115,6 +145,7 @@ async def get_owner_wishlist(
         currency=wishlist.currency,
         is_public=wishlist.is_public,
         is_owner=True,
+        revision=wishlist.revision,
         created_at=wishlist.created_at,
         updated_at=wishlist.updated_at,
         items=[map_item_view(i, is_owner=True) for i in items],
@@ -132,8 +163,23 @@ async def update_wishlist(
     update_data = payload.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(wishlist, key, value)
+    await db.flush()
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(
+        db,
+        wishlist.public_id,
+        "wishlist.updated",
+        {
+            "wishlist_id": wishlist.id,
+            "title": wishlist.title,
+            "description": wishlist.description,
+            "currency": wishlist.currency,
+            "is_public": wishlist.is_public,
+        },
+        revision,
+    )
     await db.commit()
-    await publish_event(db, wishlist.public_id, "wishlist.updated", {"wishlist_id": wishlist.id})
+    wishlist_resolver.invalidate(wishlist.public_id)
     items = await get_wishlist_items_with_aggregates(db, wishlist.id)
     return WishlistView(
         id=wishlist.id,
@@ -143,6 +189,7 @@ async def update_wishlist(
         currency=wishlist.currency,
         is_public=wishlist.is_public,
         is_owner=True,
+        revision=revision,
         created_at=wishlist.created_at,
         updated_at=wishlist.updated_at,
         items=[map_item_view(i, is_owner=True) for i in items],
@@ -156,8 +203,14 @@ async def delete_wishlist(
     user: User = Depends(get_current_user),
 ) -> ApiMessage:
     wishlist = await ensure_owner_wishlist(db, wishlist_id, user.id)
+    public_id = wishlist.public_id
+    # Every worker evicts its cached lookup and snapshot when it receives this event.
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(db, public_id, "wishlist.deleted", {"wishlist_id": wishlist.id}, revision)
     await db.delete(wishlist)
     await db.commit()
+    wishlist_resolver.invalidate(public_id)
+    snapshot_cache.invalidate(public_id)
     return ApiMessage(message="Wishlist deleted")
 
 
@@ -184,8 +237,13 @@ async def create_item(
     )
     db.add(item)
     await db.flush()
+    await adjust_active_item_count(db, wishlist.id, 1)
+    state = await get_item_shared_state(db, item.id)
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(
+        db, wishlist.public_id, "item.updated", {"item_id": item.id, "item": state}, revision
+    )
     await db.commit()
-    await publish_event(db, wishlist.public_id, "item.updated", {"item_id": item.id})
     return ItemView(
         id=item.id,
         name=item.name,
@@ -214,26 +272,22 @@ async def update_item(
     user: User = Depends(get_current_user),
 ) -> ItemView:
     item = await ensure_owner_item(db, item_id, user.id)
+    was_archived = item.is_archived
     for key, value in payload.model_dump(exclude_unset=True).items():
         if key in {"url", "image_url"} and value is not None:
             value = str(value)
         setattr(item, key, value)
+    if item.is_archived != was_archived:
+        await adjust_active_item_count(db, item.wishlist_id, -1 if item.is_archived else 1)
 
-    await db.commit()
-
-    reserved_row = await db.scalar(
-        select(Reservation).where(Reservation.item_id == item.id, Reservation.released_at.is_(None))
-    )
-    collected = await db.scalar(
-        select(func.coalesce(func.sum(Contribution.amount_cents), 0)).where(
-            Contribution.item_id == item.id,
-            Contribution.refunded_at.is_(None),
-        )
-    )
-
+    state = await get_item_shared_state(db, item.id)
+    revision = await bump_wishlist_revision(db, item.wishlist_id)
     wishlist = await db.scalar(select(Wishlist).where(Wishlist.id == item.wishlist_id))
     if wishlist:
-        await publish_event(db, wishlist.public_id, "item.updated", {"item_id": item.id})
+        publish_event(
+            db, wishlist.public_id, "item.updated", {"item_id": item.id, "item": state}, revision
+        )
+    await db.commit()
 
     return ItemView(
         id=item.id,
@@ -245,10 +299,11 @@ async def update_item(
         notes=item.notes,
         position=item.position,
         is_archived=item.is_archived,
-        reserved=reserved_row is not None,
+        reserved=item.reserved_at is not None,
         reserved_by_me=False,
-        reserved_at=reserved_row.created_at if reserved_row else None,
-        collected_cents=int(collected or 0),
+        reserved_at=item.reserved_at,
+        collected_cents=item.collected_cents,
+        contributor_count=item.contributor_count,
         my_contribution_cents=None,
         created_at=item.created_at,
         updated_at=item.updated_at,
@@ -276,17 +331,27 @@ async def archive_or_delete_item(
 
     if has_activity:
         refunded_total = await refund_item_contributions(db, item.id)
+        if not item.is_archived:
+            await adjust_active_item_count(db, wishlist.id, -1)
         item.is_archived = True
+        state = await get_item_shared_state(db, item.id)
+        archived_revision = await bump_wishlist_revision(db, wishlist.id)
+        refunded_revision = await bump_wishlist_revision(db, wishlist.id)
+        payload = {"item_id": item.id, "item": state}
+        publish_event(db, wishlist.public_id, "item.archived", payload, archived_revision)
+        publish_event(db, wishlist.public_id, "contribution.changed", payload, refunded_revision)
         await db.commit()
-        await publish_event(db, wishlist.public_id, "item.archived", {"item_id": item.id})
-        await publish_event(db, wishlist.public_id, "contribution.changed", {"item_id": item.id})
         if refunded_total > 0:
             return ApiMessage(message="Item archived. Contributions refunded to contributor balances")
         return ApiMessage(message="Item archived due to existing reservations/contributions")
 
+    if not item.is_archived:
+        await adjust_active_item_count(db, wishlist.id, -1)
     await db.delete(item)
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    payload = {"item_id": item_id, "item": None, "deleted": True}
+    publish_event(db, wishlist.public_id, "item.archived", payload, revision)
     await db.commit()
-    await publish_event(db, wishlist.public_id, "item.archived", {"item_id": item_id})
     return ApiMessage(message="Item deleted")
 
 
@@ -309,6 +374,10 @@ async def reorder_items(
     for idx, item_id in enumerate(payload.item_ids):
         item_map[item_id].position = idx
 
+    await db.flush()
+    revision = await bump_wishlist_revision(db, wishlist.id)
+    publish_event(
+        db, wishlist.public_id, "items.reordered", {"item_ids": payload.item_ids}, revision
+    )
     await db.commit()
-    await publish_event(db, wishlist.public_id, "items.reordered", {"item_ids": payload.item_ids})
     return ApiMessage(message="Items reordered")
@@ -25,5 +25,54 @@ class Settings(BaseSettings):
     google_client_secret: str | None = None
     google_redirect_uri: str | None = None
 
+    # Shared secret for operational endpoints such as POST /internal/drain; unset disables them.
+    admin_token: str | None = None
+
+    wishlist_cache_size: int = 10000
+    wishlist_cache_ttl_seconds: float = 30.0
+    wishlist_cache_negative_ttl_seconds: float = 10.0
+    wishlist_snapshot_cache_size: int = 2000
+    wishlist_snapshot_stale_timeout_seconds: float = 0.5
+    fast_json_responses: bool = False
+    public_directory_page_size: int = 24
+    public_directory_cache_ttl_seconds: float = 5.0
+    public_directory_cached_pages: int = 3
+
+    ws_send_queue_size: int = 256
+    ws_send_timeout_seconds: float = 10.0
+    ws_ping_interval_seconds: float = 25.0
+    ws_idle_timeout_seconds: float = 60.0
+    ws_inbound_rate_per_second: float = 2.0
+    ws_inbound_burst: int = 10
+    ws_inbound_max_bytes: int = 4096
+    ws_max_subscriptions: int = 32
+    ws_max_room_subscribers: int = 2000
+    ws_accept_rate_per_second: float = 100.0
+    ws_accept_burst: int = 200
+    ws_accept_max_wait_seconds: float = 5.0
+    ws_drain_seconds: float = 10.0
+    ws_reconnect_spread_seconds: float = 15.0
+    sse_keepalive_seconds: float = 15.0
+    ws_history_size: int = 128
+    ws_history_rooms: int = 10000
+    ws_coalesce_window_ms: int = 50
+    ws_coalesce_max_delay_ms: int = 250
+
+    outbox_batch_size: int = 200
+    outbox_poll_interval_seconds: float = 1.0
+    outbox_retention_seconds: int = 300
+    notification_collapse_window_seconds: float = 0.0
+    notification_event_interval_seconds: float = 0.0
+    notification_retention_months: int = 6
+    notification_partitions_ahead: int = 2
+    notification_maintenance_interval_seconds: float = 3600.0
+    notify_payload_limit_bytes: int = 7900
+    notify_queue_size: int = 10000
+    notify_workers: int = 4
+    notify_keepalive_seconds: float = 30.0
+    notify_reconnect_max_seconds: float = 30.0
+    # 0 keeps one channel per event kind; N > 0 spreads rooms over N channels per kind.
+    notify_room_buckets: int = 0
+
 
 settings = Settings()
@@ -1,23 +1,35 @@
 import asyncio
-import json
+import contextlib
 from http.cookies import SimpleCookie
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncConnection
 
 from app.api.auth import router as auth_router
+from app.api.deps import require_admin_token
 from app.api.fx import router as fx_router
 from app.api.notifications import router as notifications_router
 from app.api.profile import router as profile_router
 from app.api.public import router as public_router
-from app.api.uploads import UPLOAD_DIR, router as uploads_router
+from app.api.stream import router as stream_router
+from app.api.uploads import UPLOAD_DIR
+from app.api.uploads import router as uploads_router
 from app.api.wishlists import router as wishlist_router
 from app.core.config import settings
-from app.db.session import engine
-from app.utils.security import decode_access_token
+from app.db.session import SessionLocal
+from app.services.listener import listener
+from app.services.notification_retention import notification_retention
+from app.services.notification_service import notification_events
+from app.services.outbox import relay
+from app.services.public_directory import directory_cache
+from app.services.realtime import handle_control_message, resume_wishlist
+from app.services.wishlist_resolver import wishlist_resolver
+from app.services.wishlist_snapshot import snapshot_cache
+from app.utils.security import token_user_id
+from app.ws.coalescer import coalescer
+from app.ws.dedup import deduplicator
+from app.ws.history import history
 from app.ws.manager import manager
 
 app = FastAPI(title=settings.app_name)
@@ -28,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Latest-Cursor"],
 )
 
 app.include_router(auth_router)
@@ -37,86 +50,117 @@ app.include_router(profile_router)
 app.include_router(uploads_router)
 app.include_router(wishlist_router)
 app.include_router(public_router)
+app.include_router(stream_router)
 app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 
 @app.get("/health")
 async def health() -> dict[str, str]:
-    return {"status": "ok"}
+    return {"status": "ok", "realtime": listener.state}
+
+
+@app.get("/health/realtime")
+async def realtime_health() -> dict:
+    return {
+        **manager.snapshot(),
+        "coalescer": coalescer.snapshot(manager.rooms.subscribers),
+        "dedup": deduplicator.snapshot(),
+        "history": history.snapshot(),
+        "wishlist_cache": wishlist_resolver.snapshot(),
+        "snapshot_cache": snapshot_cache.snapshot(),
+        "directory_cache": directory_cache.snapshot(),
+        "listener": listener.snapshot(),
+        "outbox": relay.snapshot(),
+        "notification_retention": notification_retention.snapshot(),
+        "notification_events": notification_events.snapshot(),
+    }
+
+
+def _websocket_user_id(websocket: WebSocket) -> int | None:
+    cookies = SimpleCookie()
+    cookies.load(websocket.headers.get("cookie", ""))
+    token = cookies.get("access_token")
+    return token_user_id(token.value if token else None)
+
+
+@app.websocket("/ws")
+async def multiplexed_ws(websocket: WebSocket) -> None:
+    user_id = _websocket_user_id(websocket)
+    conn = await manager.accept(websocket)
+    if conn is None:
+        return
+    try:
+        await manager.receive(websocket, lambda text: handle_control_message(conn, user_id, text))
+    finally:
+        await manager.close(websocket)
 
 
 @app.websocket("/ws/wishlist/{public_id}")
-async def wishlist_ws(websocket: WebSocket, public_id: str) -> None:
-    await manager.connect(public_id, websocket)
+async def wishlist_ws(websocket: WebSocket, public_id: str, since: int | None = None) -> None:
+    async with SessionLocal() as db:
+        wishlist = await wishlist_resolver.resolve(db, public_id)
+    if wishlist is None or not wishlist.visible_to(_websocket_user_id(websocket)):
+        await websocket.close(code=4404)
+        return
+
+    conn = await manager.connect(public_id, websocket)
+    if conn is None:
+        return
     try:
-        while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
+        if since is not None:
+            await resume_wishlist(conn, public_id, since)
+        await manager.receive(websocket)
+    finally:
         await manager.disconnect(public_id, websocket)
 
 
 @app.websocket("/ws/notifications")
 async def notifications_ws(websocket: WebSocket) -> None:
-    cookie_raw = websocket.headers.get("cookie", "")
-    cookies = SimpleCookie()
-    cookies.load(cookie_raw)
-    token = cookies.get("access_token")
-    if not token:
-        await websocket.close(code=4401)
-        return
-    try:
-        payload = decode_access_token(token.value)
-        user_id = int(payload["sub"])
-    except Exception:
+    user_id = _websocket_user_id(websocket)
+    if user_id is None:
         await websocket.close(code=4401)
         return
 
     room = f"user:{user_id}"
-    await manager.connect(room, websocket)
+    if await manager.connect(room, websocket) is None:
+        return
     try:
-        while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
+        await manager.receive(websocket)
+    finally:
         await manager.disconnect(room, websocket)
 
 
-async def _listen_pg_notify() -> None:
-    conn: AsyncConnection = await engine.connect()
-    raw = await conn.get_raw_connection()
-    driver_conn = raw.driver_connection
-    await driver_conn.add_listener(
-        "wishlist_events",
-        lambda *_args: asyncio.create_task(_notify_to_room(_args[2])),
-    )
-    await driver_conn.add_listener(
-        "user_events",
-        lambda *_args: asyncio.create_task(_notify_user_room(_args[2])),
-    )
-    await conn.execute(text("LISTEN wishlist_events"))
-    await conn.execute(text("LISTEN user_events"))
-
-
-async def _notify_to_room(payload: str) -> None:
-    try:
-        event = json.loads(payload)
-    except json.JSONDecodeError:
-        return
-    room = event.get("wishlist_public_id")
-    if room:
-        await manager.broadcast(room, event)
+async def _drain_connections() -> int:
+    # Closes sockets and streams over `ws_drain_seconds` instead of all at once. Runs at most once;
+    # anything still open when the bound expires is left to the server's own shutdown.
+    duration = settings.ws_drain_seconds
+    if duration <= 0 or manager.draining or not (manager.sockets or manager.streams):
+        return manager.drained
+    with contextlib.suppress(TimeoutError):
+        await asyncio.wait_for(manager.drain_connections(duration), timeout=duration + 1)
+    return manager.drained
 
 
-async def _notify_user_room(payload: str) -> None:
-    try:
-        event = json.loads(payload)
-    except json.JSONDecodeError:
-        return
-    user_id = event.get("user_id")
-    if user_id is None:
-        return
-    await manager.broadcast(f"user:{user_id}", event)
+# For the orchestrator's pre-stop hook: uvicorn closes every WebSocket before the lifespan
+# shutdown runs, so the drain has to start before the worker is signalled. It drains only the
+# worker process that handles the request.
+@app.post("/internal/drain", dependencies=[Depends(require_admin_token)])
+async def drain() -> dict[str, int]:
+    return {"drained": await _drain_connections()}
 
 
 @app.on_event("startup")
 async def startup() -> None:
-    asyncio.create_task(_listen_pg_notify())
+    listener.start()
+    relay.start()
+    notification_retention.start()
+    manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await manager.stop()
+    await notification_events.stop()
+    await relay.stop()
+    await notification_retention.stop()
+    await listener.stop()
@@ -3,7 +3,9 @@ import uuid
 from datetime import date, datetime
 
 from sqlalchemy import (
+    DDL,
     JSON,
+    BigInteger,
     Boolean,
     Date,
     CheckConstraint,
@@ -14,6 +16,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    event,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -64,6 +67,10 @@ class Wishlist(Base):
     public_id: Mapped[str] = mapped_column(String(36), unique=True, index=True, default=lambda: str(uuid.uuid4()))
     currency: Mapped[Currency] = mapped_column(String(3), default=Currency.USD, nullable=False)
     is_public: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    active_item_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -72,6 +79,15 @@ class Wishlist(Base):
     owner: Mapped[User] = relationship(back_populates="wishlists")
     items: Mapped[list["WishlistItem"]] = relationship(back_populates="wishlist", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index(
+            "ix_wishlists_public_directory",
+            updated_at.desc(),
+            id.desc(),
+            postgresql_where=(is_public.is_(True)),
+        ),
+    )
+
 
 class WishlistItem(Base):
     __tablename__ = "wishlist_items"
@@ -86,6 +102,15 @@ class WishlistItem(Base):
     position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     notes: Mapped[str | None] = mapped_column(Text)
     is_archived: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Maintained by the reserve/unreserve/contribute/refund services in the same transaction.
+    collected_cents: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    contributor_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    reserved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    reservation_viewer_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -142,6 +167,7 @@ class Contribution(Base):
         CheckConstraint("amount_cents > 0", name="ck_contribution_positive"),
         Index("ix_contributions_item", "item_id"),
         Index("ix_contributions_user", "contributor_user_id"),
+        Index("ix_contributions_viewer_item", "viewer_token_hash", "item_id"),
     )
 
 
@@ -188,19 +214,64 @@ class RefreshTokenDenylist(Base):
 class Notification(Base):
     __tablename__ = "notifications"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Range-partitioned by month on created_at, which therefore is part of the primary key.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     wishlist_id: Mapped[int | None] = mapped_column(ForeignKey("wishlists.id", ondelete="SET NULL"), nullable=True)
     item_id: Mapped[int | None] = mapped_column(ForeignKey("wishlist_items.id", ondelete="SET NULL"), nullable=True)
     type: Mapped[str] = mapped_column(String(50), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     body: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Collapsed contribution notifications: how many events the row stands for, and their total.
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    amount_cents: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
     read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user: Mapped[User] = relationship(back_populates="notifications")
 
     __table_args__ = (
-        Index("ix_notifications_user_created", "user_id", "created_at"),
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
         Index("ix_notifications_user_unread", "user_id", "read_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Monthly partitions are created ahead of time by the retention job; the default partition only
+# catches rows when that has not happened (and lets create_all() produce a usable table).
+event.listen(
+    Notification.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS notifications_default PARTITION OF notifications DEFAULT"),
+)
+
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+
+    # Kept apart from users so bumping an owner's counter never waits on their balance row lock.
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class EventOutbox(Base):
+    __tablename__ = "event_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    channel: Mapped[str] = mapped_column(String(40), nullable=False)
+    room: Mapped[str] = mapped_column(String(64), nullable=False)
+    event_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    revision: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    merge_key: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    relayed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_event_outbox_pending", "id", postgresql_where=(relayed_at.is_(None))),
+        Index("ix_event_outbox_relayed_at", "relayed_at"),
     )
@@ -11,5 +11,6 @@ class RealtimeEvent(BaseModel):
     event_id: str
     type: str
     wishlist_public_id: str
+    revision: int | None = None
     server_ts: datetime
     data: dict
@@ -8,6 +8,8 @@ class NotificationView(BaseModel):
     type: str
     title: str
     body: str | None
+    event_count: int = 1
+    amount_cents: int | None = None
     created_at: datetime
     read_at: datetime | None
 
@@ -57,6 +57,7 @@ class ItemView(BaseModel):
     reserved_by_me: bool = False
     reserved_at: datetime | None
     collected_cents: int
+    contributor_count: int = 0
     my_contribution_cents: int | None = None
     created_at: datetime
     updated_at: datetime
@@ -70,6 +71,7 @@ class WishlistView(BaseModel):
     currency: CurrencyLiteral
     is_public: bool
     is_owner: bool
+    revision: int = 0
     created_at: datetime
     updated_at: datetime
     items: list[ItemView]
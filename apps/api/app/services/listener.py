@@ -0,0 +1,248 @@
+import asyncio
+import contextlib
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.services.realtime import (
+    USER_CHANNEL,
+    WISHLIST_CHANNEL,
+    deliver_notify,
+    deliver_relayed_since,
+    room_channel,
+)
+from app.ws.manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Margin for clock skew between workers when replaying events of a bucket we just started hearing.
+BUCKET_CATCH_UP_MARGIN = timedelta(seconds=2)
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+# Owns one dedicated LISTEN connection (outside the SQLAlchemy pool) and reconnects with backoff.
+# NOTIFY callbacks only enqueue; a fixed set of workers dispatches, so a burst is bounded by the
+# queue size and overflow is counted instead of piling up tasks.
+# With NOTIFY_ROOM_BUCKETS set, only the bucket channels of locally hosted rooms are LISTENed on,
+# following room open/close events from the registry.
+class PgListener:
+    def __init__(
+        self,
+        channels: tuple[str, ...] = (WISHLIST_CHANNEL, USER_CHANNEL),
+        dispatch: Callable[[str], Awaitable[int | None]] = deliver_notify,
+        queue_size: int | None = None,
+        workers: int | None = None,
+        buckets: int | None = None,
+    ) -> None:
+        self.channels = channels
+        self.dispatch = dispatch
+        self.queue: asyncio.Queue[str] = asyncio.Queue(
+            maxsize=queue_size or settings.notify_queue_size
+        )
+        self.worker_count = workers or settings.notify_workers
+        self.keepalive = settings.notify_keepalive_seconds
+        self.max_backoff = settings.notify_reconnect_max_seconds
+        self.state = "stopped"
+        self.connected_since: datetime | None = None
+        self.last_error: str | None = None
+        self.received = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.dispatch_errors = 0
+        self.reconnects = 0
+        self.caught_up = 0
+        self.skipped = 0
+        self.buckets = settings.notify_room_buckets if buckets is None else buckets
+        self.bucket_rooms: dict[str, int] = {}
+        self.opened_at: dict[str, datetime] = {}
+        self.listening: set[str] = set()
+        self.listens = 0
+        self.unlistens = 0
+        self._changed = asyncio.Event()
+        self._lost_at: datetime | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        if self.buckets:
+            manager.rooms.on_open = self.room_opened
+            manager.rooms.on_close = self.room_closed
+        self.state = "connecting"
+        self._tasks = [asyncio.create_task(self._run())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        self.state = "stopped"
+
+    def room_opened(self, room: str) -> None:
+        channel = room_channel(room)
+        count = self.bucket_rooms.get(channel, 0)
+        self.bucket_rooms[channel] = count + 1
+        if count == 0 and channel not in self.listening:
+            self.opened_at.setdefault(channel, datetime.now(UTC))
+            self._changed.set()
+
+    def room_closed(self, room: str) -> None:
+        channel = room_channel(room)
+        count = self.bucket_rooms.get(channel, 0) - 1
+        if count > 0:
+            self.bucket_rooms[channel] = count
+            return
+        self.bucket_rooms.pop(channel, None)
+        self.opened_at.pop(channel, None)
+        self._changed.set()
+
+    def _wanted_channels(self) -> set[str]:
+        return set(self.bucket_rooms) if self.buckets else set(self.channels)
+
+    def _on_notify(self, _conn: asyncpg.Connection, _pid: int, _channel: str, payload: str) -> None:
+        self.received += 1
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Subscribers will see a revision gap on the next event and refetch.
+            self.dropped += 1
+
+    async def _worker(self) -> None:
+        while True:
+            payload = await self.queue.get()
+            try:
+                self.skipped += await self.dispatch(payload) or 0
+                self.dispatched += 1
+            except Exception:
+                self.dispatch_errors += 1
+                logger.exception("Failed to dispatch NOTIFY payload")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            conn: asyncpg.Connection | None = None
+            try:
+                conn = await asyncpg.connect(_asyncpg_dsn(settings.database_url))
+                lost = asyncio.Event()
+
+                def on_lost(_conn: asyncpg.Connection, lost: asyncio.Event = lost) -> None:
+                    lost.set()
+                    self._changed.set()
+
+                conn.add_termination_listener(on_lost)
+                self.listening = set()
+                if self._lost_at is not None:
+                    # The full catch-up below covers buckets opened while we were disconnected.
+                    self.opened_at.clear()
+                await self._sync_channels(conn)
+                if self._lost_at is not None:
+                    await self._catch_up(self._lost_at)
+                self.state = "listening"
+                self.connected_since = datetime.now(UTC)
+                attempt = 0
+                await self._watch(conn, lost)
+            except asyncio.CancelledError:
+                if conn is not None:
+                    with contextlib.suppress(Exception):
+                        await asyncio.wait_for(conn.close(), timeout=5)
+                raise
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.warning("LISTEN connection failed: %s", self.last_error)
+            if conn is not None:
+                conn.terminate()
+            if self.state == "listening":
+                self._lost_at = datetime.now(UTC)
+                self.reconnects += 1
+            self.state = "reconnecting"
+            self.connected_since = None
+            attempt += 1
+            delay = min(self.max_backoff, 0.5 * 2**attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _watch(self, conn: asyncpg.Connection, lost: asyncio.Event) -> None:
+        # The termination listener does not fire on a half-open socket, so probe it periodically.
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.keepalive)
+            except TimeoutError:
+                await asyncio.wait_for(conn.fetchval("SELECT 1"), timeout=self.keepalive)
+                continue
+            if not lost.is_set():
+                await self._sync_channels(conn)
+
+    async def _sync_channels(self, conn: asyncpg.Connection) -> None:
+        self._changed.clear()
+        wanted = self._wanted_channels()
+        for channel in self.listening - wanted:
+            await conn.remove_listener(channel, self._on_notify)
+            self.listening.discard(channel)
+            self.unlistens += 1
+        added = []
+        for channel in wanted - self.listening:
+            await conn.add_listener(channel, self._on_notify)
+            self.listening.add(channel)
+            self.listens += 1
+            added.append(channel)
+        if self.buckets and added:
+            await self._catch_up_buckets(added)
+
+    async def _catch_up_buckets(self, channels: list[str]) -> None:
+        # Events committed between a room's first local subscriber and the LISTEN taking effect
+        # were sent on a channel we did not hear yet.
+        opened = [self.opened_at.pop(channel) for channel in channels if channel in self.opened_at]
+        rooms = [room for room in manager.rooms if room_channel(room) in channels]
+        if not opened or not rooms:
+            return
+        try:
+            since = min(opened) - BUCKET_CATCH_UP_MARGIN
+            self.caught_up += await deliver_relayed_since(since, rooms)
+        except Exception:
+            logger.exception("Failed to replay outbox rows for new LISTEN channels")
+
+    async def _catch_up(self, lost_at: datetime) -> None:
+        # A half-open connection can go unnoticed for up to two keepalive periods.
+        since = lost_at - timedelta(seconds=2 * self.keepalive)
+        try:
+            self.caught_up += await deliver_relayed_since(since)
+            self._lost_at = None
+        except Exception:
+            logger.exception("Failed to replay outbox rows after reconnect")
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "mode": "buckets" if self.buckets else "global",
+            "buckets": self.buckets,
+            "channels": len(self.listening),
+            "listens": self.listens,
+            "unlistens": self.unlistens,
+            "skipped": self.skipped,
+            "connected_since": self.connected_since.isoformat() if self.connected_since else None,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "received": self.received,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "dispatch_errors": self.dispatch_errors,
+            "caught_up": self.caught_up,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "workers": self.worker_count,
+        }
+
+
+listener = PgListener()
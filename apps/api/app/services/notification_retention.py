@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import re
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^notifications_p(\d{4})(\d{2})$")
+# pg_try_advisory_xact_lock key, so only one worker maintains partitions at a time.
+MAINTENANCE_LOCK_ID = 0x6E6F7469
+
+
+def month_start(value: date, offset: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _utc(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=UTC)
+
+
+def partition_name(month: date) -> str:
+    return f"notifications_p{month:%Y%m}"
+
+
+async def create_partition(db: AsyncSession, month: date) -> None:
+    # Built outside the parent and attached, so rows that already landed in the default partition
+    # for this month can be moved over first (ATTACH fails while the default holds them).
+    name = partition_name(month)
+    bounds = {"start": _utc(month), "end": _utc(month_start(month, 1))}
+    await db.execute(text(f"CREATE TABLE {name} (LIKE notifications INCLUDING DEFAULTS)"))
+    await db.execute(
+        text(
+            "WITH moved AS (DELETE FROM notifications_default "
+            "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await db.execute(
+        text(
+            f"ALTER TABLE notifications ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        )
+    )
+
+
+async def list_partitions(db: AsyncSession) -> dict[str, date]:
+    rows = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = 'notifications'"
+        )
+    )
+    partitions = {}
+    for (name,) in rows.all():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return partitions
+
+
+async def drop_partition(db: AsyncSession, name: str) -> None:
+    # Unread rows disappear with the partition, so their users' counters go down first.
+    await db.execute(
+        text(
+            "UPDATE notification_counters AS c SET unread = GREATEST(c.unread - expired.unread, 0) "
+            f"FROM (SELECT user_id, COUNT(*) AS unread FROM {name} WHERE read_at IS NULL "
+            "GROUP BY user_id) AS expired WHERE c.user_id = expired.user_id"
+        )
+    )
+    await db.execute(text(f"ALTER TABLE notifications DETACH PARTITION {name}"))
+    await db.execute(text(f"DROP TABLE {name}"))
+
+
+async def purge_default_partition(db: AsyncSession, before: date) -> None:
+    await db.execute(
+        text(
+            "WITH expired AS (DELETE FROM notifications_default WHERE created_at < :before "
+            "RETURNING user_id, read_at) "
+            "UPDATE notification_counters AS c SET unread = GREATEST(c.unread - e.unread, 0) "
+            "FROM (SELECT user_id, COUNT(*) AS unread FROM expired WHERE read_at IS NULL "
+            "GROUP BY user_id) AS e WHERE c.user_id = e.user_id"
+        ),
+        {"before": _utc(before)},
+    )
+
+
+# Keeps monthly notification partitions ahead of time and drops whole months past retention,
+# instead of deleting expired rows one by one.
+class NotificationRetention:
+    def __init__(
+        self,
+        retention_months: int | None = None,
+        months_ahead: int | None = None,
+        interval: float | None = None,
+    ) -> None:
+        self.retention_months = retention_months or settings.notification_retention_months
+        self.months_ahead = months_ahead or settings.notification_partitions_ahead
+        self.interval = interval or settings.notification_maintenance_interval_seconds
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.created = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.errors += 1
+                logger.exception("Notification partition maintenance failed")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, today: date | None = None) -> None:
+        today = today or datetime.now(UTC).date()
+        current = month_start(today)
+        oldest_kept = month_start(current, -self.retention_months)
+        async with SessionLocal() as db:
+            locked = await db.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_ID}
+            )
+            if not locked:
+                return
+            existing = await list_partitions(db)
+            for offset in range(self.months_ahead + 1):
+                month = month_start(current, offset)
+                if partition_name(month) not in existing:
+                    await create_partition(db, month)
+                    self.created += 1
+            for name, month in sorted(existing.items(), key=lambda entry: entry[1]):
+                if month < oldest_kept:
+                    await drop_partition(db, name)
+                    self.dropped += 1
+            await purge_default_partition(db, oldest_kept)
+            await db.commit()
+        self.runs += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "created": self.created,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+notification_retention = NotificationRetention()
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import event, func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import Notification, NotificationCounter, Wishlist, WishlistItem
+from app.services.realtime import publish_user_event
+from app.utils.cursor import decode_cursor
+
+logger = logging.getLogger(__name__)
+
+CONTRIBUTION_RECEIVED = "contribution.received"
+THROTTLED_EVENTS = "throttled_notification_events"
+
+
+async def add_notification(db: AsyncSession, notification: Notification) -> None:
+    db.add(notification)
+    stmt = insert(NotificationCounter).values(user_id=notification.user_id, unread=1)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread": NotificationCounter.unread + 1},
+        )
+    )
+
+
+async def lock_unread(db: AsyncSession, user_id: int) -> None:
+    # add_notification increments the counter under this row lock. Taking it before marking rows
+    # read means a notification added concurrently is either marked read too or counted after the
+    # reset, never counted and then zeroed while it stays unread.
+    await db.execute(
+        select(NotificationCounter.user_id)
+        .where(NotificationCounter.user_id == user_id)
+        .with_for_update()
+    )
+
+
+async def reset_unread(db: AsyncSession, user_id: int) -> None:
+    await db.execute(
+        update(NotificationCounter).where(NotificationCounter.user_id == user_id).values(unread=0)
+    )
+
+
+async def get_unread_count(db: AsyncSession, user_id: int) -> int:
+    unread = await db.scalar(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    )
+    return int(unread or 0)
+
+
+async def list_user_notifications(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    cursor: str | None = None,
+    since: str | None = None,
+) -> list[Notification]:
+    # Newest first. cursor pages back to older rows, since fetches only rows newer than it.
+    position = tuple_(Notification.created_at, Notification.id)
+    stmt = (
+        select(Notification)
+        .where(Notification.user_id == user_id)
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(limit)
+    )
+    if cursor is not None:
+        created_at, notification_id = decode_cursor(cursor)
+        stmt = stmt.where(position < tuple_(literal(created_at), literal(notification_id)))
+    if since is not None:
+        created_at, notification_id = decode_cursor(since)
+        stmt = stmt.where(position > tuple_(literal(created_at), literal(notification_id)))
+    return list((await db.execute(stmt)).scalars().all())
+
+
+def _contribution_body(count: int, total_cents: int, currency: str, message: str | None) -> str:
+    if count == 1:
+        return f"Someone contributed {total_cents / 100:.2f} {currency}" + (
+            f". Comment: {message}" if message else ". Без комментария."
+        )
+    body = f"Вкладов: {count}, всего {total_cents / 100:.2f} {currency}"
+    return body + (f". Последний комментарий: {message}" if message else "")
+
+
+async def notify_contribution(
+    db: AsyncSession,
+    wishlist: Wishlist,
+    item: WishlistItem,
+    amount_cents: int,
+    message: str | None,
+    window_seconds: float | None = None,
+) -> int:
+    # Returns how many unread notifications were added: 0 when folded into an existing one.
+    window = window_seconds
+    if window is None:
+        window = settings.notification_collapse_window_seconds
+    if window > 0:
+        since = datetime.now(UTC) - timedelta(seconds=window)
+        current = await db.scalar(
+            select(Notification)
+            .where(
+                Notification.user_id == wishlist.owner_id,
+                Notification.read_at.is_(None),
+                Notification.created_at > since,
+                Notification.item_id == item.id,
+                Notification.type == CONTRIBUTION_RECEIVED,
+            )
+            .order_by(Notification.created_at.desc())
+            .limit(1)
+            .with_for_update()
+        )
+        if current is not None:
+            count = current.event_count + 1
+            total = (current.amount_cents or 0) + amount_cents
+            # created_at moves forward so the row sorts first and shows up in `since` fetches, where
+            # the client replaces its copy. Clock time, not the transaction start: that may predate
+            # the cursor of a client that fetched while this transaction waited for the lock.
+            await db.execute(
+                update(Notification)
+                .where(Notification.id == current.id, Notification.created_at == current.created_at)
+                .values(
+                    event_count=count,
+                    amount_cents=total,
+                    body=_contribution_body(count, total, wishlist.currency, message),
+                    created_at=func.clock_timestamp(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            return 0
+
+    await add_notification(
+        db,
+        Notification(
+            user_id=wishlist.owner_id,
+            wishlist_id=wishlist.id,
+            item_id=item.id,
+            type=CONTRIBUTION_RECEIVED,
+            title=f"Новый вклад в \"{item.name}\"",
+            body=_contribution_body(1, amount_cents, wishlist.currency, message),
+            amount_cents=amount_cents,
+        ),
+    )
+    return 1
+
+
+# Limits notifications.updated events to one per user per interval. The first event goes out
+# with the request; later ones within the interval are merged (increments summed) into a single
+# event published when the interval ends.
+class UserEventThrottle:
+    def __init__(self, interval: float | None = None) -> None:
+        if interval is None:
+            interval = settings.notification_event_interval_seconds
+        self.interval = interval
+        self._last: dict[int, float] = {}
+        self._pending: dict[int, int] = {}
+        self._handles: dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.sent = 0
+        self.merged = 0
+
+    def publish(self, db: AsyncSession, user_id: int, increment: int) -> None:
+        # A contribution folded into an existing notification adds nothing unread.
+        if increment == 0:
+            return
+        if self.interval <= 0:
+            publish_user_event(db, user_id, "notifications.updated", {"increment": increment})
+            self.sent += 1
+            return
+        if user_id in self._pending:
+            self._pending[user_id] += increment
+            self.merged += 1
+            return
+        now = time.monotonic()
+        last = self._last.get(user_id)
+        if last is None or now - last >= self.interval:
+            publish_user_event(db, user_id, "notifications.updated", {"increment": increment})
+            # The interval starts once the event is committed; a rolled back one never went out.
+            db.info.setdefault(THROTTLED_EVENTS, []).append((self, user_id))
+            self.sent += 1
+            return
+        self._pending[user_id] = increment
+        self.merged += 1
+        loop = asyncio.get_running_loop()
+        self._handles[user_id] = loop.call_later(
+            last + self.interval - now, self._flush_later, user_id
+        )
+
+    def _remember(self, user_id: int, now: float) -> None:
+        self._last[user_id] = now
+        if len(self._last) > 10_000:
+            self._last = {key: at for key, at in self._last.items() if now - at < self.interval}
+
+    def _flush_later(self, user_id: int) -> None:
+        self._handles.pop(user_id, None)
+        task = asyncio.create_task(self._flush(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, user_id: int) -> None:
+        increment = self._pending.pop(user_id, 0)
+        try:
+            async with SessionLocal() as db:
+                publish_user_event(db, user_id, "notifications.updated", {"increment": increment})
+                await db.commit()
+            self._remember(user_id, time.monotonic())
+            self.sent += 1
+        except Exception:
+            logger.exception("Deferred notifications.updated event failed")
+
+    async def stop(self) -> None:
+        # Sends the merged events still waiting for their interval instead of dropping them.
+        handles, self._handles = self._handles, {}
+        for handle in handles.values():
+            handle.cancel()
+        await asyncio.gather(*(self._flush(user_id) for user_id in handles), *self._tasks)
+
+    def snapshot(self) -> dict:
+        return {"pending": len(self._pending), "sent": self.sent, "merged": self.merged}
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_throttled_events(session: Session) -> None:
+    now = time.monotonic()
+    for throttle, user_id in session.info.pop(THROTTLED_EVENTS, ()):
+        throttle._remember(user_id, now)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_throttled_events(session: Session) -> None:
+    session.info.pop(THROTTLED_EVENTS, None)
+
+
+notification_events = UserEventThrottle()
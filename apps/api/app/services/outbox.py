@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, event, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import EventOutbox
+from app.services.realtime import NODE_ID, OUTBOX_PENDING, notify_channel, publish_local
+from app.ws.encoding import EncodedEvent, encode_notify_batch, encode_notify_reference
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+        retention_seconds: int | None = None,
+        notify_limit: int | None = None,
+    ) -> None:
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_interval = poll_interval or settings.outbox_poll_interval_seconds
+        self.retention = timedelta(seconds=retention_seconds or settings.outbox_retention_seconds)
+        self.notify_limit = notify_limit or settings.notify_payload_limit_bytes
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._last_purge = datetime.min.replace(tzinfo=UTC)
+        self.relayed = 0
+        self.batches = 0
+        self.references = 0
+        self.errors = 0
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.relay_batch() >= self.batch_size:
+                    pass
+                await self._maybe_purge()
+            except Exception:
+                self.errors += 1
+                logger.exception("Outbox relay failed")
+                await asyncio.sleep(self.poll_interval)
+
+    async def relay_batch(self) -> int:
+        async with SessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(EventOutbox)
+                    .where(EventOutbox.relayed_at.is_(None))
+                    .order_by(EventOutbox.id.asc())
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).scalars().all()
+            if not rows:
+                return 0
+
+            by_channel: dict[str, list[tuple[int, EncodedEvent]]] = defaultdict(list)
+            frames = []
+            for row in rows:
+                frame = EncodedEvent(
+                    row.room,
+                    row.event_id,
+                    NODE_ID,
+                    text=row.payload,
+                    revision=row.revision,
+                    merge_key=row.merge_key,
+                )
+                by_channel[notify_channel(row.channel, row.room)].append((row.id, frame))
+                frames.append(frame)
+
+            await db.execute(
+                update(EventOutbox)
+                .where(EventOutbox.id.in_([row.id for row in rows]))
+                .values(relayed_at=datetime.now(UTC))
+            )
+            for channel, entries in by_channel.items():
+                await self._notify(db, channel, entries)
+            await db.commit()
+
+        publish_local(frames)
+        self.relayed += len(frames)
+        self.batches += 1
+        return len(frames)
+
+    async def _notify(
+        self, db: AsyncSession, channel: str, entries: list[tuple[int, EncodedEvent]]
+    ) -> None:
+        payload = encode_notify_batch([frame for _, frame in entries])
+        if len(payload.encode()) > self.notify_limit:
+            # Too large for NOTIFY (8000 bytes): listeners load the rows themselves.
+            payload = encode_notify_reference(NODE_ID, [outbox_id for outbox_id, _ in entries])
+            self.references += 1
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload}
+        )
+
+    async def _maybe_purge(self) -> None:
+        now = datetime.now(UTC)
+        if now - self._last_purge < self.retention:
+            return
+        self._last_purge = now
+        async with SessionLocal() as db:
+            cutoff = now - self.retention
+            await db.execute(delete(EventOutbox).where(EventOutbox.relayed_at < cutoff))
+            await db.commit()
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "relayed": self.relayed,
+            "batches": self.batches,
+            "references": self.references,
+            "errors": self.errors,
+        }
+
+
+relay = OutboxRelay()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay_after_commit(session: Session) -> None:
+    if session.info.pop(OUTBOX_PENDING, False):
+        relay.wake()
+
@@ -0,0 +1,86 @@
+import time
+from typing import NamedTuple
+
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import User, Wishlist
+from app.schemas.public import PublicWishlistSummary
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+class DirectoryPage(NamedTuple):
+    items: list[PublicWishlistSummary]
+    next_cursor: str | None
+
+
+async def load_directory_page(db: AsyncSession, cursor: str | None, limit: int) -> DirectoryPage:
+    # Walks ix_wishlists_public_directory from the cursor. The extra row signals a next page.
+    stmt = (
+        select(Wishlist, User.nickname, User.email)
+        .join(User, User.id == Wishlist.owner_id)
+        .where(Wishlist.is_public.is_(True))
+        .order_by(Wishlist.updated_at.desc(), Wishlist.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        updated_at, wishlist_id = decode_cursor(cursor)
+        position = tuple_(literal(updated_at), literal(wishlist_id))
+        stmt = stmt.where(tuple_(Wishlist.updated_at, Wishlist.id) < position)
+    rows = (await db.execute(stmt)).all()
+
+    items = [
+        PublicWishlistSummary(
+            public_id=w.public_id,
+            title=w.title,
+            author_name=(nickname or email),
+            currency=w.currency,
+            item_count=w.active_item_count,
+            updated_at=w.updated_at,
+        )
+        for w, nickname, email in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1][0]
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    return DirectoryPage(items, next_cursor)
+
+
+# The first pages of the directory are what nearly every visitor loads, so they are kept for a few
+# seconds. Only pages reached from page one are cached, which bounds the cache to a handful of
+# entries; it is rebuilt whenever page one is reloaded.
+class DirectoryCache:
+    def __init__(self, ttl_seconds: float | None = None, max_pages: int | None = None) -> None:
+        self.ttl = ttl_seconds or settings.public_directory_cache_ttl_seconds
+        self.max_pages = max_pages or settings.public_directory_cached_pages
+        self._pages: dict[str | None, tuple[float, DirectoryPage]] = {}
+        self._depth: dict[str | None, int] = {None: 1}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cursor: str | None) -> DirectoryPage | None:
+        entry = self._pages.get(cursor)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, cursor: str | None, page: DirectoryPage) -> None:
+        if cursor is None:
+            self._pages.clear()
+            self._depth = {None: 1}
+        depth = self._depth.get(cursor)
+        if depth is None or depth > self.max_pages:
+            return
+        self._pages[cursor] = (time.monotonic() + self.ttl, page)
+        if page.next_cursor is not None:
+            self._depth[page.next_cursor] = depth + 1
+
+    def snapshot(self) -> dict:
+        return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+directory_cache = DirectoryCache()
@@ -1,35 +1,255 @@
-import json
 import uuid
+import zlib
 from datetime import UTC, datetime
 
-from sqlalchemy import text
+import orjson
+from sqlalchemy import ColumnElement, event, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from app.ws.manager import manager
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import EventOutbox, Wishlist
+from app.services.wishlist_resolver import wishlist_resolver
+from app.services.wishlist_snapshot import snapshot_cache
+from app.ws.coalescer import coalescer
+from app.ws.dedup import deduplicator
+from app.ws.encoding import (
+    EncodedEvent,
+    decode_notify_batch,
+    decode_notify_reference,
+    event_merge_key,
+)
+from app.ws.history import history
+from app.ws.manager import Connection, manager
 
+# Identifies this worker process in NOTIFY payloads so it can skip its own echoes.
+NODE_ID = uuid.uuid4().hex[:16]
 
-async def publish_event(db: AsyncSession, public_id: str, event_type: str, data: dict) -> None:
+WISHLIST_CHANNEL = "wishlist_events"
+USER_CHANNEL = "user_events"
+
+
+def notify_channel(channel: str, room: str) -> str:
+    # With bucketing, a worker only LISTENs on the buckets of rooms it hosts. crc32 rather than
+    # hash() so every process maps a room to the same bucket.
+    buckets = settings.notify_room_buckets
+    if not buckets:
+        return channel
+    return f"{channel}_{zlib.crc32(room.encode()) % buckets}"
+
+
+def room_channel(room: str) -> str:
+    return notify_channel(USER_CHANNEL if room.startswith("user:") else WISHLIST_CHANNEL, room)
+
+
+# Other workers changed or deleted a wishlist: drop our cached lookup, and on deletion the
+# snapshot. Matched on the encoded body so remote events need not be parsed.
+WISHLIST_UPDATED_MARKER = b'"type":"wishlist.updated"'
+WISHLIST_DELETED_MARKER = b'"type":"wishlist.deleted"'
+
+# Set on the session when it wrote outbox rows; the relay is woken after that session commits.
+OUTBOX_PENDING = "outbox_pending"
+# Events published during the current transaction, written to the outbox when it commits.
+PENDING_EVENTS = "realtime_events"
+
+
+def _collect(db: AsyncSession, channel: str, room: str, message: dict) -> None:
+    db.info.setdefault(PENDING_EVENTS, []).append(
+        {
+            "channel": channel,
+            "room": room,
+            "event_id": message["event_id"],
+            "revision": message.get("revision"),
+            "merge_key": event_merge_key(message["type"], message["data"]),
+            "payload": orjson.dumps(message, default=str).decode(),
+        }
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _write_collected_events(session: Session) -> None:
+    # One multi-row INSERT per transaction instead of a row per event; the relay then sends a
+    # single NOTIFY per channel for everything committed together.
+    rows = session.info.pop(PENDING_EVENTS, None)
+    if rows:
+        session.execute(insert(EventOutbox), rows)
+        session.info[OUTBOX_PENDING] = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_collected_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS, None)
+    session.info.pop(OUTBOX_PENDING, None)
+
+
+def publish_event(
+    db: AsyncSession, public_id: str, event_type: str, data: dict, revision: int | None = None
+) -> None:
     event = {
         "event_id": str(uuid.uuid4()),
+        "node_id": NODE_ID,
         "type": event_type,
         "wishlist_public_id": public_id,
+        "revision": revision,
         "server_ts": datetime.now(UTC).isoformat(),
         "data": data,
     }
-    await manager.broadcast(public_id, event)
-    payload = json.dumps(event)
-    await db.execute(text("SELECT pg_notify('wishlist_events', :payload)"), {"payload": payload})
+    _collect(db, WISHLIST_CHANNEL, public_id, event)
 
 
-async def publish_user_event(db: AsyncSession, user_id: int, event_type: str, data: dict) -> None:
+def publish_user_event(db: AsyncSession, user_id: int, event_type: str, data: dict) -> None:
     event = {
         "event_id": str(uuid.uuid4()),
+        "node_id": NODE_ID,
         "type": event_type,
         "user_id": user_id,
         "server_ts": datetime.now(UTC).isoformat(),
         "data": data,
     }
-    room = f"user:{user_id}"
-    await manager.broadcast(room, event)
-    payload = json.dumps(event)
-    await db.execute(text("SELECT pg_notify('user_events', :payload)"), {"payload": payload})
+    _collect(db, USER_CHANNEL, f"user:{user_id}", event)
+
+
+def _fan_out(frames: list[EncodedEvent]) -> int:
+    # Events of one room are handed to the coalescer together, so a transaction that published
+    # several of them reaches subscribers as a single message. Returns how many events had no
+    # local subscriber.
+    skipped = 0
+    by_room: dict[str, list[EncodedEvent]] = {}
+    for frame in frames:
+        if frame.room not in manager.rooms:
+            skipped += 1
+        if frame.revision is None:
+            manager.broadcast(frame.room, frame.data)
+            continue
+        history.record(frame.room, frame.revision, frame.data)
+        if WISHLIST_UPDATED_MARKER in frame.data:
+            wishlist_resolver.invalidate(frame.room)
+        elif WISHLIST_DELETED_MARKER in frame.data:
+            wishlist_resolver.invalidate(frame.room)
+            snapshot_cache.invalidate(frame.room)
+        by_room.setdefault(frame.room, []).append(frame)
+    for room, room_frames in by_room.items():
+        if room in manager.rooms:
+            coalescer.submit_all(room, room_frames)
+    return skipped
+
+
+def publish_local(frames: list[EncodedEvent]) -> None:
+    for frame in frames:
+        deduplicator.remember(frame.event_id)
+    _fan_out(frames)
+
+
+def _is_new_remote(frame: EncodedEvent) -> bool:
+    if frame.origin == NODE_ID:
+        deduplicator.suppressed_echoes += 1
+        return False
+    return not deduplicator.is_duplicate(frame.event_id)
+
+
+async def _deliver_outbox_rows(origin: str, condition: ColumnElement[bool]) -> tuple[int, int]:
+    async with SessionLocal() as db:
+        rows = (
+            await db.execute(
+                select(
+                    EventOutbox.room,
+                    EventOutbox.event_id,
+                    EventOutbox.revision,
+                    EventOutbox.merge_key,
+                    EventOutbox.payload,
+                )
+                .where(condition)
+                .order_by(EventOutbox.id.asc())
+            )
+        ).all()
+    frames = [
+        EncodedEvent(room, event_id, origin, text=payload, revision=revision, merge_key=key)
+        for room, event_id, revision, key, payload in rows
+    ]
+    return len(rows), _fan_out([frame for frame in frames if _is_new_remote(frame)])
+
+
+async def deliver_notify(payload: str) -> int:
+    reference = decode_notify_reference(payload)
+    if reference is not None:
+        origin, outbox_ids = reference
+        if origin == NODE_ID:
+            deduplicator.suppressed_echoes += len(outbox_ids)
+            return 0
+        _, skipped = await _deliver_outbox_rows(origin, EventOutbox.id.in_(outbox_ids))
+        return skipped
+    return _fan_out([frame for frame in decode_notify_batch(payload) if _is_new_remote(frame)])
+
+
+async def deliver_relayed_since(since: datetime, rooms: list[str] | None = None) -> int:
+    # Catch-up after the LISTEN connection was lost: NOTIFYs sent meanwhile are gone, but the
+    # outbox rows are kept for the retention window. Our own rows are filtered by the deduplicator.
+    condition = EventOutbox.relayed_at >= since
+    if rooms is not None:
+        condition &= EventOutbox.room.in_(rooms)
+    delivered, _ = await _deliver_outbox_rows("", condition)
+    return delivered
+
+
+async def resume_wishlist(conn: Connection, public_id: str, since: int) -> None:
+    # Called right after the subscriber joined the room, before any await, so replayed events are
+    # queued ahead of live ones and none is lost or sent twice.
+    missed = history.since(public_id, since)
+    if missed is not None:
+        manager.replay(conn, missed)
+        return
+    async with SessionLocal() as db:
+        current = await db.scalar(select(Wishlist.revision).where(Wishlist.public_id == public_id))
+    if current is None or current != since:
+        manager.replay(conn, None)
+
+
+def _control_reply(conn: Connection, reply: dict) -> None:
+    manager.send(conn, orjson.dumps(reply))
+
+
+async def handle_control_message(conn: Connection, user_id: int | None, text: str) -> None:
+    # Multiplexed sockets: {"action": "subscribe" | "unsubscribe", "room": "<public_id>" | "user",
+    # "since": <revision>}. Anything else (e.g. "pong") only counts as liveness.
+    try:
+        message = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return
+    if not isinstance(message, dict):
+        return
+    action, name, since = message.get("action"), message.get("room"), message.get("since")
+    if action not in ("subscribe", "unsubscribe") or not isinstance(name, str) or not name:
+        _control_reply(conn, {"type": "error", "room": name, "error": "bad_request"})
+        return
+    if name == "user":
+        if user_id is None:
+            _control_reply(conn, {"type": "error", "room": name, "error": "unauthorized"})
+            return
+        room = f"user:{user_id}"
+    else:
+        room = name
+
+    if action == "unsubscribe":
+        manager.unsubscribe(conn, room)
+        _control_reply(conn, {"type": "unsubscribed", "room": name})
+        return
+    if room in conn.rooms:
+        return
+    if len(conn.rooms) >= settings.ws_max_subscriptions:
+        _control_reply(conn, {"type": "error", "room": name, "error": "too_many_subscriptions"})
+        return
+    if name != "user":
+        async with SessionLocal() as db:
+            wishlist = await wishlist_resolver.resolve(db, room)
+        if wishlist is None or not wishlist.visible_to(user_id):
+            _control_reply(conn, {"type": "error", "room": name, "error": "not_found"})
+            return
+    if not manager.admits(room):
+        _control_reply(conn, {"type": "error", "room": name, "error": "room_full"})
+        return
+    if not manager.subscribe(conn, room):
+        return
+    _control_reply(conn, {"type": "subscribed", "room": name})
+    if isinstance(since, int) and name != "user":
+        await resume_wishlist(conn, room, since)
@@ -0,0 +1,115 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import Wishlist
+
+
+class ResolvedWishlist(NamedTuple):
+    id: int
+    is_public: bool
+    owner_id: int
+    currency: str
+
+    def visible_to(self, user_id: int | None) -> bool:
+        return self.is_public or self.owner_id == user_id
+
+
+def _is_public_id(value: str) -> bool:
+    try:
+        return len(value) == 36 and str(uuid.UUID(value)) == value
+    except ValueError:
+        return False
+
+
+# public_id -> wishlist lookup shared by HTTP handlers and WebSocket subscriptions. Entries expire
+# after a TTL because other workers update wishlists too; unknown ids are cached separately (and
+# shorter) so random ids cannot push real wishlists out of the LRU.
+class WishlistResolver:
+    def __init__(
+        self,
+        max_size: int | None = None,
+        ttl_seconds: float | None = None,
+        negative_ttl_seconds: float | None = None,
+    ) -> None:
+        self.max_size = max_size or settings.wishlist_cache_size
+        self.ttl = ttl_seconds or settings.wishlist_cache_ttl_seconds
+        self.negative_ttl = negative_ttl_seconds or settings.wishlist_cache_negative_ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, ResolvedWishlist]] = OrderedDict()
+        self._missing: OrderedDict[str, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.rejected = 0
+        self.invalidations = 0
+
+    async def resolve(self, db: AsyncSession, public_id: str) -> ResolvedWishlist | None:
+        if not _is_public_id(public_id):
+            self.rejected += 1
+            return None
+        now = time.monotonic()
+        entry = self._entries.get(public_id)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(public_id)
+                self.hits += 1
+                return entry[1]
+            del self._entries[public_id]
+        expires_at = self._missing.get(public_id)
+        if expires_at is not None:
+            if expires_at > now:
+                self.negative_hits += 1
+                return None
+            del self._missing[public_id]
+
+        self.misses += 1
+        row = (
+            await db.execute(
+                select(Wishlist.id, Wishlist.is_public, Wishlist.owner_id, Wishlist.currency).where(
+                    Wishlist.public_id == public_id
+                )
+            )
+        ).first()
+        if row is None:
+            self._store_missing(public_id)
+            return None
+        resolved = ResolvedWishlist(row.id, row.is_public, row.owner_id, row.currency)
+        self.store(public_id, resolved)
+        return resolved
+
+    def store(self, public_id: str, resolved: ResolvedWishlist) -> None:
+        self._missing.pop(public_id, None)
+        self._entries[public_id] = (time.monotonic() + self.ttl, resolved)
+        self._entries.move_to_end(public_id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _store_missing(self, public_id: str) -> None:
+        self._missing[public_id] = time.monotonic() + self.negative_ttl
+        self._missing.move_to_end(public_id)
+        if len(self._missing) > self.max_size // 4:
+            self._missing.popitem(last=False)
+
+    def invalidate(self, public_id: str) -> None:
+        self.invalidations += 1
+        self._entries.pop(public_id, None)
+        self._missing.pop(public_id, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "missing": len(self._missing),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "invalidations": self.invalidations,
+        }
+
+
+wishlist_resolver = WishlistResolver()
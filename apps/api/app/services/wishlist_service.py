@@ -1,7 +1,8 @@
 from datetime import UTC, datetime
+from enum import Enum
 
 from fastapi import HTTPException
-from sqlalchemy import Select, func, select
+from sqlalchemy import ColumnElement, func, or_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,6 +11,14 @@ from app.models.models import Contribution, Reservation, User, ViewerAccount, Wi
 MIN_CONTRIBUTION_CENTS = 100
 
 
+class _Keep(Enum):
+    # Marks an item state column that update_item_state leaves untouched (None clears a column).
+    KEEP = "keep"
+
+
+KEEP = _Keep.KEEP
+
+
 async def ensure_owner_wishlist(db: AsyncSession, wishlist_id: int, owner_id: int) -> Wishlist:
     wishlist = await db.scalar(
         select(Wishlist).where(Wishlist.id == wishlist_id, Wishlist.owner_id == owner_id)
@@ -33,78 +42,160 @@ async def ensure_owner_item(db: AsyncSession, item_id: int, owner_id: int) -> Wi
 async def get_wishlist_items_with_aggregates(
     db: AsyncSession, wishlist_id: int, viewer_hash: str | None = None
 ) -> list[dict]:
-    contrib_subq = (
-        select(Contribution.item_id, func.coalesce(func.sum(Contribution.amount_cents), 0).label("collected"))
-        .where(Contribution.refunded_at.is_(None))
+    items = (
+        await db.execute(
+            select(WishlistItem)
+            .where(WishlistItem.wishlist_id == wishlist_id)
+            .order_by(WishlistItem.position.asc(), WishlistItem.created_at.asc())
+        )
+    ).scalars().all()
+    mine = {}
+    if viewer_hash:
+        mine = await get_viewer_contributions(db, viewer_hash, [item.id for item in items])
+
+    return [
+        {
+            "item": item,
+            "collected": item.collected_cents,
+            "contributors": item.contributor_count,
+            "reserved": item.reserved_at is not None,
+            "reserved_by_me": bool(viewer_hash and item.reservation_viewer_hash == viewer_hash),
+            "reserved_at": item.reserved_at,
+            "reservation_viewer_hash": item.reservation_viewer_hash,
+            "mine": mine.get(item.id, 0) if viewer_hash else None,
+        }
+        for item in items
+    ]
+
+
+def shared_item_fields(row: dict) -> dict:
+    # ItemView fields that are the same for every viewer, from a
+    # get_wishlist_items_with_aggregates row.
+    item = row["item"]
+    return {
+        "id": item.id,
+        "name": item.name,
+        "url": item.url,
+        "image_url": item.image_url,
+        "price_cents": item.price_cents,
+        "allow_contributions": item.allow_contributions,
+        "notes": item.notes,
+        "position": item.position,
+        "is_archived": item.is_archived,
+        "reserved": row["reserved"],
+        "reserved_at": row["reserved_at"],
+        "collected_cents": row["collected"],
+        "contributor_count": row["contributors"],
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
+
+
+def wishlist_fields(wishlist: Wishlist) -> dict:
+    return {
+        "id": wishlist.id,
+        "public_id": wishlist.public_id,
+        "title": wishlist.title,
+        "description": wishlist.description,
+        "currency": wishlist.currency,
+        "is_public": wishlist.is_public,
+        "revision": wishlist.revision,
+        "created_at": wishlist.created_at,
+        "updated_at": wishlist.updated_at,
+    }
+
+
+async def get_viewer_contributions(
+    db: AsyncSession, viewer_hash: str, item_ids: list[int]
+) -> dict[int, int]:
+    if not item_ids:
+        return {}
+    rows = await db.execute(
+        select(Contribution.item_id, func.sum(Contribution.amount_cents))
+        .where(
+            Contribution.viewer_token_hash == viewer_hash,
+            Contribution.item_id.in_(item_ids),
+            Contribution.refunded_at.is_(None),
+        )
         .group_by(Contribution.item_id)
-        .subquery()
     )
-    reservation_subq = (
-        select(
-            Reservation.item_id.label("item_id"),
-            Reservation.created_at.label("reserved_at"),
-            Reservation.viewer_token_hash.label("reservation_viewer_hash"),
-        )
-        .where(Reservation.released_at.is_(None))
-        .subquery()
+    return {item_id: int(total or 0) for item_id, total in rows.all()}
+
+
+async def bump_wishlist_revision(db: AsyncSession, wishlist_id: int) -> int:
+    # Keep updated_at untouched: the revision moves on every reservation/contribution,
+    # while updated_at tracks edits made by the owner.
+    revision = await db.scalar(
+        update(Wishlist)
+        .where(Wishlist.id == wishlist_id)
+        .values(revision=Wishlist.revision + 1, updated_at=Wishlist.updated_at)
+        .returning(Wishlist.revision)
+        .execution_options(synchronize_session=False)
     )
+    return int(revision or 0)
 
-    my_contrib_subq = None
-    if viewer_hash:
-        my_contrib_subq = (
-            select(
-                Contribution.item_id,
-                func.coalesce(func.sum(Contribution.amount_cents), 0).label("mine"),
-            )
-            .where(Contribution.viewer_token_hash == viewer_hash)
-            .where(Contribution.refunded_at.is_(None))
-            .group_by(Contribution.item_id)
-            .subquery()
-        )
 
-    stmt: Select = (
-        select(
-            WishlistItem,
-            func.coalesce(contrib_subq.c.collected, 0).label("collected"),
-            reservation_subq.c.reserved_at,
-            (reservation_subq.c.reserved_at.is_not(None)).label("reserved"),
-            reservation_subq.c.reservation_viewer_hash,
-            func.coalesce(my_contrib_subq.c.mine, 0).label("mine") if my_contrib_subq is not None else None,
-        )
-        .outerjoin(contrib_subq, contrib_subq.c.item_id == WishlistItem.id)
-        .outerjoin(reservation_subq, reservation_subq.c.item_id == WishlistItem.id)
-        .where(WishlistItem.wishlist_id == wishlist_id)
-        .order_by(WishlistItem.position.asc(), WishlistItem.created_at.asc())
-    )
-    if my_contrib_subq is not None:
-        stmt = stmt.outerjoin(my_contrib_subq, my_contrib_subq.c.item_id == WishlistItem.id)
-
-    rows = (await db.execute(stmt)).all()
-    result = []
-    for row in rows:
-        item = row[0]
-        collected = int(row[1] or 0)
-        reserved_at = row[2]
-        reserved = bool(row[3])
-        reservation_viewer_hash = row[4]
-        mine = int(row[5] or 0) if my_contrib_subq is not None else None
-        reserved_by_me = bool(
-            viewer_hash
-            and reserved
-            and reservation_viewer_hash
-            and reservation_viewer_hash == viewer_hash
-        )
-        result.append(
-            {
-                "item": item,
-                "collected": collected,
-                "reserved": reserved,
-                "reserved_by_me": reserved_by_me,
-                "reserved_at": reserved_at,
-                "mine": mine,
-            }
+async def update_item_state(
+    db: AsyncSession,
+    item_id: int,
+    *,
+    collected_cents: int | ColumnElement[int] | _Keep = KEEP,
+    contributor_count: int | ColumnElement[int] | _Keep = KEEP,
+    reserved_at: datetime | None | _Keep = KEEP,
+    reservation_viewer_hash: str | None | _Keep = KEEP,
+) -> None:
+    fields = {
+        "collected_cents": collected_cents,
+        "contributor_count": contributor_count,
+        "reserved_at": reserved_at,
+        "reservation_viewer_hash": reservation_viewer_hash,
+    }
+    values = {field: value for field, value in fields.items() if value is not KEEP}
+    # Funding and reservation state is not an owner edit, so updated_at stays as it is.
+    await db.execute(
+        update(WishlistItem)
+        .where(WishlistItem.id == item_id)
+        .values(**values, updated_at=WishlistItem.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def adjust_active_item_count(db: AsyncSession, wishlist_id: int, delta: int) -> None:
+    await db.execute(
+        update(Wishlist)
+        .where(Wishlist.id == wishlist_id)
+        .values(
+            active_item_count=Wishlist.active_item_count + delta, updated_at=Wishlist.updated_at
         )
-    return result
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_item_shared_state(db: AsyncSession, item_id: int) -> dict | None:
+    item = await db.scalar(
+        select(WishlistItem)
+        .where(WishlistItem.id == item_id)
+        .execution_options(populate_existing=True)
+    )
+    if not item:
+        return None
+    return {
+        "id": item.id,
+        "name": item.name,
+        "url": item.url,
+        "image_url": item.image_url,
+        "price_cents": item.price_cents,
+        "allow_contributions": item.allow_contributions,
+        "notes": item.notes,
+        "position": item.position,
+        "is_archived": item.is_archived,
+        "reserved": item.reserved_at is not None,
+        "reserved_at": item.reserved_at.isoformat() if item.reserved_at else None,
+        "collected_cents": item.collected_cents,
+        "contributor_count": item.contributor_count,
+        "created_at": item.created_at.isoformat() if item.created_at else None,
+        "updated_at": item.updated_at.isoformat() if item.updated_at else None,
+    }
 
 
 async def reserve_item(db: AsyncSession, item: WishlistItem, viewer_hash: str) -> Reservation:
@@ -116,12 +207,17 @@ async def reserve_item(db: AsyncSession, item: WishlistItem, viewer_hash: str) -
             return existing
         raise HTTPException(status_code=409, detail="Item is already reserved")
 
-    reservation = Reservation(item_id=item.id, viewer_token_hash=viewer_hash)
+    reservation = Reservation(
+        item_id=item.id, viewer_token_hash=viewer_hash, created_at=datetime.now(UTC)
+    )
     db.add(reservation)
     try:
         await db.flush()
     except IntegrityError as exc:
         raise HTTPException(status_code=409, detail="Item reservation conflict") from exc
+    await update_item_state(
+        db, item.id, reserved_at=reservation.created_at, reservation_viewer_hash=viewer_hash
+    )
     return reservation
 
 
@@ -134,6 +230,7 @@ async def unreserve_item(db: AsyncSession, item_id: int, viewer_hash: str) -> No
     if reservation.viewer_token_hash != viewer_hash:
         raise HTTPException(status_code=403, detail="Only the original reserver can unreserve")
     reservation.released_at = datetime.now(UTC)
+    await update_item_state(db, item_id, reserved_at=None, reservation_viewer_hash=None)
 
 
 async def contribute_to_item(
@@ -151,23 +248,31 @@ async def contribute_to_item(
     if not item.allow_contributions:
         raise HTTPException(status_code=400, detail="Contributions are disabled for this item")
 
-    item_locked = await db.scalar(select(WishlistItem).where(WishlistItem.id == item.id).with_for_update())
+    # populate_existing: the row may have changed since it was loaded, before the lock was taken.
+    item_locked = await db.scalar(
+        select(WishlistItem)
+        .where(WishlistItem.id == item.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
     if not item_locked:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    collected = await db.scalar(
-        select(func.coalesce(func.sum(Contribution.amount_cents), 0)).where(
-            Contribution.item_id == item.id,
-            Contribution.refunded_at.is_(None),
-        )
-    )
-    collected = int(collected or 0)
-    remaining = item_locked.price_cents - collected
+    remaining = item_locked.price_cents - item_locked.collected_cents
     if remaining <= 0:
         raise HTTPException(status_code=409, detail="Funding goal already reached")
     if amount_cents > remaining:
         raise HTTPException(status_code=422, detail=f"Contribution exceeds remaining amount ({remaining} cents)")
 
+    contributed_before = await db.scalar(
+        select(Contribution.id)
+        .where(
+            Contribution.viewer_token_hash == viewer_hash,
+            Contribution.item_id == item.id,
+            Contribution.refunded_at.is_(None),
+        )
+        .limit(1)
+    )
     contribution = Contribution(
         item_id=item.id,
         contributor_user_id=None,
@@ -177,6 +282,12 @@ async def contribute_to_item(
     )
     db.add(contribution)
     await db.flush()
+    await update_item_state(
+        db,
+        item.id,
+        collected_cents=WishlistItem.collected_cents + amount_cents,
+        contributor_count=WishlistItem.contributor_count + (0 if contributed_before else 1),
+    )
     return contribution
 
 
@@ -219,4 +330,64 @@ async def refund_item_contributions(db: AsyncSession, item_id: int) -> int:
             account = await get_or_create_viewer_account(db, c.viewer_token_hash, lock_for_update=True)
             account.balance_cents += refund_usd_cents
         c.refunded_at = now
+    # Every unrefunded contribution of the item is refunded at once.
+    await update_item_state(db, item_id, collected_cents=0, contributor_count=0)
     return refunded_total
+
+
+async def check_item_state(
+    db: AsyncSession, wishlist_id: int | None = None, fix: bool = False
+) -> list[dict]:
+    contributions = (
+        select(
+            Contribution.item_id,
+            func.sum(Contribution.amount_cents).label("collected"),
+            func.count(func.distinct(Contribution.viewer_token_hash)).label("contributors"),
+        )
+        .where(Contribution.refunded_at.is_(None))
+        .group_by(Contribution.item_id)
+        .subquery()
+    )
+    reservations = (
+        select(Reservation.item_id, Reservation.created_at, Reservation.viewer_token_hash)
+        .where(Reservation.released_at.is_(None))
+        .subquery()
+    )
+    actual = {
+        "collected_cents": func.coalesce(contributions.c.collected, 0),
+        "contributor_count": func.coalesce(contributions.c.contributors, 0),
+        "reserved_at": reservations.c.created_at,
+        "reservation_viewer_hash": reservations.c.viewer_token_hash,
+    }
+    stored = [getattr(WishlistItem, field) for field in actual]
+    drifted = [
+        column.is_distinct_from(value)
+        for column, value in zip(stored, actual.values(), strict=True)
+    ]
+    stmt = (
+        select(WishlistItem.id, *stored, *actual.values())
+        .outerjoin(contributions, contributions.c.item_id == WishlistItem.id)
+        .outerjoin(reservations, reservations.c.item_id == WishlistItem.id)
+        .where(or_(*drifted))
+        .order_by(WishlistItem.id)
+    )
+    if wishlist_id is not None:
+        stmt = stmt.where(WishlistItem.wishlist_id == wishlist_id)
+    rows = await db.execute(stmt)
+
+    drift = []
+    for item_id, *values in rows.all():
+        current = dict(zip(actual, values[: len(actual)], strict=True))
+        expected = dict(zip(actual, values[len(actual) :], strict=True))
+        changed = [field for field in actual if current[field] != expected[field]]
+        drift.append({"item_id": item_id, **{f: (current[f], expected[f]) for f in changed}})
+        if fix:
+            await update_item_state(
+                db,
+                item_id,
+                collected_cents=expected["collected_cents"],
+                contributor_count=expected["contributor_count"],
+                reserved_at=expected["reserved_at"],
+                reservation_viewer_hash=expected["reservation_viewer_hash"],
+            )
+    return drift
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import Wishlist
+from app.services.wishlist_service import (
+    get_wishlist_items_with_aggregates,
+    shared_item_fields,
+    wishlist_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WishlistSnapshot:
+    __slots__ = ("revision", "wishlist", "items")
+
+    def __init__(self, revision: int, wishlist: dict, items: list[tuple[dict, str | None]]) -> None:
+        self.revision = revision
+        # WishlistView / ItemView fields shared by every viewer; each item keeps the reserving
+        # viewer's hash so `reserved_by_me` needs no query.
+        self.wishlist = wishlist
+        self.items = items
+
+    @property
+    def item_ids(self) -> list[int]:
+        return [fields["id"] for fields, _ in self.items]
+
+
+async def load_wishlist_snapshot(public_id: str) -> WishlistSnapshot | None:
+    # Own session: the load is shared by every request waiting on it and outlives any one of them.
+    async with SessionLocal() as db:
+        wishlist = await db.scalar(select(Wishlist).where(Wishlist.public_id == public_id))
+        if wishlist is None:
+            return None
+        rows = await get_wishlist_items_with_aggregates(db, wishlist.id)
+    items = [(shared_item_fields(row), row["reservation_viewer_hash"]) for row in rows]
+    return WishlistSnapshot(wishlist.revision, wishlist_fields(wishlist), items)
+
+
+# Viewer-independent part of public wishlist views. Every mutation that publishes an event also
+# bumps the wishlist revision, so a snapshot is current exactly when its revision matches and
+# needs no other invalidation. Concurrent misses share one load; while a reload is slower than
+# `stale_timeout` (or fails) the previous snapshot is served.
+class SnapshotCache:
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[WishlistSnapshot | None]] = load_wishlist_snapshot,
+        max_size: int | None = None,
+        stale_timeout: float | None = None,
+    ) -> None:
+        self.loader = loader
+        self.max_size = max_size or settings.wishlist_snapshot_cache_size
+        self.stale_timeout = stale_timeout or settings.wishlist_snapshot_stale_timeout_seconds
+        self._entries: OrderedDict[str, WishlistSnapshot] = OrderedDict()
+        self._loading: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.errors = 0
+
+    async def get(self, public_id: str, revision: int) -> WishlistSnapshot | None:
+        entry = self._entries.get(public_id)
+        if entry is not None and entry.revision >= revision:
+            self._entries.move_to_end(public_id)
+            self.hits += 1
+            return entry
+
+        task = self._loading.get(public_id)
+        if task is None:
+            self.misses += 1
+            task = self._loading[public_id] = asyncio.create_task(self._load(public_id))
+            task.add_done_callback(_consume_error)
+        else:
+            self.coalesced += 1
+        if entry is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=self.stale_timeout)
+        except Exception:
+            self.stale += 1
+            return entry
+
+    async def _load(self, public_id: str) -> WishlistSnapshot | None:
+        try:
+            snapshot = await self.loader(public_id)
+        except Exception:
+            self.errors += 1
+            logger.exception("Failed to load wishlist snapshot")
+            raise
+        finally:
+            self._loading.pop(public_id, None)
+        if snapshot is None:
+            self._entries.pop(public_id, None)
+            return None
+        self._entries[public_id] = snapshot
+        self._entries.move_to_end(public_id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, public_id: str) -> None:
+        self._entries.pop(public_id, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "loading": len(self._loading),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+            "errors": self.errors,
+        }
+
+
+def _consume_error(task: asyncio.Task) -> None:
+    # A load that failed after every waiter fell back to the stale copy is already logged.
+    if not task.cancelled():
+        task.exception()
+
+
+snapshot_cache = SnapshotCache()
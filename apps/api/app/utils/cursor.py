@@ -0,0 +1,20 @@
+import base64
+from datetime import datetime
+
+
+# Opaque keyset cursor for lists ordered by (timestamp, id).
+def encode_cursor(at: datetime, row_id: int) -> str:
+    raw = f"{at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, row_id = raw.split("|")
+        position = datetime.fromisoformat(at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if position[0].tzinfo is None:
+        raise ValueError("Invalid cursor")
+    return position
@@ -0,0 +1,30 @@
+from fastapi import Response
+
+# Views are revalidated on every use; only the client (not shared proxies) may keep them.
+CACHE_CONTROL = "private, no-cache"
+
+
+def revision_etag(view: str, revision: int, viewer: str | None = None) -> str:
+    # Every mutation bumps the wishlist revision. The viewer part covers per-viewer fields such as
+    # reserved_by_me, which only change together with the revision.
+    suffix = f"-{viewer[:16]}" if viewer else ""
+    return f'W/"{view}{revision}{suffix}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides.
+    tag = etag.removeprefix("W/")
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return tag in candidates
+
+
+def cache_headers(etag: str, vary: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": vary}
+
+
+def not_modified(etag: str, vary: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, vary))
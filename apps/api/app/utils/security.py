@@ -50,6 +50,15 @@ def decode_access_token(token: str) -> dict[str, Any]:
         raise ValueError("Invalid access token") from exc
 
 
+def token_user_id(token: str | None) -> int | None:
+    if not token:
+        return None
+    try:
+        return int(decode_access_token(token)["sub"])
+    except Exception:
+        return None
+
+
 def decode_refresh_token(token: str) -> dict[str, Any]:
     try:
         payload = jwt.decode(token, settings.refresh_secret, algorithms=[ALGORITHM])
@@ -0,0 +1,59 @@
+import asyncio
+import random
+import time
+
+
+# Token bucket for new WebSocket connections. Accepts above the rate are deferred rather than
+# refused, up to `max_wait`; beyond that the client is told when to come back.
+class AdmissionControl:
+    def __init__(self, rate: float, burst: int, max_wait: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.admitted = 0
+        self.deferred = 0
+        self.rejected = 0
+        self.waiting = 0
+        self.wait_max = 0.0
+
+    def reserve(self) -> float:
+        # Seconds to wait before accepting; the token is taken now so concurrent callers queue up.
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait <= self.max_wait:
+            self.tokens -= 1
+        return wait
+
+    async def admit(self) -> float | None:
+        # None once admitted, otherwise a retry hint in seconds.
+        wait = self.reserve()
+        if wait > self.max_wait:
+            self.rejected += 1
+            return wait * random.uniform(1.0, 1.5)
+        if wait > 0:
+            self.deferred += 1
+            self.wait_max = max(self.wait_max, wait)
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+        self.admitted += 1
+        return None
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "admitted": self.admitted,
+            "deferred": self.deferred,
+            "rejected": self.rejected,
+            "waiting": self.waiting,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
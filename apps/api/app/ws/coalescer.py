@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+
+import orjson
+
+from app.core.config import settings
+from app.ws.encoding import EncodedEvent
+from app.ws.manager import manager
+
+
+class RateMeter:
+    __slots__ = ("buckets", "seconds")
+
+    def __init__(self, seconds: int = 10) -> None:
+        self.seconds = seconds
+        self.buckets: deque[list[int]] = deque()
+
+    def add(self, count: int = 1) -> None:
+        second = int(time.monotonic())
+        buckets = self.buckets
+        if buckets and buckets[-1][0] == second:
+            buckets[-1][1] += count
+        else:
+            buckets.append([second, count])
+            while buckets[0][0] <= second - self.seconds:
+                buckets.popleft()
+
+    def rate(self) -> float:
+        cutoff = int(time.monotonic()) - self.seconds
+        return sum(count for second, count in self.buckets if second > cutoff) / self.seconds
+
+
+class _RoomBuffer:
+    __slots__ = ("frames", "first_at", "last_at", "handle")
+
+    def __init__(self) -> None:
+        self.frames: list[EncodedEvent] = []
+        self.first_at = 0.0
+        self.last_at = 0.0
+        self.handle: asyncio.TimerHandle | None = None
+
+
+def _revision_runs(frames: list[EncodedEvent]) -> list[list[EncodedEvent]]:
+    # A batch claims every revision from `from_revision` to `revision`, so it may only span
+    # consecutive revisions. A missing one (a late NOTIFY, a frame dropped on overflow) splits the
+    # buffer; the client refetches on the gap instead of skipping past the missing event.
+    ordered = sorted(frames, key=lambda frame: frame.revision or 0)
+    runs: list[list[EncodedEvent]] = []
+    for frame in ordered:
+        if not runs or (frame.revision or 0) - (runs[-1][-1].revision or 0) > 1:
+            runs.append([frame])
+        else:
+            runs[-1].append(frame)
+    return runs
+
+
+# The first event in a quiet room goes out immediately. Events that follow within the window are
+# held back and sent as one batch once the room is quiet for `window` seconds, or at the latest
+# `max_delay` seconds after the first held event.
+class EventCoalescer:
+    def __init__(
+        self,
+        broadcast: Callable[[str, bytes, int | None], int],
+        window: float | None = None,
+        max_delay: float | None = None,
+    ) -> None:
+        self.broadcast = broadcast
+        self.window = settings.ws_coalesce_window_ms / 1000 if window is None else window
+        self.max_delay = (
+            settings.ws_coalesce_max_delay_ms / 1000 if max_delay is None else max_delay
+        )
+        self._rooms: dict[str, _RoomBuffer] = {}
+        self.events = 0
+        self.payloads = 0
+        self.batches = 0
+        self.merged = 0
+        self.deliveries = 0
+        self.event_rate = RateMeter()
+        self.delivery_rate = RateMeter()
+
+    def submit(self, frame: EncodedEvent) -> None:
+        self.submit_all(frame.room, [frame])
+
+    def submit_all(self, room: str, frames: list[EncodedEvent]) -> None:
+        self.events += len(frames)
+        self.event_rate.add(len(frames))
+        buffer = self._rooms.get(room)
+        if buffer is None:
+            self._send(room, frames)
+            if self.window > 0:
+                loop = asyncio.get_running_loop()
+                buffer = self._rooms[room] = _RoomBuffer()
+                buffer.handle = loop.call_at(loop.time() + self.window, self._flush, room)
+            return
+        now = asyncio.get_running_loop().time()
+        if not buffer.frames:
+            buffer.first_at = now
+        buffer.last_at = now
+        buffer.frames.extend(frames)
+
+    def _flush(self, room: str) -> None:
+        buffer = self._rooms[room]
+        if not buffer.frames:
+            # Quiet for a whole window: the next event is sent immediately again.
+            del self._rooms[room]
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        due = min(buffer.first_at + self.max_delay, buffer.last_at + self.window)
+        if now < due:
+            buffer.handle = loop.call_at(due, self._flush, room)
+            return
+        frames, buffer.frames = buffer.frames, []
+        self._send(room, frames)
+        buffer.handle = loop.call_at(now + self.window, self._flush, room)
+
+    def _send(self, room: str, frames: list[EncodedEvent]) -> None:
+        for run in _revision_runs(frames):
+            if len(run) == 1:
+                payload = run[0].data
+            else:
+                payload = self._encode_batch(room, run)
+            delivered = self.broadcast(room, payload, run[-1].revision)
+            self.payloads += 1
+            self.deliveries += delivered
+            self.delivery_rate.add(delivered)
+
+    def _encode_batch(self, room: str, frames: list[EncodedEvent]) -> bytes:
+        # `frames` is sorted by revision, so the frame kept for a key is its newest one.
+        merged: dict[str, EncodedEvent] = {}
+        for frame in frames:
+            key = frame.merge_key or frame.event_id
+            merged.pop(key, None)
+            merged[key] = frame
+        self.batches += 1
+        self.merged += len(frames) - len(merged)
+        revisions = [frame.revision for frame in frames if frame.revision is not None]
+        # Event bodies are spliced in as already-encoded JSON instead of being re-serialized.
+        header = orjson.dumps(
+            {
+                "type": "batch",
+                "wishlist_public_id": room,
+                "from_revision": min(revisions, default=None),
+                "revision": max(revisions, default=None),
+                "count": len(frames),
+            }
+        )
+        events = b",".join(frame.data for frame in merged.values())
+        return header[:-1] + b',"events":[' + events + b"]}"
+
+    def snapshot(self, subscribers: int) -> dict:
+        delivery_rate = self.delivery_rate.rate()
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_delay_ms": round(self.max_delay * 1000, 3),
+            "hot_rooms": len(self._rooms),
+            "events": self.events,
+            "payloads": self.payloads,
+            "batches": self.batches,
+            "merged": self.merged,
+            "deliveries": self.deliveries,
+            "events_per_second": round(self.event_rate.rate(), 2),
+            "deliveries_per_second": round(delivery_rate, 2),
+            "payloads_per_subscriber_per_second": (
+                round(delivery_rate / subscribers, 3) if subscribers else 0.0
+            ),
+        }
+
+
+coalescer = EventCoalescer(manager.broadcast)
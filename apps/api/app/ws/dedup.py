@@ -0,0 +1,44 @@
+import time
+from collections import OrderedDict
+
+
+class EventDeduplicator:
+    def __init__(self, max_size: int = 50_000, ttl_seconds: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self.suppressed_echoes = 0
+        self.suppressed_duplicates = 0
+
+    def _evict(self, now: float) -> None:
+        seen = self._seen
+        while seen:
+            event_id, expires_at = next(iter(seen.items()))
+            if expires_at > now and len(seen) <= self.max_size:
+                break
+            seen.popitem(last=False)
+
+    def remember(self, event_id: str) -> None:
+        now = time.monotonic()
+        self._seen[event_id] = now + self.ttl_seconds
+        self._seen.move_to_end(event_id)
+        self._evict(now)
+
+    def is_duplicate(self, event_id: str) -> bool:
+        now = time.monotonic()
+        expires_at = self._seen.get(event_id)
+        if expires_at is not None and expires_at > now:
+            self.suppressed_duplicates += 1
+            return True
+        self.remember(event_id)
+        return False
+
+    def snapshot(self) -> dict:
+        return {
+            "tracked": len(self._seen),
+            "suppressed_echoes": self.suppressed_echoes,
+            "suppressed_duplicates": self.suppressed_duplicates,
+        }
+
+
+deduplicator = EventDeduplicator()
@@ -0,0 +1,119 @@
+import orjson
+
+ITEM_EVENT_TYPES = {"item.updated", "item.archived", "reservation.changed", "contribution.changed"}
+
+
+class EncodedEvent:
+    __slots__ = ("room", "event_id", "origin", "revision", "merge_key", "_data", "_text")
+
+    def __init__(
+        self,
+        room: str,
+        event_id: str,
+        origin: str,
+        data: bytes | None = None,
+        text: str | None = None,
+        revision: int | None = None,
+        merge_key: str | None = None,
+    ) -> None:
+        self.room = room
+        self.event_id = event_id
+        self.origin = origin
+        self.revision = revision
+        self.merge_key = merge_key
+        self._data = data
+        self._text = text
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = (self._text or "").encode()
+        return self._data
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = (self._data or b"").decode()
+        return self._text
+
+    @property
+    def notify_payload(self) -> str:
+        # Routing header first, so listeners can dedupe and dispatch without parsing the JSON body.
+        revision = "-" if self.revision is None else self.revision
+        merge_key = self.merge_key or "-"
+        return f"{self.origin} {self.event_id} {revision} {merge_key} {self.room}\n{self.text}"
+
+
+def event_merge_key(event_type: str | None, data: dict) -> str | None:
+    # Events with the same key supersede each other inside a coalesced batch. Item events carry
+    # the full shared item state, so only the latest one per item matters.
+    if event_type in ITEM_EVENT_TYPES and data.get("item_id") is not None:
+        return f"item:{data['item_id']}"
+    if event_type in ("wishlist.updated", "items.reordered"):
+        return event_type
+    return None
+
+
+def encode_event(room: str, event: dict) -> EncodedEvent:
+    return EncodedEvent(
+        room,
+        event["event_id"],
+        event["node_id"],
+        data=orjson.dumps(event, default=str),
+        revision=event.get("revision"),
+        merge_key=event_merge_key(event.get("type"), event.get("data") or {}),
+    )
+
+
+def decode_notify_payload(payload: str) -> EncodedEvent | None:
+    header, sep, body = payload.partition("\n")
+    return _decode_frame(header, body) if sep else None
+
+
+def _decode_frame(header: str, body: str) -> EncodedEvent | None:
+    parts = header.split(" ", 4)
+    if len(parts) == 4:
+        # Header from a worker that predates merge keys.
+        parts.insert(3, "-")
+    if not body or len(parts) != 5 or not all(parts):
+        return None
+    origin, event_id, revision, merge_key, room = parts
+    key = None if merge_key == "-" else merge_key
+    if revision == "-":
+        return EncodedEvent(room, event_id, origin, text=body, merge_key=key)
+    if not revision.isdigit():
+        return None
+    return EncodedEvent(room, event_id, origin, text=body, revision=int(revision), merge_key=key)
+
+
+# Batched NOTIFY payloads are header/body line pairs (JSON bodies never contain raw newlines),
+# or a single "ref <origin> <id,id,...>" line pointing at event_outbox rows when the batch
+# would not fit into the NOTIFY payload limit.
+def encode_notify_batch(frames: list[EncodedEvent]) -> str:
+    return "\n".join(frame.notify_payload for frame in frames)
+
+
+def encode_notify_reference(origin: str, outbox_ids: list[int]) -> str:
+    return f"ref {origin} {','.join(str(i) for i in outbox_ids)}"
+
+
+def decode_notify_reference(payload: str) -> tuple[str, list[int]] | None:
+    if not payload.startswith("ref "):
+        return None
+    parts = payload.split(" ")
+    if len(parts) != 3:
+        return None
+    try:
+        return parts[1], [int(i) for i in parts[2].split(",")]
+    except ValueError:
+        return None
+
+
+def decode_notify_batch(payload: str) -> list[EncodedEvent]:
+    lines = payload.split("\n")
+    frames = []
+    for header, body in zip(lines[::2], lines[1::2], strict=False):
+        frame = _decode_frame(header, body)
+        if frame is not None:
+            frames.append(frame)
+    return frames
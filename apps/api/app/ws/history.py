@@ -0,0 +1,54 @@
+from collections import OrderedDict, deque
+
+from app.core.config import settings
+
+
+# Recent events per wishlist room keyed by wishlist revision, so a reconnecting client can be
+# sent only what it missed. Rooms are evicted least-recently-published first.
+class EventHistory:
+    def __init__(self, size: int | None = None, max_rooms: int | None = None) -> None:
+        self.size = size or settings.ws_history_size
+        self.max_rooms = max_rooms or settings.ws_history_rooms
+        self._rooms: OrderedDict[str, deque[tuple[int, bytes]]] = OrderedDict()
+        self.replays = 0
+        self.replayed_events = 0
+        self.misses = 0
+
+    def record(self, room: str, revision: int, payload: bytes) -> None:
+        events = self._rooms.get(room)
+        if events is None:
+            events = self._rooms[room] = deque(maxlen=self.size)
+            if len(self._rooms) > self.max_rooms:
+                self._rooms.popitem(last=False)
+        else:
+            self._rooms.move_to_end(room)
+        events.append((revision, payload))
+
+    def since(self, room: str, revision: int) -> list[tuple[int, bytes]] | None:
+        # None means the buffer cannot prove it holds every event after `revision`.
+        events = self._rooms.get(room)
+        if not events:
+            self.misses += 1
+            return None
+        # Events from other workers can arrive slightly out of order; sort before checking the gap.
+        missed = sorted(event for event in events if event[0] > revision)
+        if not missed:
+            return []
+        if any(rev != revision + offset for offset, (rev, _) in enumerate(missed, start=1)):
+            self.misses += 1
+            return None
+        self.replays += 1
+        self.replayed_events += len(missed)
+        return missed
+
+    def snapshot(self) -> dict:
+        return {
+            "rooms": len(self._rooms),
+            "events": sum(len(events) for events in self._rooms.values()),
+            "replays": self.replays,
+            "replayed_events": self.replayed_events,
+            "misses": self.misses,
+        }
+
+
+history = EventHistory()
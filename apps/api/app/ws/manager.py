@@ -1,39 +1,447 @@
 import asyncio
-import json
-from collections import defaultdict
+import contextlib
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
 
+import orjson
 from fastapi import WebSocket
 
+from app.core.config import settings
+from app.ws.admission import AdmissionControl
+from app.ws.registry import RoomRegistry
 
-class ConnectionManager:
+RESYNC_MESSAGE = orjson.dumps({"type": "resync"})
+# Sent as a text frame so clients can answer without decoding binary event frames.
+PING_MESSAGE = b"ping"
+
+
+# A room subscriber. Used as is for SSE and long-poll requests, whose handler drains the queue
+# itself; those also keep the revision of every queued payload for SSE event ids.
+class Connection:
+    __slots__ = ("rooms", "pending", "revisions", "max_queue", "waiter", "resync_pending", "closed")
+
+    def __init__(self, max_queue: int, track_revisions: bool = False) -> None:
+        self.rooms: set[str] = set()
+        # A deque plus one wake-up future is much cheaper per message than asyncio.Queue.
+        self.pending: deque[bytes] = deque()
+        self.revisions: deque[int | None] | None = deque() if track_revisions else None
+        self.max_queue = max_queue
+        self.waiter: asyncio.Future | None = None
+        self.resync_pending = False
+        self.closed = False
+
+    def wake(self) -> None:
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class SocketConnection(Connection):
+    __slots__ = (
+        "websocket",
+        "writer",
+        "sending_since",
+        "last_seen",
+        "inbound_tokens",
+        "inbound_at",
+    )
+
+    def __init__(self, websocket: WebSocket, max_queue: int) -> None:
+        super().__init__(max_queue)
+        self.websocket = websocket
+        self.writer: asyncio.Task | None = None
+        self.sending_since = 0.0
+        self.last_seen = self.inbound_at = time.monotonic()
+        self.inbound_tokens = 0.0
+
+
+class ConnectionStats:
     def __init__(self) -> None:
-        self.connections: dict[str, set[WebSocket]] = defaultdict(set)
-        self._lock = asyncio.Lock()
+        self.enqueued = 0
+        self.sent = 0
+        # Taken by SSE and long-poll requests. Not timed, so kept out of the send time average.
+        self.stream_sent = 0
+        self.send_errors = 0
+        self.resyncs = 0
+        self.slow_consumers_dropped = 0
+        self.room_full_refused = 0
+        self.send_time_total = 0.0
+        self.send_time_max = 0.0
+        self.queue_depth_max = 0
+        self.pings = 0
+        self.reaped_idle = 0
+        self.inbound_rate_limited = 0
+        self.inbound_too_large = 0
 
-    async def connect(self, room: str, websocket: WebSocket) -> None:
+    def record_send(self, elapsed: float) -> None:
+        self.sent += 1
+        self.send_time_total += elapsed
+        if elapsed > self.send_time_max:
+            self.send_time_max = elapsed
+
+
+class ConnectionManager:
+    def __init__(
+        self,
+        queue_size: int | None = None,
+        send_timeout: float | None = None,
+        ping_interval: float | None = None,
+        idle_timeout: float | None = None,
+        accept_rate: float | None = None,
+        max_room_subscribers: int | None = None,
+    ) -> None:
+        self.rooms = RoomRegistry()
+        self.sockets: dict[WebSocket, SocketConnection] = {}
+        self.queue_size = queue_size or settings.ws_send_queue_size
+        self.send_timeout = send_timeout or settings.ws_send_timeout_seconds
+        self.ping_interval = ping_interval or settings.ws_ping_interval_seconds
+        self.idle_timeout = idle_timeout or settings.ws_idle_timeout_seconds
+        self.inbound_rate = settings.ws_inbound_rate_per_second
+        self.inbound_burst = settings.ws_inbound_burst
+        self.inbound_max_bytes = settings.ws_inbound_max_bytes
+        self.max_room_subscribers = (
+            settings.ws_max_room_subscribers
+            if max_room_subscribers is None
+            else max_room_subscribers
+        )
+        self.stats = ConnectionStats()
+        self.streams: set[Connection] = set()
+        self.admission = AdmissionControl(
+            settings.ws_accept_rate_per_second if accept_rate is None else accept_rate,
+            settings.ws_accept_burst,
+            settings.ws_accept_max_wait_seconds,
+        )
+        self.draining = False
+        self.drained = 0
+        self._reaper: asyncio.Task | None = None
+
+    def retry_delay_ms(self, minimum: float = 1.0) -> int:
+        # Sent to clients as "retry=<ms>" in the close reason, randomized so they do not all
+        # come back at once.
+        spread = max(minimum, settings.ws_reconnect_spread_seconds)
+        return int(random.uniform(minimum, spread) * 1000)
+
+    async def accept(self, websocket: WebSocket) -> SocketConnection | None:
+        retry_after = None if self.draining else await self.admission.admit()
+        if self.draining or retry_after is not None:
+            # Accepted only to deliver the close reason: a refused handshake looks like a
+            # network error to the client.
+            await websocket.accept()
+            delay = self.retry_delay_ms(retry_after or 1.0)
+            await websocket.close(code=1013, reason=f"retry={delay}")
+            return None
         await websocket.accept()
-        async with self._lock:
-            self.connections[room].add(websocket)
+        conn = SocketConnection(websocket, self.queue_size)
+        conn.inbound_tokens = self.inbound_burst
+        self.sockets[websocket] = conn
+        conn.writer = asyncio.create_task(self._writer(conn))
+        return conn
+
+    def admits(self, room: str) -> bool:
+        # Every delivery wakes one writer task, 3-4 us of event loop time per subscriber against
+        # ~0.3 us for an inline send (benchmarks/bench_broadcast.py). Capping rooms per worker
+        # bounds the stall one message causes; refused clients fall back to polling.
+        limit = self.max_room_subscribers
+        if limit <= 0 or self.rooms.count(room) < limit:
+            return True
+        self.stats.room_full_refused += 1
+        return False
+
+    async def connect(self, room: str, websocket: WebSocket) -> SocketConnection | None:
+        if not self.admits(room):
+            await websocket.accept()
+            await websocket.close(code=1013, reason=f"retry={self.retry_delay_ms()}")
+            return None
+        conn = await self.accept(websocket)
+        if conn is not None:
+            self.subscribe(conn, room)
+        return conn
+
+    def subscribe(self, conn: Connection, room: str) -> bool:
+        if conn.closed or room in conn.rooms:
+            return False
+        conn.rooms.add(room)
+        return self.rooms.join(room, conn)
+
+    def unsubscribe(self, conn: Connection, room: str) -> bool:
+        if room not in conn.rooms:
+            return False
+        conn.rooms.discard(room)
+        return self.rooms.leave(room, conn)
+
+    def send(self, conn: Connection, payload: bytes) -> bool:
+        return self._enqueue(conn, payload)
+
+    async def close(self, websocket: WebSocket) -> None:
+        conn = self.sockets.get(websocket)
+        if conn is not None:
+            self._close(conn)
 
     async def disconnect(self, room: str, websocket: WebSocket) -> None:
-        async with self._lock:
-            if room in self.connections and websocket in self.connections[room]:
-                self.connections[room].remove(websocket)
-            if room in self.connections and not self.connections[room]:
-                del self.connections[room]
-
-    async def broadcast(self, room: str, message: dict) -> None:
-        payload = json.dumps(message, default=str)
-        async with self._lock:
-            sockets = list(self.connections.get(room, set()))
-        stale: list[WebSocket] = []
-        for ws in sockets:
+        conn = self.sockets.get(websocket)
+        if conn is None:
+            return
+        self.rooms.leave(room, conn)
+        conn.rooms.discard(room)
+        if not conn.rooms:
+            self._close(conn)
+
+    def _close(self, conn: Connection) -> None:
+        conn.closed = True
+        for room in conn.rooms:
+            self.rooms.leave(room, conn)
+        conn.rooms.clear()
+        if isinstance(conn, SocketConnection):
+            self.sockets.pop(conn.websocket, None)
+            if conn.writer and conn.writer is not asyncio.current_task():
+                conn.writer.cancel()
+
+    def broadcast(self, room: str, payload: bytes, revision: int | None = None) -> int:
+        delivered = 0
+        for conn in self.rooms.members(room):
+            if self._enqueue(conn, payload, revision):
+                delivered += 1
+        return delivered
+
+    async def receive(
+        self, websocket: WebSocket, on_text: Callable[[str], Awaitable[None]] | None = None
+    ) -> None:
+        # Reads until the client goes away. Every frame proves liveness (e.g. "pong"); text frames
+        # go to `on_text` when given. Each connection gets a token-bucket budget and a size cap so
+        # it cannot flood the worker.
+        conn = self.sockets.get(websocket)
+        while conn is not None and not conn.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            now = time.monotonic()
+            conn.last_seen = now
+            body = message.get("bytes") or message.get("text") or ""
+            if len(body) > self.inbound_max_bytes:
+                self.stats.inbound_too_large += 1
+                await self._drop(conn, code=1009)
+                return
+            refill = (now - conn.inbound_at) * self.inbound_rate
+            conn.inbound_tokens = min(self.inbound_burst, conn.inbound_tokens + refill)
+            conn.inbound_at = now
+            if conn.inbound_tokens < 1:
+                self.stats.inbound_rate_limited += 1
+                await self._drop(conn, code=1008)
+                return
+            conn.inbound_tokens -= 1
+            text = message.get("text")
+            if on_text is not None and text:
+                await on_text(text)
+
+    def start(self) -> None:
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def stop(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval / 2)
+            self.reap()
+
+    def reap(self) -> int:
+        # One sweep for all sockets instead of a timer per connection.
+        now = time.monotonic()
+        reaped = 0
+        for conn in list(self.sockets.values()):
+            idle = now - conn.last_seen
+            if idle > self.idle_timeout:
+                reaped += 1
+                conn.closed = True
+                asyncio.get_running_loop().create_task(self._drop(conn, code=4408))
+            elif idle > self.ping_interval and not conn.pending:
+                conn.pending.append(PING_MESSAGE)
+                conn.wake()
+                self.stats.pings += 1
+        self.stats.reaped_idle += reaped
+        return reaped
+
+    async def drain_connections(self, duration: float) -> int:
+        # Closes every socket and stream over `duration` seconds instead of all at once, each with
+        # a randomized retry hint, so clients do not reconnect to the next workers in one wave.
+        self.draining = True
+        conns = list(self.sockets.values()) + list(self.streams)
+        random.shuffle(conns)
+        ticks = max(1, int(duration * 10))
+        step = math.ceil(len(conns) / ticks) or 1
+        for start in range(0, len(conns), step):
+            for conn in conns[start : start + step]:
+                if conn.closed:
+                    continue
+                self.drained += 1
+                if isinstance(conn, SocketConnection):
+                    conn.closed = True
+                    asyncio.get_running_loop().create_task(
+                        self._drop(conn, code=1012, reason=f"retry={self.retry_delay_ms()}")
+                    )
+                else:
+                    self.detach(conn)
+                    conn.wake()
+            await asyncio.sleep(duration / ticks)
+        return self.drained
+
+    def attach(self, room: str) -> Connection:
+        conn = Connection(self.queue_size, track_revisions=True)
+        conn.rooms.add(room)
+        self.rooms.join(room, conn)
+        self.streams.add(conn)
+        return conn
+
+    def detach(self, conn: Connection) -> None:
+        self.streams.discard(conn)
+        self._close(conn)
+
+    async def next_payload(
+        self, conn: Connection, timeout: float
+    ) -> tuple[bytes, int | None] | None:
+        if not conn.pending:
+            conn.waiter = asyncio.get_running_loop().create_future()
             try:
-                await ws.send_text(payload)
-            except Exception:
-                stale.append(ws)
-        for ws in stale:
-            await self.disconnect(room, ws)
+                await asyncio.wait_for(conn.waiter, timeout)
+            except TimeoutError:
+                return None
+            finally:
+                conn.waiter = None
+        return self._pop(conn)
+
+    def drain(self, conn: Connection) -> list[bytes]:
+        payloads = []
+        while (entry := self._pop(conn)) is not None:
+            payloads.append(entry[0])
+        return payloads
+
+    def _pop(self, conn: Connection) -> tuple[bytes, int | None] | None:
+        if not conn.pending:
+            return None
+        payload = conn.pending.popleft()
+        revision = conn.revisions.popleft() if conn.revisions is not None else None
+        if payload is RESYNC_MESSAGE:
+            conn.resync_pending = False
+        self.stats.stream_sent += 1
+        return payload, revision
+
+    def replay(self, conn: Connection, events: list[tuple[int, bytes]] | None) -> None:
+        # None means the missed events are gone: tell the client to refetch instead.
+        if events is None:
+            self._enqueue(conn, RESYNC_MESSAGE)
+            return
+        for revision, payload in events:
+            if not self._enqueue(conn, payload, revision):
+                return
+
+    def _enqueue(self, conn: Connection, payload: bytes, revision: int | None = None) -> bool:
+        if conn.closed:
+            return False
+        pending = conn.pending
+        if conn.resync_pending or len(pending) >= conn.max_queue:
+            self._overflow(conn)
+            return False
+        pending.append(payload)
+        if conn.revisions is not None:
+            conn.revisions.append(revision)
+        conn.wake()
+        self.stats.enqueued += 1
+        if len(pending) > self.stats.queue_depth_max:
+            self.stats.queue_depth_max = len(pending)
+        return True
+
+    def _overflow(self, conn: Connection) -> None:
+        if (
+            isinstance(conn, SocketConnection)
+            and conn.sending_since
+            and time.perf_counter() - conn.sending_since > self.send_timeout
+        ):
+            # A single send has been stuck for too long: the peer is gone or hopelessly slow.
+            self.stats.slow_consumers_dropped += 1
+            conn.closed = True
+            asyncio.get_running_loop().create_task(self._drop(conn, code=1013))
+            return
+        if conn.resync_pending:
+            # The client refetches the full state anyway; nothing queued after the marker matters.
+            return
+        conn.pending.clear()
+        conn.pending.append(RESYNC_MESSAGE)
+        if conn.revisions is not None:
+            conn.revisions.clear()
+            conn.revisions.append(None)
+        conn.wake()
+        conn.resync_pending = True
+        self.stats.resyncs += 1
+
+    async def _writer(self, conn: SocketConnection) -> None:
+        loop = asyncio.get_running_loop()
+        pending = conn.pending
+        try:
+            while True:
+                while not pending:
+                    conn.waiter = loop.create_future()
+                    await conn.waiter
+                    conn.waiter = None
+                payload = pending.popleft()
+                if payload is RESYNC_MESSAGE:
+                    conn.resync_pending = False
+                conn.sending_since = started = time.perf_counter()
+                if payload is PING_MESSAGE:
+                    await conn.websocket.send_text("ping")
+                else:
+                    await conn.websocket.send_bytes(payload)
+                conn.sending_since = 0.0
+                self.stats.record_send(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats.send_errors += 1
+            await self._drop(conn, code=1011)
+
+    async def _drop(self, conn: SocketConnection, code: int, reason: str | None = None) -> None:
+        self._close(conn)
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(
+                conn.websocket.close(code=code, reason=reason), timeout=self.send_timeout
+            )
+
+    def snapshot(self) -> dict:
+        depths = [len(conn.pending) for conn in self.sockets.values()]
+        stats = self.stats
+        send_time_avg = stats.send_time_total / stats.sent if stats.sent else 0.0
+        return {
+            "rooms": len(self.rooms),
+            "subscriptions": self.rooms.subscribers,
+            # Sizes only: room keys are wishlist share ids and user ids, and this is public.
+            "largest_rooms": [size for _, size in self.rooms.largest()],
+            "connections": len(depths),
+            "streams": len(self.streams),
+            "draining": self.draining,
+            "drained": self.drained,
+            "admission": self.admission.snapshot(),
+            "queued": sum(depths),
+            "queue_depth": max(depths, default=0),
+            "queue_depth_max": stats.queue_depth_max,
+            "enqueued": stats.enqueued,
+            "sent": stats.sent,
+            "stream_sent": stats.stream_sent,
+            "send_errors": stats.send_errors,
+            "resyncs": stats.resyncs,
+            "slow_consumers_dropped": stats.slow_consumers_dropped,
+            "room_full_refused": stats.room_full_refused,
+            "pings": stats.pings,
+            "reaped_idle": stats.reaped_idle,
+            "inbound_rate_limited": stats.inbound_rate_limited,
+            "inbound_too_large": stats.inbound_too_large,
+            "send_time_avg_ms": round(send_time_avg * 1000, 3),
+            "send_time_max_ms": round(stats.send_time_max * 1000, 3),
+        }
 
 
 manager = ConnectionManager()
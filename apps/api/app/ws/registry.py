@@ -0,0 +1,82 @@
+from collections.abc import Callable, Hashable, Iterator
+from typing import Any
+
+
+class Room:
+    __slots__ = ("key", "members", "_snapshot")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.members: dict[Any, None] = {}
+        self._snapshot: tuple | None = ()
+
+    def snapshot(self) -> tuple:
+        # Copy-on-write: broadcasts share one immutable tuple until membership changes.
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = tuple(self.members)
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+
+# Mutated only from the event loop thread: join/leave never await, so they cannot interleave
+# and need no lock. Broadcasts iterate a cached tuple rebuilt only after membership changed.
+class RoomRegistry:
+    def __init__(self) -> None:
+        self._rooms: dict[str, Room] = {}
+        self._subscribers = 0
+        # Called when a room gets its first member and after it lost its last one.
+        self.on_open: Callable[[str], None] | None = None
+        self.on_close: Callable[[str], None] | None = None
+
+    def join(self, key: str, member: Hashable) -> bool:
+        room = self._rooms.get(key)
+        if room is None:
+            room = self._rooms[key] = Room(key)
+            if self.on_open is not None:
+                self.on_open(key)
+        if member in room.members:
+            return False
+        room.members[member] = None
+        room._snapshot = None
+        self._subscribers += 1
+        return True
+
+    def leave(self, key: str, member: Hashable) -> bool:
+        room = self._rooms.get(key)
+        if room is None or room.members.pop(member, False) is False:
+            return False
+        room._snapshot = None
+        self._subscribers -= 1
+        if not room.members:
+            del self._rooms[key]
+            if self.on_close is not None:
+                self.on_close(key)
+        return True
+
+    def members(self, key: str) -> tuple:
+        room = self._rooms.get(key)
+        return room.snapshot() if room is not None else ()
+
+    def count(self, key: str) -> int:
+        room = self._rooms.get(key)
+        return len(room.members) if room is not None else 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rooms
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rooms)
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def largest(self, limit: int = 10) -> list[tuple[str, int]]:
+        sizes = ((key, len(room)) for key, room in self._rooms.items())
+        return sorted(sizes, key=lambda x: -x[1])[:limit]
@@ -0,0 +1,150 @@
+"""Per-event CPU cost of the realtime broadcast path.
+
+Compares the legacy path (json.dumps for the local fan-out, again for NOTIFY, json.loads +
+json.dumps on every remote node, str -> utf-8 per socket) with the serialize-once path, both
+sent inline and through ConnectionManager's per-socket writer queues. Sockets are no-ops, so
+the numbers are the server-side CPU spent per published event.
+
+The queued path is the slowest: waking a writer task costs 3-4 us per subscriber, against
+~0.3 us for an inline send. That is the price of a slow client never stalling its room; it is
+bounded by WS_MAX_ROOM_SUBSCRIBERS (default 2000, ~6 ms of event loop time per message).
+
+    cd apps/api && python -m benchmarks.bench_broadcast
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import UTC, datetime
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+os.environ.setdefault("SYNC_DATABASE_URL", "postgresql+psycopg://bench@localhost/bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ.setdefault("REFRESH_SECRET", "bench")
+os.environ.setdefault("VIEWER_TOKEN_PEPPER", "bench")
+
+from app.ws.encoding import decode_notify_payload, encode_event  # noqa: E402
+from app.ws.manager import ConnectionManager  # noqa: E402
+
+SUBSCRIBERS = (1, 100, 2_000, 10_000)
+EVENTS = 200
+
+
+class NullSocket:
+    async def accept(self) -> None:
+        return None
+
+    async def send_bytes(self, payload: bytes) -> None:
+        return None
+
+    async def send_text(self, payload: str) -> None:
+        # The ASGI server encodes text frames to utf-8 for every socket.
+        payload.encode()
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+def make_event(n: int) -> dict:
+    return {
+        "event_id": str(uuid.uuid4()),
+        "node_id": "bench",
+        "type": "contribution.changed",
+        "wishlist_public_id": "bench-room",
+        "revision": n,
+        "server_ts": datetime.now(UTC).isoformat(),
+        "data": {
+            "item_id": 1,
+            "item": {
+                "id": 1,
+                "name": "Noise-Cancelling Headphones",
+                "price_cents": 29900,
+                "position": 0,
+                "is_archived": False,
+                "reserved": True,
+                "reserved_at": datetime.now(UTC),
+                "collected_cents": 5000 + n,
+            },
+        },
+    }
+
+
+async def legacy_path(sockets: list[NullSocket], events: list[dict]) -> None:
+    for event in events:
+        payload = json.dumps(event, default=str)
+        for ws in sockets:
+            await ws.send_text(payload)
+        notify = json.dumps(event, default=str)
+        remote = json.loads(notify)
+        json.dumps(remote, default=str)
+
+
+async def encoded_inline_path(sockets: list[NullSocket], events: list[dict]) -> None:
+    for event in events:
+        frame = encode_event("bench-room", event)
+        for ws in sockets:
+            await ws.send_bytes(frame.data)
+        remote = decode_notify_payload(frame.notify_payload)
+        # Remote nodes materialize the frame bytes they fan out.
+        assert remote is not None and remote.data
+
+
+async def encoded_path(manager: ConnectionManager, events: list[dict]) -> None:
+    for event in events:
+        frame = encode_event("bench-room", event)
+        manager.broadcast(frame.room, frame.data)
+        remote = decode_notify_payload(frame.notify_payload)
+        # Remote nodes materialize the frame bytes they fan out.
+        assert remote is not None and remote.data
+        # Let the writer tasks drain before the next event, as in production.
+        await asyncio.sleep(0)
+
+
+async def measure(subscribers: int) -> tuple[float, float, float]:
+    events = [make_event(n) for n in range(EVENTS)]
+    sockets = [NullSocket() for _ in range(subscribers)]
+
+    started = time.process_time()
+    await legacy_path(sockets, events)
+    legacy = (time.process_time() - started) / EVENTS
+
+    started = time.process_time()
+    await encoded_inline_path(sockets, events)
+    inline = (time.process_time() - started) / EVENTS
+
+    manager = ConnectionManager(
+        queue_size=EVENTS + 1, send_timeout=5, accept_rate=0, max_room_subscribers=0
+    )
+    for ws in sockets:
+        await manager.connect("bench-room", ws)  # type: ignore[arg-type]
+    await asyncio.sleep(0)
+    expected = manager.stats.sent + subscribers * EVENTS
+    started = time.process_time()
+    await encoded_path(manager, events)
+    while manager.stats.sent < expected:
+        await asyncio.sleep(0)
+    encoded = (time.process_time() - started) / EVENTS
+    for ws in sockets:
+        await manager.disconnect("bench-room", ws)  # type: ignore[arg-type]
+    await asyncio.sleep(0)
+    return legacy, inline, encoded
+
+
+async def main() -> None:
+    print(f"{'subscribers':>12} {'legacy':>12} {'encoded':>12} {'queued':>12}  (us/event)")
+    for subscribers in SUBSCRIBERS:
+        legacy, inline, encoded = await measure(subscribers)
+        row = f"{legacy * 1e6:>12.1f} {inline * 1e6:>12.1f} {encoded * 1e6:>12.1f}"
+        print(f"{subscribers:>12} {row}")
+
+
+if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        # uvicorn runs on uvloop when it is installed; measure on the same loop.
+        uvloop.run(main())
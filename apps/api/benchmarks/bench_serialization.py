@@ -0,0 +1,118 @@
+"""Per-response CPU cost of serializing a wishlist view.
+
+Compares the model path (ItemView / WishlistView built from the row dicts, re-validated by
+FastAPI's response_model and rendered by JSONResponse) with the FAST_JSON_RESPONSES path
+(plain dicts straight to orjson bytes). Both paths must produce identical bodies; the numbers
+are the server-side CPU spent per response, excluding the database.
+
+    cd apps/api && python -m benchmarks.bench_serialization
+"""
+
+import asyncio
+import os
+import time
+from datetime import UTC, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench")
+os.environ.setdefault("SYNC_DATABASE_URL", "postgresql+psycopg://bench@localhost/bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ.setdefault("REFRESH_SECRET", "bench")
+os.environ.setdefault("VIEWER_TOKEN_PEPPER", "bench")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.schemas.wishlist import ItemView, WishlistView  # noqa: E402
+from app.utils.fast_json import item_json, json_response, wishlist_json  # noqa: E402
+
+ITEMS = (10, 100, 500)
+ROUNDS = 200
+
+RESPONSE_FIELD = create_model_field("Response_bench", WishlistView, mode="serialization")
+
+
+def make_wishlist() -> dict:
+    now = datetime.now(UTC)
+    return {
+        "id": 1,
+        "public_id": "bench-wishlist",
+        "title": "Birthday — 30",
+        "description": "Things I'd love to get",
+        "currency": "EUR",
+        "is_public": True,
+        "revision": 42,
+        "created_at": now - timedelta(days=30),
+        "updated_at": now,
+    }
+
+
+def make_items(count: int) -> list[tuple[dict, bool, int | None]]:
+    now = datetime.now(UTC)
+    overlay: list[tuple[dict, bool, int | None]] = []
+    for n in range(count):
+        reserved = n % 3 == 0
+        fields = {
+            "id": n + 1,
+            "name": f"Noise-Cancelling Headphones №{n}",
+            "url": f"https://shop.example.com/p/{n}",
+            "image_url": f"https://cdn.example.com/i/{n}.jpg" if n % 2 else None,
+            "price_cents": 29900 + n,
+            "allow_contributions": not reserved,
+            "notes": "Black, please" if n % 4 == 0 else None,
+            "position": n,
+            "is_archived": False,
+            "reserved": reserved,
+            "reserved_at": now - timedelta(minutes=n) if reserved else None,
+            "collected_cents": 0 if reserved else 500 * n,
+            "contributor_count": 0 if reserved else n % 5,
+            "created_at": now - timedelta(days=1, seconds=n),
+            "updated_at": now - timedelta(seconds=n),
+        }
+        overlay.append((fields, reserved and n % 2 == 0, n % 7 * 100))
+    return overlay
+
+
+async def model_path(wishlist: dict, overlay: list[tuple[dict, bool, int | None]]) -> bytes:
+    items = [
+        ItemView(**fields, reserved_by_me=by_me, my_contribution_cents=cents)
+        for fields, by_me, cents in overlay
+    ]
+    view = WishlistView(**wishlist, is_owner=False, items=items)
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=view)
+    return JSONResponse(content).body
+
+
+async def fast_path(wishlist: dict, overlay: list[tuple[dict, bool, int | None]]) -> bytes:
+    items = [item_json(*entry) for entry in overlay]
+    return json_response(wishlist_json(wishlist, False, items)).body
+
+
+async def measure(count: int) -> tuple[float, float, int]:
+    wishlist = make_wishlist()
+    overlay = make_items(count)
+    body = await model_path(wishlist, overlay)
+    assert await fast_path(wishlist, overlay) == body
+
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        await model_path(wishlist, overlay)
+    model = (time.process_time() - started) / ROUNDS
+
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        await fast_path(wishlist, overlay)
+    fast = (time.process_time() - started) / ROUNDS
+    return model, fast, len(body)
+
+
+async def main() -> None:
+    print(f"{'items':>8} {'bytes':>10} {'model':>12} {'fast':>12} {'speedup':>8}  (us/response)")
+    for count in ITEMS:
+        model, fast, size = await measure(count)
+        ratio = model / fast
+        print(f"{count:>8} {size:>10} {model * 1e6:>12.1f} {fast * 1e6:>12.1f} {ratio:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
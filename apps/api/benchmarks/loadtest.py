@@ -0,0 +1,405 @@
+"""End-to-end realtime load test.
+
+Starts N API workers (one uvicorn process each, on consecutive ports) against a local Postgres,
+seeds hot and cold public wishlists, connects simulated WebSocket viewers spread over them and
+drives reserve/unreserve and contribute traffic through random workers. Reports end-to-end
+delivery latency (publish `server_ts` to client receive), duplicated and lost revisions per
+client, resyncs, and per-worker CPU and peak RSS. Exits non-zero when a gate is exceeded, so it
+can guard realtime changes.
+
+    cd apps/api && alembic upgrade head
+    python -m benchmarks.loadtest --workers 4 --clients 20000 --rps 200 --max-p99-ms 250
+
+Uses DATABASE_URL and the other app settings from the environment. Needs `ulimit -n` above the
+client count; the database should be a disposable one, since the run seeds its own rows.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import orjson
+import websockets
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.models import User, Wishlist, WishlistItem
+from app.utils.security import create_access_token, hash_password
+
+API_DIR = Path(__file__).resolve().parent.parent
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass
+class Room:
+    public_id: str
+    wishlist_id: int
+    reservable: list[int]
+    fundable: list[int]
+    hot: bool
+    start_revision: int = 0
+
+
+@dataclass
+class Viewer:
+    room: str
+    revisions: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    resyncs: int = 0
+
+
+@dataclass
+class Results:
+    latencies: list[float] = field(default_factory=list)
+    messages: int = 0
+    batches: int = 0
+    requests: int = 0
+    rejected: int = 0
+    failed: int = 0
+
+
+class WorkerProcess:
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=API_DIR,
+        )
+        self.cpu_start = 0.0
+        self.rss_max = 0
+
+    def cpu_seconds(self) -> float:
+        fields = Path(f"/proc/{self.process.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+    def sample_rss(self) -> None:
+        rss = int(Path(f"/proc/{self.process.pid}/statm").read_text().split()[1]) * PAGE_SIZE
+        self.rss_max = max(self.rss_max, rss)
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+async def wait_ready(workers: list[WorkerProcess]) -> None:
+    async with httpx.AsyncClient() as client:
+        for worker in workers:
+            for _ in range(100):
+                try:
+                    if (await client.get(f"{worker.url}/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError(f"worker on port {worker.port} did not start")
+
+
+async def seed(
+    hot_rooms: int, cold_rooms: int, items: int, contributors: int
+) -> tuple[list[Room], list[str]]:
+    engine = create_async_engine(settings.database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    run = uuid.uuid4().hex[:8]
+    async with session_maker() as db:
+        owner = User(
+            email=f"loadtest-{run}@example.com", password_hash=hash_password("loadtest-password")
+        )
+        users = [
+            User(
+                email=f"loadtest-{run}-{n}@example.com",
+                password_hash=owner.password_hash,
+                balance_cents=10**9,
+            )
+            for n in range(contributors)
+        ]
+        db.add_all([owner, *users])
+        await db.flush()
+        wishlists = [
+            Wishlist(owner_id=owner.id, title=f"Load test {n}", currency="USD", is_public=True)
+            for n in range(hot_rooms + cold_rooms)
+        ]
+        db.add_all(wishlists)
+        await db.flush()
+        db.add_all(
+            WishlistItem(
+                wishlist_id=wishlist.id,
+                name=f"Item {n}",
+                price_cents=10**9,
+                allow_contributions=n % 2 == 1,
+                position=n,
+            )
+            for wishlist in wishlists
+            for n in range(items)
+        )
+        await db.commit()
+        rows = (
+            await db.execute(
+                select(
+                    WishlistItem.wishlist_id, WishlistItem.id, WishlistItem.allow_contributions
+                ).where(WishlistItem.wishlist_id.in_([w.id for w in wishlists]))
+            )
+        ).all()
+    await engine.dispose()
+
+    rooms = {
+        w.id: Room(w.public_id, w.id, [], [], hot=index < hot_rooms, start_revision=w.revision or 0)
+        for index, w in enumerate(wishlists)
+    }
+    for wishlist_id, item_id, fundable in rows:
+        (rooms[wishlist_id].fundable if fundable else rooms[wishlist_id].reservable).append(item_id)
+    return list(rooms.values()), [create_access_token(str(user.id)) for user in users]
+
+
+async def final_revisions(rooms: list[Room]) -> dict[str, int]:
+    engine = create_async_engine(settings.database_url)
+    async with engine.connect() as conn:
+        rows = await conn.execute(
+            select(Wishlist.public_id, Wishlist.revision).where(
+                Wishlist.id.in_([r.wishlist_id for r in rooms])
+            )
+        )
+        revisions: dict[str, int] = {public_id: revision for public_id, revision in rows}
+    await engine.dispose()
+    return revisions
+
+
+def record(viewer: Viewer, message: dict, received: float, results: Results) -> None:
+    results.messages += 1
+    if message.get("type") == "resync":
+        viewer.resyncs += 1
+        return
+    if message.get("type") == "batch":
+        results.batches += 1
+        for revision in range(message["from_revision"], message["revision"] + 1):
+            viewer.revisions[revision] += 1
+        events = message["events"]
+    else:
+        viewer.revisions[message["revision"]] += 1
+        events = [message]
+    for event in events:
+        results.latencies.append(received - datetime.fromisoformat(event["server_ts"]).timestamp())
+
+
+async def run_viewer(
+    url: str, viewer: Viewer, results: Results, connected: asyncio.Event, stop: asyncio.Event
+) -> None:
+    async with websockets.connect(url, ping_interval=None, max_queue=None, open_timeout=60) as ws:
+        connected.set()
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except TimeoutError:
+                continue
+            if message == "ping":
+                await ws.send("pong")
+                continue
+            record(viewer, orjson.loads(message), time.time(), results)
+
+
+async def drive_traffic(
+    client: httpx.AsyncClient,
+    workers: list[WorkerProcess],
+    rooms: list[Room],
+    tokens: list[str],
+    args: argparse.Namespace,
+    results: Results,
+) -> None:
+    hot = [room for room in rooms if room.hot]
+    cold = [room for room in rooms if not room.hot]
+
+    async def request(path: str, body: dict, viewer_token: str, token: str | None = None) -> None:
+        worker = random.choice(workers)
+        headers = {
+            "X-Viewer-Token": viewer_token,
+            # The API rate-limits per client IP; spread simulated viewers over many addresses.
+            "X-Forwarded-For": ".".join(["10", *(str(random.randint(1, 254)) for _ in range(3))]),
+        }
+        cookies = {"access_token": token} if token else None
+        results.requests += 1
+        try:
+            response = await client.post(
+                f"{worker.url}{path}", json=body, headers=headers, cookies=cookies
+            )
+        except httpx.HTTPError:
+            results.failed += 1
+            return
+        if response.status_code >= 500:
+            results.failed += 1
+        elif response.status_code >= 400:
+            results.rejected += 1
+
+    async def operation() -> None:
+        room = random.choice(
+            hot if hot and (not cold or random.random() < args.hot_traffic_share) else cold
+        )
+        viewer_token = uuid.uuid4().hex
+        if random.random() < args.contribute_share:
+            item_id = random.choice(room.fundable)
+            body = {"amount_cents": 100, "honeypot": ""}
+            await request(
+                f"/api/public/items/{item_id}/contribute", body, viewer_token, random.choice(tokens)
+            )
+        else:
+            item_id = random.choice(room.reservable)
+            await request(f"/api/public/items/{item_id}/reserve", {"honeypot": ""}, viewer_token)
+            await request(f"/api/public/items/{item_id}/unreserve", {}, viewer_token)
+
+    started = time.perf_counter()
+    tasks = []
+    for n in range(int(args.rps * args.duration)):
+        delay = started + n / args.rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(operation()))
+    await asyncio.gather(*tasks)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def main(args: argparse.Namespace) -> int:
+    rooms, tokens = await seed(args.hot_rooms, args.cold_rooms, args.items, args.contributors)
+    workers = [WorkerProcess(args.base_port + n) for n in range(args.workers)]
+    try:
+        await wait_ready(workers)
+        hot = [room for room in rooms if room.hot]
+        cold = [room for room in rooms if not room.hot]
+        viewers = []
+        for _ in range(args.clients):
+            pool = hot if hot and (not cold or random.random() < args.hot_client_share) else cold
+            viewers.append(Viewer(random.choice(pool).public_id))
+
+        results = Results()
+        stop = asyncio.Event()
+        connected = [asyncio.Event() for _ in viewers]
+        semaphore = asyncio.Semaphore(500)
+
+        async def start_viewer(index: int, viewer: Viewer) -> None:
+            worker = workers[index % len(workers)]
+            url = f"ws://127.0.0.1:{worker.port}/ws/wishlist/{viewer.room}"
+            async with semaphore:
+                task = asyncio.create_task(run_viewer(url, viewer, results, connected[index], stop))
+                await connected[index].wait()
+            await task
+
+        viewer_tasks = [asyncio.create_task(start_viewer(n, v)) for n, v in enumerate(viewers)]
+        await asyncio.gather(*(event.wait() for event in connected))
+        print(
+            f"{len(viewers)} viewers connected over {len(rooms)} rooms and {len(workers)} workers"
+        )
+
+        for worker in workers:
+            worker.cpu_start = worker.cpu_seconds()
+        sampler_stop = asyncio.Event()
+
+        async def sample() -> None:
+            while not sampler_stop.is_set():
+                for worker in workers:
+                    worker.sample_rss()
+                await asyncio.sleep(1)
+
+        sampler = asyncio.create_task(sample())
+        limits = httpx.Limits(max_connections=args.http_connections)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            await drive_traffic(client, workers, rooms, tokens, args, results)
+        await asyncio.sleep(args.drain)
+        sampler_stop.set()
+        await sampler
+        cpu = [
+            (worker.cpu_seconds() - worker.cpu_start) / args.duration * 100 for worker in workers
+        ]
+
+        stop.set()
+        await asyncio.gather(*viewer_tasks, return_exceptions=True)
+        revisions = await final_revisions(rooms)
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    start = {room.public_id: room.start_revision for room in rooms}
+    duplicates = sum(count - 1 for v in viewers for count in v.revisions.values() if count > 1)
+    lost = sum(
+        sum(
+            1
+            for revision in range(start[v.room] + 1, revisions[v.room] + 1)
+            if revision not in v.revisions
+        )
+        for v in viewers
+        if not v.resyncs
+    )
+    resynced = sum(1 for v in viewers if v.resyncs)
+    latencies = sorted(results.latencies)
+    p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (50, 95, 99))
+
+    print(
+        f"requests {results.requests}  rejected {results.rejected}  failed {results.failed}  "
+        f"messages {results.messages}  batches {results.batches}"
+    )
+    worst = latencies[-1] * 1000 if latencies else 0.0
+    print(f"delivery latency ms  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {worst:.1f}")
+    print(f"duplicates {duplicates}  lost {lost}  viewers resynced {resynced}")
+    for worker, worker_cpu in zip(workers, cpu, strict=True):
+        rss = worker.rss_max / 2**20
+        print(f"worker :{worker.port}  cpu {worker_cpu:.0f}%  rss max {rss:.0f} MiB")
+
+    failures = []
+    if args.max_p99_ms is not None and p99 > args.max_p99_ms:
+        failures.append(f"p99 {p99:.1f} ms > {args.max_p99_ms} ms")
+    if lost > args.max_lost:
+        failures.append(f"lost {lost} > {args.max_lost}")
+    if duplicates > args.max_duplicates:
+        failures.append(f"duplicates {duplicates} > {args.max_duplicates}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--base-port", type=int, default=8100)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--hot-rooms", type=int, default=5)
+    parser.add_argument("--cold-rooms", type=int, default=200)
+    parser.add_argument("--hot-client-share", type=float, default=0.8)
+    parser.add_argument("--hot-traffic-share", type=float, default=0.8)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--contributors", type=int, default=50)
+    parser.add_argument("--rps", type=float, default=50, help="operations per second")
+    parser.add_argument("--contribute-share", type=float, default=0.3)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--drain", type=float, default=3, help="seconds to wait for late events")
+    parser.add_argument("--http-connections", type=int, default=200)
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-lost", type=int, default=0)
+    parser.add_argument("--max-duplicates", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
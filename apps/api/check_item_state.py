@@ -0,0 +1,18 @@
+import asyncio
+import sys
+
+from app.db.session import SessionLocal
+from app.services.wishlist_service import check_item_state
+
+
+async def run(fix: bool) -> None:
+    async with SessionLocal() as db:
+        drift = await check_item_state(db, fix=fix)
+        await db.commit()
+    for row in drift:
+        print(row)
+    print(f"{len(drift)} items out of sync" + (", repaired" if fix and drift else ""))
+
+
+if __name__ == "__main__":
+    asyncio.run(run("--fix" in sys.argv[1:]))
@@ -0,0 +1,18 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import require_admin_token
+from app.core.config import settings
+
+
+def test_admin_endpoints_need_the_configured_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "admin_token", None)
+    with pytest.raises(HTTPException):
+        require_admin_token("anything")
+
+    monkeypatch.setattr(settings, "admin_token", "s3cret-token")
+    for wrong in (None, "", "s3cret", "s3cret-token-2"):
+        with pytest.raises(HTTPException) as exc:
+            require_admin_token(wrong)
+        assert exc.value.status_code == 403
+    require_admin_token("s3cret-token")
@@ -0,0 +1,20 @@
+from app.utils.etag import etag_matches, revision_etag
+
+
+def test_etag_changes_with_revision_and_viewer() -> None:
+    etag = revision_etag("p", 7, "a" * 64)
+
+    assert etag == f'W/"p7-{"a" * 16}"'
+    assert etag != revision_etag("p", 8, "a" * 64)
+    assert etag != revision_etag("p", 7, "b" * 64)
+    assert revision_etag("o", 7) == 'W/"o7"'
+
+
+def test_if_none_match_uses_weak_comparison() -> None:
+    etag = revision_etag("o", 3)
+
+    assert etag_matches('W/"o3"', etag)
+    assert etag_matches('"o2", "o3"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"o2"', etag)
+    assert not etag_matches(None, etag)
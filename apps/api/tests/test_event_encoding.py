@@ -0,0 +1,71 @@
+from datetime import UTC, datetime
+
+import orjson
+
+from app.ws.encoding import (
+    decode_notify_batch,
+    decode_notify_payload,
+    decode_notify_reference,
+    encode_event,
+    encode_notify_batch,
+    encode_notify_reference,
+)
+
+
+def test_notify_payload_round_trip_keeps_bytes_intact() -> None:
+    event = {
+        "event_id": "e1",
+        "node_id": "node-a",
+        "type": "item.updated",
+        "server_ts": datetime(2026, 1, 1, tzinfo=UTC),
+        "data": {"name": "Plüsch\n"},
+    }
+    frame = encode_event("user:7", event)
+
+    remote = decode_notify_payload(frame.notify_payload)
+
+    assert remote is not None
+    assert (remote.origin, remote.event_id, remote.room) == ("node-a", "e1", "user:7")
+    assert remote.data == frame.data
+    assert orjson.loads(remote.data)["data"]["name"] == "Plüsch\n"
+
+
+def test_decode_rejects_payload_without_routing_header() -> None:
+    assert decode_notify_payload('{"type": "item.updated"}') is None
+    assert decode_notify_payload("\n{}") is None
+    assert decode_notify_payload("node-a room\n{}") is None
+
+
+def test_notify_batch_and_reference_round_trip() -> None:
+    frames = [
+        encode_event("room-a", {"event_id": "e1", "node_id": "n", "revision": 12}),
+        encode_event("user:3", {"event_id": "e2", "node_id": "n"}),
+    ]
+
+    decoded = decode_notify_batch(encode_notify_batch(frames))
+
+    assert [(f.room, f.event_id, f.revision, f.data) for f in decoded] == [
+        (f.room, f.event_id, f.revision, f.data) for f in frames
+    ]
+    assert decoded[0].revision == 12 and decoded[1].revision is None
+    assert decode_notify_reference(encode_notify_reference("n", [4, 9])) == ("n", [4, 9])
+    assert decode_notify_reference(encode_notify_batch(frames)) is None
+
+
+def test_merge_key_travels_in_the_notify_header() -> None:
+    event = {
+        "event_id": "e1",
+        "node_id": "n",
+        "type": "reservation.changed",
+        "revision": 3,
+        "data": {"item_id": 9},
+    }
+    frame = encode_event("room-a", event)
+
+    remote = decode_notify_payload(frame.notify_payload)
+    legacy = decode_notify_payload(f"n e1 3 room-a\n{frame.text}")
+
+    assert frame.merge_key == "item:9"
+    assert remote is not None and remote.merge_key == "item:9"
+    assert legacy is not None
+    assert (legacy.room, legacy.revision, legacy.merge_key) == ("room-a", 3, None)
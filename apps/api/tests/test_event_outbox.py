@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import EventOutbox
+from app.services import outbox
+from app.services.outbox import OutboxRelay
+from app.services.realtime import publish_event
+from app.ws.encoding import EncodedEvent
+
+
+@pytest.mark.asyncio
+async def test_outbox_event_is_relayed_only_after_commit(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    delivered: list[str] = []
+
+    def publish_local(frames: list[EncodedEvent]) -> None:
+        delivered.extend(frame.event_id for frame in frames)
+
+    monkeypatch.setattr(outbox, "publish_local", publish_local)
+
+    publish_event(db_session, "outbox-room", "item.updated", {"item_id": 1}, 1)
+    await db_session.rollback()
+    pending = await db_session.scalar(select(EventOutbox).where(EventOutbox.room == "outbox-room"))
+    assert pending is None
+
+    publish_event(db_session, "outbox-room", "item.updated", {"item_id": 1}, 2)
+    await db_session.commit()
+    row = await db_session.scalar(select(EventOutbox).where(EventOutbox.room == "outbox-room"))
+    assert row is not None and row.relayed_at is None
+
+    relayed = await OutboxRelay(batch_size=50).relay_batch()
+
+    assert relayed >= 1
+    assert row.event_id in delivered
+    await db_session.refresh(row)
+    assert row.relayed_at is not None
@@ -0,0 +1,50 @@
+from datetime import UTC, datetime
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.wishlist import ItemView, WishlistView
+from app.utils.fast_json import item_json, json_response, wishlist_json
+
+
+def test_fast_path_matches_model_path() -> None:
+    now = datetime(2026, 10, 17, 12, 0, 0, 1234, tzinfo=UTC)
+    wishlist: dict[str, Any] = {
+        "id": 1,
+        "public_id": "w1",
+        "title": "Geburtstag — 30",
+        "description": None,
+        "currency": "EUR",
+        "is_public": True,
+        "revision": 3,
+        "created_at": now,
+        "updated_at": now,
+    }
+    fields: dict[str, Any] = {
+        "id": 5,
+        "name": "Kopfhörer",
+        "url": "https://example.com/p",
+        "image_url": None,
+        "price_cents": 29900,
+        "allow_contributions": True,
+        "notes": None,
+        "position": 0,
+        "is_archived": False,
+        "reserved": True,
+        "reserved_at": now,
+        "collected_cents": 500,
+        "contributor_count": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+    view = WishlistView(
+        **wishlist,
+        is_owner=False,
+        items=[ItemView(**fields, reserved_by_me=True, my_contribution_cents=500)],
+    )
+
+    fast = json_response(wishlist_json(wishlist, False, [item_json(fields, True, 500)]))
+
+    assert fast.body == JSONResponse(jsonable_encoder(view)).body
+    assert fast.media_type == "application/json"
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import User, Wishlist, WishlistItem
+from app.services.wishlist_service import (
+    check_item_state,
+    contribute_to_item,
+    get_item_shared_state,
+    refund_item_contributions,
+    reserve_item,
+    unreserve_item,
+)
+
+
+@pytest.mark.asyncio
+async def test_item_state_columns_follow_mutations(db_session: AsyncSession) -> None:
+    user = User(email="state-owner@test.com", password_hash="x")
+    db_session.add(user)
+    await db_session.flush()
+    wishlist = Wishlist(owner_id=user.id, title="State", currency="USD")
+    db_session.add(wishlist)
+    await db_session.flush()
+    item = WishlistItem(
+        wishlist_id=wishlist.id, name="Gift", price_cents=1000, allow_contributions=True, position=0
+    )
+    db_session.add(item)
+    await db_session.flush()
+
+    await reserve_item(db_session, item, "viewer-a")
+    await contribute_to_item(db_session, item, "viewer-a", 300, None)
+    await contribute_to_item(db_session, item, "viewer-a", 200, None)
+    await contribute_to_item(db_session, item, "viewer-b", 100, None)
+
+    state = await get_item_shared_state(db_session, item.id)
+    assert state is not None
+    assert (state["collected_cents"], state["contributor_count"]) == (600, 2)
+    assert state["reserved"] is True
+    assert await check_item_state(db_session, wishlist.id) == []
+
+    await unreserve_item(db_session, item.id, "viewer-a")
+    await refund_item_contributions(db_session, item.id)
+    assert await check_item_state(db_session, wishlist.id) == []
+
+    await db_session.execute(
+        update(WishlistItem).where(WishlistItem.id == item.id).values(collected_cents=42)
+    )
+    drift = await check_item_state(db_session, wishlist.id, fix=True)
+    assert drift == [{"item_id": item.id, "collected_cents": (42, 0)}]
+    assert await check_item_state(db_session, wishlist.id) == []
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Notification, User, Wishlist, WishlistItem
+from app.services.notification_service import (
+    add_notification,
+    get_unread_count,
+    list_user_notifications,
+    notify_contribution,
+    reset_unread,
+)
+from app.utils.cursor import encode_cursor
+
+
+@pytest.mark.asyncio
+async def test_unread_counter_and_keyset_pages(db_session: AsyncSession) -> None:
+    user = User(email="notified@test.com", password_hash="x")
+    db_session.add(user)
+    await db_session.flush()
+
+    for n in range(5):
+        await add_notification(db_session, Notification(user_id=user.id, type="t", title=f"n{n}"))
+    await db_session.flush()
+    assert await get_unread_count(db_session, user.id) == 5
+
+    first = await list_user_notifications(db_session, user.id, 2)
+    cursor = encode_cursor(first[-1].created_at, first[-1].id)
+    rest = await list_user_notifications(db_session, user.id, 10, cursor=cursor)
+    assert [n.title for n in first + rest] == ["n4", "n3", "n2", "n1", "n0"]
+
+    since = encode_cursor(rest[0].created_at, rest[0].id)
+    newer = await list_user_notifications(db_session, user.id, 10, since=since)
+    assert [n.title for n in newer] == ["n4", "n3"]
+
+    await reset_unread(db_session, user.id)
+    assert await get_unread_count(db_session, user.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_contributions_within_window_collapse_into_one_notification(
+    db_session: AsyncSession,
+) -> None:
+    owner = User(email="collapse-owner@test.com", password_hash="x")
+    db_session.add(owner)
+    await db_session.flush()
+    wishlist = Wishlist(owner_id=owner.id, title="Hot", currency="USD")
+    db_session.add(wishlist)
+    await db_session.flush()
+    item = WishlistItem(wishlist_id=wishlist.id, name="Gift", price_cents=10_000, position=0)
+    db_session.add(item)
+    await db_session.flush()
+
+    added = [
+        await notify_contribution(db_session, wishlist, item, amount, None, window_seconds=60)
+        for amount in (500, 700, 300)
+    ]
+
+    # The collapse is a Core UPDATE; drop the stale ORM copy of the row before reading it back.
+    db_session.expunge_all()
+    rows = await list_user_notifications(db_session, owner.id, 10)
+    assert added == [1, 0, 0]
+    assert [(n.event_count, n.amount_cents) for n in rows] == [(3, 1500)]
+    assert await get_unread_count(db_session, owner.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_collapsed_notification_is_refetched_with_its_new_body(
+    db_session: AsyncSession,
+) -> None:
+    owner = User(email="collapse-since@test.com", password_hash="x")
+    db_session.add(owner)
+    await db_session.flush()
+    wishlist = Wishlist(owner_id=owner.id, title="Hot", currency="USD")
+    db_session.add(wishlist)
+    await db_session.flush()
+    item = WishlistItem(wishlist_id=wishlist.id, name="Gift", price_cents=10_000, position=0)
+    db_session.add(item)
+    await db_session.flush()
+
+    await notify_contribution(db_session, wishlist, item, 500, None, window_seconds=60)
+    shown = await list_user_notifications(db_session, owner.id, 10)
+    since = encode_cursor(shown[0].created_at, shown[0].id)
+    await notify_contribution(db_session, wishlist, item, 700, "Ура", window_seconds=60)
+
+    db_session.expunge_all()
+    newer = await list_user_notifications(db_session, owner.id, 10, since=since)
+    # The client's merge: fetched rows replace shown ones with the same id.
+    fetched = {n.id for n in newer}
+    merged = newer + [n for n in shown if n.id not in fetched]
+    assert [n.body for n in merged] == ["Вкладов: 2, всего 12.00 USD. Последний комментарий: Ура"]
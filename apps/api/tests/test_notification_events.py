@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import notification_service
+from app.services.notification_service import UserEventThrottle
+
+
+@pytest.fixture
+def published(monkeypatch: pytest.MonkeyPatch) -> list[tuple[int, dict]]:
+    sent: list[tuple[int, dict]] = []
+
+    def publish_user_event(db: AsyncSession, user_id: int, event_type: str, data: dict) -> None:
+        sent.append((user_id, data))
+
+    monkeypatch.setattr(notification_service, "publish_user_event", publish_user_event)
+    # Unbound sessions: commit and rollback only run the session hooks.
+    monkeypatch.setattr(notification_service, "SessionLocal", AsyncSession)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_events_within_interval_are_merged_into_one_trailing_event(
+    published: list[tuple[int, dict]],
+) -> None:
+    throttle = UserEventThrottle(interval=0.05)
+    db = AsyncSession()
+
+    throttle.publish(db, 1, 1)
+    throttle.publish(db, 2, 1)
+    await db.commit()
+    throttle.publish(db, 1, 1)
+    throttle.publish(db, 1, 0)
+    throttle.publish(db, 1, 2)
+    assert published == [(1, {"increment": 1}), (2, {"increment": 1})]
+
+    await asyncio.sleep(0.1)
+    assert published[2:] == [(1, {"increment": 3})]
+    assert throttle.snapshot() == {"pending": 0, "sent": 3, "merged": 2}
+
+
+@pytest.mark.asyncio
+async def test_interval_starts_only_once_the_event_is_committed(
+    published: list[tuple[int, dict]],
+) -> None:
+    throttle = UserEventThrottle(interval=60)
+    db = AsyncSession()
+
+    throttle.publish(db, 1, 1)
+    await db.rollback()
+    throttle.publish(db, 1, 1)
+    await db.commit()
+    throttle.publish(db, 1, 1)
+    assert published == [(1, {"increment": 1}), (1, {"increment": 1})]
+
+    await throttle.stop()
+    assert published[2:] == [(1, {"increment": 1})]
+    assert throttle.snapshot() == {"pending": 0, "sent": 3, "merged": 1}
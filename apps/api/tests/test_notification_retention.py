@@ -0,0 +1,43 @@
+from datetime import UTC, date, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Notification, User
+from app.services.notification_retention import NotificationRetention, list_partitions, month_start
+from app.services.notification_service import add_notification, get_unread_count
+
+
+def test_month_arithmetic_crosses_years() -> None:
+    assert month_start(date(2030, 11, 20), 2) == date(2031, 1, 1)
+    assert month_start(date(2030, 1, 5), -1) == date(2029, 12, 1)
+
+
+@pytest.mark.asyncio
+async def test_retention_moves_default_rows_and_drops_expired_months(
+    db_session: AsyncSession,
+) -> None:
+    user = User(email="retention@test.com", password_hash="x")
+    db_session.add(user)
+    await db_session.flush()
+    for created_at in [datetime(2030, 1, 3, tzinfo=UTC), datetime(2030, 5, 2, tzinfo=UTC)]:
+        await add_notification(
+            db_session, Notification(user_id=user.id, type="t", title="n", created_at=created_at)
+        )
+    await db_session.commit()
+
+    retention = NotificationRetention(retention_months=2, months_ahead=1, interval=60)
+    await retention.run_once(today=date(2030, 5, 10))
+
+    partitions = await list_partitions(db_session)
+    assert {"notifications_p203005", "notifications_p203006"} <= set(partitions)
+    remaining = await db_session.scalars(
+        select(Notification.created_at).where(Notification.user_id == user.id)
+    )
+    assert [created_at.month for created_at in remaining] == [5]
+    assert await get_unread_count(db_session, user.id) == 1
+
+    await retention.run_once(today=date(2030, 8, 1))
+    assert "notifications_p203005" not in await list_partitions(db_session)
+    assert await get_unread_count(db_session, user.id) == 0
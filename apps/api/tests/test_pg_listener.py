@@ -0,0 +1,86 @@
+import asyncio
+from collections.abc import Callable
+from datetime import datetime
+
+import pytest
+
+from app.services import listener as listener_module
+from app.services.listener import PgListener
+from app.ws.registry import RoomRegistry
+
+
+@pytest.mark.asyncio
+async def test_notify_burst_is_bounded_and_dispatched_by_workers() -> None:
+    dispatched: list[str] = []
+
+    async def dispatch(payload: str) -> int | None:
+        if payload == "bad":
+            raise ValueError(payload)
+        dispatched.append(payload)
+        return None
+
+    listener = PgListener(dispatch=dispatch, queue_size=3, workers=1)
+    for payload in ["a", "bad", "b", "c", "d"]:
+        listener._on_notify(None, 0, "wishlist_events", payload)
+
+    assert listener.snapshot()["queue_depth"] == 3
+    worker = asyncio.create_task(listener._worker())
+    await asyncio.wait_for(listener.queue.join(), timeout=1)
+    worker.cancel()
+
+    stats = listener.snapshot()
+    assert dispatched == ["a", "b"]
+    counts = (stats["received"], stats["dropped"], stats["dispatched"], stats["dispatch_errors"])
+    assert counts == (5, 2, 2, 1)
+
+
+class FakeListenConnection:
+    def __init__(self) -> None:
+        self.channels: set[str] = set()
+
+    async def add_listener(self, channel: str, callback: Callable[..., None]) -> None:
+        self.channels.add(channel)
+
+    async def remove_listener(self, channel: str, callback: Callable[..., None]) -> None:
+        self.channels.discard(channel)
+
+
+@pytest.mark.asyncio
+async def test_bucket_mode_listens_only_on_channels_of_local_rooms(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    replayed: list[list[str]] = []
+
+    async def deliver_relayed_since(since: datetime, rooms: list[str]) -> int:
+        replayed.append(sorted(rooms))
+        return len(rooms)
+
+    async def dispatch(payload: str) -> int | None:
+        return None
+
+    monkeypatch.setattr(listener_module, "deliver_relayed_since", deliver_relayed_since)
+    monkeypatch.setattr(listener_module, "room_channel", lambda room: f"wishlist_events_{room[0]}")
+    monkeypatch.setattr(listener_module.manager, "rooms", RoomRegistry())
+    listener = PgListener(dispatch=dispatch, buckets=8)
+    listener_module.manager.rooms.on_open = listener.room_opened
+    listener_module.manager.rooms.on_close = listener.room_closed
+    conn = FakeListenConnection()
+
+    a, b = object(), object()
+    listener_module.manager.rooms.join("a1", a)
+    listener_module.manager.rooms.join("a2", b)
+    listener_module.manager.rooms.join("b1", a)
+    await listener._sync_channels(conn)
+
+    assert conn.channels == {"wishlist_events_a", "wishlist_events_b"}
+    assert replayed == [["a1", "a2", "b1"]]
+
+    listener_module.manager.rooms.leave("a1", a)
+    listener_module.manager.rooms.leave("b1", a)
+    assert listener._changed.is_set()
+    await listener._sync_channels(conn)
+
+    assert conn.channels == {"wishlist_events_a"}
+    stats = listener.snapshot()
+    counts = (stats["channels"], stats["listens"], stats["unlistens"])
+    assert stats["mode"] == "buckets" and counts == (1, 2, 1)
@@ -0,0 +1,27 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.services.public_directory import DirectoryCache, DirectoryPage
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_and_rejects_garbage() -> None:
+    updated_at = datetime(2026, 10, 17, 12, 30, 45, 123456, tzinfo=UTC)
+
+    assert decode_cursor(encode_cursor(updated_at, 42)) == (updated_at, 42)
+    for cursor in ["", "not-a-cursor", encode_cursor(datetime(2026, 1, 1), 1)]:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_cache_keeps_only_pages_reached_from_page_one() -> None:
+    cache = DirectoryCache(ttl_seconds=60, max_pages=2)
+    cache.put("elsewhere", DirectoryPage([], None))
+    cache.put(None, DirectoryPage([], "p2"))
+    cache.put("p2", DirectoryPage([], "p3"))
+    cache.put("p3", DirectoryPage([], None))
+
+    assert cache.get(None) is not None and cache.get("p2") is not None
+    assert cache.get("p3") is None and cache.get("elsewhere") is None
+    assert cache.snapshot() == {"pages": 2, "hits": 2, "misses": 2}
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services import realtime
+from app.ws.dedup import EventDeduplicator
+from app.ws.encoding import encode_event
+from app.ws.history import EventHistory
+
+
+def test_deduplicator_evicts_oldest_beyond_capacity() -> None:
+    dedup = EventDeduplicator(max_size=2, ttl_seconds=60)
+    assert not dedup.is_duplicate("a")
+    assert dedup.is_duplicate("a")
+    assert not dedup.is_duplicate("b")
+    assert not dedup.is_duplicate("c")
+    assert not dedup.is_duplicate("a")
+    assert dedup.suppressed_duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_deliver_notify_skips_own_echo_and_repeats(monkeypatch: pytest.MonkeyPatch) -> None:
+    delivered: list[str] = []
+    monkeypatch.setattr(realtime, "deduplicator", EventDeduplicator())
+    monkeypatch.setattr(realtime.manager, "broadcast", lambda room, payload: delivered.append(room))
+
+    own = encode_event("room", {"event_id": "e1", "node_id": realtime.NODE_ID})
+    remote = encode_event("room", {"event_id": "e2", "node_id": "other-node"})
+
+    await realtime.deliver_notify(own.notify_payload)
+    await realtime.deliver_notify(remote.notify_payload)
+    await realtime.deliver_notify(remote.notify_payload)
+
+    assert delivered == ["room"]
+    assert realtime.deduplicator.suppressed_echoes == 1
+    assert realtime.deduplicator.suppressed_duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_remote_wishlist_deletion_evicts_cached_lookup_and_snapshot(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    evicted: list[str] = []
+    monkeypatch.setattr(realtime, "deduplicator", EventDeduplicator())
+    monkeypatch.setattr(realtime, "history", EventHistory())
+    monkeypatch.setattr(realtime.wishlist_resolver, "invalidate", lambda room: evicted.append(room))
+    monkeypatch.setattr(realtime.snapshot_cache, "invalidate", lambda room: evicted.append(room))
+
+    event = {"event_id": "e3", "node_id": "other-node", "type": "wishlist.deleted", "revision": 4}
+    await realtime.deliver_notify(encode_event("w", event).notify_payload)
+
+    assert evicted == ["w", "w"]
@@ -1,8 +1,8 @@
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.models import Reservation, User, Wishlist, WishlistItem
-from app.services.wishlist_service import get_wishlist_items_with_aggregates
+from app.models.models import User, Wishlist, WishlistItem
+from app.services.wishlist_service import get_wishlist_items_with_aggregates, reserve_item
 from app.utils.security import hash_password, hash_viewer_token
 
 
@@ -23,7 +23,7 @@ async def test_reserved_by_me_flag(db_session: AsyncSession) -> None:
     viewer_a = hash_viewer_token("viewer-a-token-123456")
     viewer_b = hash_viewer_token("viewer-b-token-123456")
 
-    db_session.add(Reservation(item_id=item.id, viewer_token_hash=viewer_a))
+    await reserve_item(db_session, item, viewer_a)
     await db_session.commit()
 
     rows_for_a = await get_wishlist_items_with_aggregates(db_session, wishlist.id, viewer_a)
@@ -0,0 +1,51 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.api.stream import _sse_frame
+from app.ws.manager import ConnectionManager
+
+
+@pytest.mark.asyncio
+async def test_attached_stream_shares_room_fanout_with_sockets() -> None:
+    manager = ConnectionManager(queue_size=2, send_timeout=5)
+    conn = manager.attach("room")
+
+    assert await manager.next_payload(conn, timeout=0.01) is None
+    waiting = asyncio.create_task(manager.next_payload(conn, timeout=1))
+    await asyncio.sleep(0)
+    assert manager.broadcast("room", orjson.dumps({"revision": 4}), 4) == 1
+    assert await waiting == (b'{"revision":4}', 4)
+
+    for n in range(4):
+        manager.broadcast("room", orjson.dumps({"revision": 5 + n}), 5 + n)
+    assert manager.drain(conn) == [b'{"type":"resync"}']
+    snapshot = manager.snapshot()
+    assert snapshot["streams"] == 1
+    assert (snapshot["stream_sent"], snapshot["sent"], snapshot["send_time_avg_ms"]) == (2, 0, 0.0)
+
+    manager.detach(conn)
+    assert "room" not in manager.rooms
+    assert manager.snapshot()["streams"] == 0
+
+
+def test_sse_frame_uses_revision_as_event_id() -> None:
+    assert _sse_frame(b'{"revision":7}', 7) == b'id: 7\ndata: {"revision":7}\n\n'
+    assert _sse_frame(b'{"type":"resync"}', None) == b'data: {"type":"resync"}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_stream_keeps_revisions_through_overflow() -> None:
+    manager = ConnectionManager(queue_size=2, send_timeout=5)
+    conn = manager.attach("room")
+
+    manager.replay(conn, [(3, b"r3")])
+    manager.broadcast("room", b"r4", 4)
+    assert await manager.next_payload(conn, timeout=0.01) == (b"r3", 3)
+    manager.broadcast("room", b"r5", 5)
+    manager.broadcast("room", b"r6", 6)
+
+    assert await manager.next_payload(conn, timeout=0.01) == (b'{"type":"resync"}', None)
+    assert conn.revisions is not None and not conn.revisions
+    manager.detach(conn)
@@ -0,0 +1,51 @@
+import uuid
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.wishlist_resolver import WishlistResolver
+
+
+class FakeResult:
+    def __init__(self, row: SimpleNamespace | None) -> None:
+        self.row = row
+
+    def first(self) -> SimpleNamespace | None:
+        return self.row
+
+
+class FakeSession(AsyncSession):
+    def __init__(self, rows: dict[str, SimpleNamespace]) -> None:
+        super().__init__()
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        self.queries += 1
+        public_id = statement.whereclause.right.value
+        return FakeResult(self.rows.get(public_id))
+
+
+@pytest.mark.asyncio
+async def test_resolver_caches_hits_and_misses_and_rejects_malformed_ids() -> None:
+    known, unknown = str(uuid.uuid4()), str(uuid.uuid4())
+    db = FakeSession({known: SimpleNamespace(id=5, is_public=False, owner_id=9, currency="EUR")})
+    resolver = WishlistResolver(max_size=8, ttl_seconds=60, negative_ttl_seconds=60)
+
+    first = await resolver.resolve(db, known)
+    assert first is not None and first.id == 5
+    assert first.visible_to(9) and not first.visible_to(None)
+    assert await resolver.resolve(db, known) == first
+    assert await resolver.resolve(db, unknown) is None
+    assert await resolver.resolve(db, unknown) is None
+    assert await resolver.resolve(db, "../../etc") is None
+    assert db.queries == 2
+
+    resolver.invalidate(known)
+    assert await resolver.resolve(db, known) == first
+    assert db.queries == 3
+    stats = resolver.snapshot()
+    counts = (stats["hits"], stats["negative_hits"], stats["misses"], stats["rejected"])
+    assert counts == (1, 1, 3, 1)
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.services.wishlist_snapshot import SnapshotCache, WishlistSnapshot
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load_and_slow_reload_serves_stale() -> None:
+    loads: list[int] = []
+    revision = 1
+    delay = 0.0
+
+    async def loader(public_id: str) -> WishlistSnapshot:
+        loads.append(revision)
+        await asyncio.sleep(delay)
+        return WishlistSnapshot(revision, {"public_id": public_id}, [])
+
+    cache = SnapshotCache(loader, max_size=4, stale_timeout=0.02)
+    first = await asyncio.gather(*(cache.get("w", 1) for _ in range(5)))
+    assert loads == [1] and all(snapshot is first[0] for snapshot in first)
+    assert (await cache.get("w", 1)) is first[0]
+
+    revision, delay = 2, 0.05
+    stale = await cache.get("w", 2)
+    assert stale is not None and stale.revision == 1
+    await asyncio.sleep(0.06)
+    fresh = await cache.get("w", 2)
+    assert fresh is not None and fresh.revision == 2
+
+    stats = cache.snapshot()
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["stale"]) == (2, 4, 2, 1)
@@ -0,0 +1,83 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.ws.coalescer import EventCoalescer
+from app.ws.encoding import encode_event
+
+
+def item_event(revision: int, item_id: int) -> dict:
+    return {
+        "event_id": f"e{revision}",
+        "node_id": "n",
+        "type": "item.updated",
+        "revision": revision,
+        "data": {"item_id": item_id, "item": {"id": item_id, "position": revision}},
+    }
+
+
+@pytest.mark.asyncio
+async def test_burst_is_merged_into_one_batch() -> None:
+    sent: list[dict] = []
+
+    def broadcast(room: str, payload: bytes, revision: int | None) -> int:
+        sent.append(orjson.loads(payload))
+        return 3
+
+    coalescer = EventCoalescer(broadcast, window=0.02, max_delay=0.2)
+    for revision, item_id in [(1, 10), (2, 10), (3, 11), (4, 10)]:
+        coalescer.submit(encode_event("room", item_event(revision, item_id)))
+
+    assert [event["revision"] for event in sent] == [1]
+    await asyncio.sleep(0.06)
+
+    batch = sent[1]
+    header = (batch["type"], batch["from_revision"], batch["revision"], batch["count"])
+    assert header == ("batch", 2, 4, 3)
+    assert [event["revision"] for event in batch["events"]] == [3, 4]
+    assert coalescer.snapshot(subscribers=3)["merged"] == 1
+    assert coalescer.deliveries == 6
+
+    await asyncio.sleep(0.03)
+    coalescer.submit(encode_event("room", item_event(5, 12)))
+    assert sent[-1]["revision"] == 5
+
+
+@pytest.mark.asyncio
+async def test_events_of_one_transaction_go_out_as_one_message() -> None:
+    sent: list[dict] = []
+
+    def broadcast(room: str, payload: bytes, revision: int | None) -> int:
+        sent.append(orjson.loads(payload))
+        return 1
+
+    coalescer = EventCoalescer(broadcast, window=0.02, max_delay=0.2)
+    frames = [encode_event("room", item_event(1, 10)), encode_event("room", item_event(2, 11))]
+    coalescer.submit_all("room", frames)
+
+    assert len(sent) == 1
+    assert (sent[0]["type"], sent[0]["from_revision"], sent[0]["revision"]) == ("batch", 1, 2)
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_batches_only_span_consecutive_revisions() -> None:
+    sent: list[dict] = []
+
+    def broadcast(room: str, payload: bytes, revision: int | None) -> int:
+        sent.append(orjson.loads(payload))
+        return 1
+
+    coalescer = EventCoalescer(broadcast, window=0.02, max_delay=0.2)
+    coalescer.submit(encode_event("room", item_event(1, 10)))
+    # Revision 4 is still in flight; 6 overtook 5 and both touch item 12.
+    for revision, item_id in [(2, 10), (3, 11), (6, 12), (5, 12)]:
+        coalescer.submit(encode_event("room", item_event(revision, item_id)))
+    await asyncio.sleep(0.06)
+
+    first, second = sent[1], sent[2]
+    assert (first["from_revision"], first["revision"], first["count"]) == (2, 3, 2)
+    assert (second["from_revision"], second["revision"], second["count"]) == (5, 6, 2)
+    assert [event["revision"] for event in second["events"]] == [6]
+    assert len(sent) == 3
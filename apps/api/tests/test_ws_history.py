@@ -0,0 +1,25 @@
+from app.ws.history import EventHistory
+
+
+def test_since_replays_missed_events_in_revision_order() -> None:
+    history = EventHistory(size=4, max_rooms=10)
+    for revision in (3, 5, 4, 6):
+        history.record("room", revision, str(revision).encode())
+
+    assert history.since("room", 3) == [(4, b"4"), (5, b"5"), (6, b"6")]
+    assert history.since("room", 6) == []
+    assert history.since("room", 9) == []
+    assert history.snapshot()["replayed_events"] == 3
+
+
+def test_since_falls_back_when_gap_is_older_than_buffer() -> None:
+    history = EventHistory(size=2, max_rooms=1)
+    for revision in (1, 2, 3):
+        history.record("room", revision, b"e")
+
+    assert history.since("room", 0) is None
+    assert history.since("room", 1) == [(2, b"e"), (3, b"e")]
+
+    history.record("other", 1, b"e")
+    assert history.since("room", 2) is None
+    assert history.snapshot()["rooms"] == 1
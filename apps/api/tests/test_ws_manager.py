@@ -0,0 +1,230 @@
+import asyncio
+import time
+from collections.abc import Iterable
+
+import orjson
+import pytest
+from fastapi import WebSocket
+from starlette.types import Message
+
+from app.ws.manager import ConnectionManager
+
+
+async def _asgi_receive() -> Message:
+    raise AssertionError("FakeWebSocket does not talk ASGI")
+
+
+async def _asgi_send(message: Message) -> None:
+    raise AssertionError("FakeWebSocket does not talk ASGI")
+
+
+class FakeWebSocket(WebSocket):
+    def __init__(self, delay: float = 0.0) -> None:
+        super().__init__({"type": "websocket"}, _asgi_receive, _asgi_send)
+        self.delay = delay
+        self.sent: list[bytes] = []
+        self.texts: list[str] = []
+        self.inbound: list[Message] = []
+        self.closed_code: int | None = None
+        self.close_reason: str | None = None
+        self.release = asyncio.Event()
+        if not delay:
+            self.release.set()
+
+    async def accept(
+        self,
+        subprotocol: str | None = None,
+        headers: Iterable[tuple[bytes, bytes]] | None = None,
+    ) -> None:
+        return None
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.release.wait()
+        self.sent.append(data)
+
+    async def send_text(self, data: str) -> None:
+        self.texts.append(data)
+
+    async def receive(self) -> Message:
+        return self.inbound.pop(0) if self.inbound else {"type": "websocket.disconnect"}
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.closed_code = code
+        self.close_reason = reason
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_slow_socket() -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5)
+    fast, slow = FakeWebSocket(), FakeWebSocket(delay=1)
+    await manager.connect("room", fast)
+    await manager.connect("room", slow)
+
+    assert manager.broadcast("room", orjson.dumps({"n": 1})) == 2
+    await asyncio.sleep(0.01)
+
+    assert [orjson.loads(p)["n"] for p in fast.sent] == [1]
+    assert slow.sent == []
+    slow.release.set()
+    await asyncio.sleep(0.01)
+    assert [orjson.loads(p)["n"] for p in slow.sent] == [1]
+
+    await manager.disconnect("room", fast)
+    await manager.disconnect("room", slow)
+    assert manager.snapshot()["connections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_overflow_replaces_backlog_with_resync_marker() -> None:
+    manager = ConnectionManager(queue_size=2, send_timeout=5)
+    slow = FakeWebSocket(delay=1)
+    await manager.connect("room", slow)
+    await asyncio.sleep(0)
+
+    for n in range(5):
+        manager.broadcast("room", orjson.dumps({"n": n}))
+    slow.release.set()
+    await asyncio.sleep(0.01)
+
+    messages = [orjson.loads(p) for p in slow.sent]
+    assert {"type": "resync"} in messages
+    assert manager.snapshot()["resyncs"] == 1
+
+    manager.broadcast("room", orjson.dumps({"n": 99}))
+    await asyncio.sleep(0.01)
+    assert orjson.loads(slow.sent[-1]) == {"n": 99}
+    await manager.disconnect("room", slow)
+
+
+@pytest.mark.asyncio
+async def test_stuck_send_drops_connection_on_overflow() -> None:
+    manager = ConnectionManager(queue_size=1, send_timeout=0.01)
+    stuck = FakeWebSocket(delay=1)
+    await manager.connect("room", stuck)
+
+    manager.broadcast("room", orjson.dumps({"n": 1}))
+    await asyncio.sleep(0.05)
+    manager.broadcast("room", orjson.dumps({"n": 2}))
+    manager.broadcast("room", orjson.dumps({"n": 3}))
+    await asyncio.sleep(0.01)
+
+    assert stuck.closed_code == 1013
+    assert manager.snapshot()["slow_consumers_dropped"] == 1
+    assert "room" not in manager.rooms
+
+
+@pytest.mark.asyncio
+async def test_replay_is_sent_before_live_events() -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5)
+    ws = FakeWebSocket()
+    conn = await manager.connect("room", ws)
+    assert conn is not None
+
+    manager.replay(conn, [(1, orjson.dumps({"n": 1})), (2, orjson.dumps({"n": 2}))])
+    manager.broadcast("room", orjson.dumps({"n": 3}))
+    manager.replay(conn, None)
+    await asyncio.sleep(0.01)
+
+    assert [orjson.loads(p) for p in ws.sent] == [{"n": 1}, {"n": 2}, {"n": 3}, {"type": "resync"}]
+    await manager.disconnect("room", ws)
+
+
+@pytest.mark.asyncio
+async def test_reap_pings_quiet_sockets_and_drops_dead_ones() -> None:
+    manager = ConnectionManager(
+        queue_size=8, send_timeout=5, ping_interval=0.01, idle_timeout=0.05
+    )
+    quiet, dead = FakeWebSocket(), FakeWebSocket()
+    await manager.connect("room", quiet)
+    await manager.connect("room", dead)
+    await asyncio.sleep(0.02)
+
+    assert manager.reap() == 0
+    await asyncio.sleep(0.01)
+    assert quiet.texts == ["ping"]
+
+    manager.sockets[quiet].last_seen = time.monotonic()
+    await asyncio.sleep(0.04)
+    assert manager.reap() == 1
+    await asyncio.sleep(0.01)
+
+    assert dead.closed_code == 4408
+    assert quiet.closed_code is None
+    assert manager.snapshot()["connections"] == 1
+    await manager.disconnect("room", quiet)
+
+
+@pytest.mark.asyncio
+async def test_inbound_flood_closes_connection() -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5)
+    ws = FakeWebSocket()
+    ws.inbound = [{"type": "websocket.receive", "text": "pong"}] * (manager.inbound_burst + 5)
+    await manager.connect("room", ws)
+
+    await manager.receive(ws)
+
+    assert ws.closed_code == 1008
+    assert manager.snapshot()["inbound_rate_limited"] == 1
+    assert "room" not in manager.rooms
+
+
+@pytest.mark.asyncio
+async def test_drain_closes_sockets_with_retry_hint_and_refuses_new_ones() -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5)
+    sockets = [FakeWebSocket() for _ in range(5)]
+    for ws in sockets:
+        await manager.connect("room", ws)
+    stream = manager.attach("room")
+
+    assert await manager.drain_connections(0.05) == 6
+    await asyncio.sleep(0.01)
+
+    assert {ws.closed_code for ws in sockets} == {1012}
+    assert all((ws.close_reason or "").startswith("retry=") for ws in sockets)
+    assert stream.closed and not manager.streams and not manager.sockets
+
+    late = FakeWebSocket()
+    assert await manager.connect("room", late) is None
+    assert late.closed_code == 1013
+
+
+@pytest.mark.asyncio
+async def test_admission_defers_then_refuses_connection_bursts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5, accept_rate=100)
+    monkeypatch.setattr(manager.admission, "tokens", 1.0)
+    monkeypatch.setattr(manager.admission, "max_wait", 0.015)
+
+    sockets = [FakeWebSocket() for _ in range(4)]
+    started = time.perf_counter()
+    conns = await asyncio.gather(*(manager.accept(ws) for ws in sockets))
+    elapsed = time.perf_counter() - started
+
+    assert [conn is not None for conn in conns] == [True, True, False, False]
+    assert sockets[2].closed_code == 1013
+    assert (sockets[2].close_reason or "").startswith("retry=")
+    assert elapsed >= 0.009
+    stats = manager.snapshot()["admission"]
+    assert (stats["admitted"], stats["deferred"], stats["rejected"]) == (2, 1, 2)
+    for ws in sockets[:2]:
+        await manager.close(ws)
+
+
+@pytest.mark.asyncio
+async def test_full_room_refuses_sockets_and_streams() -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5, max_room_subscribers=2)
+    first = await manager.connect("room", FakeWebSocket())
+    assert first is not None
+    manager.attach("room")
+
+    late = FakeWebSocket()
+    assert await manager.connect("room", late) is None
+    assert late.closed_code == 1013 and (late.close_reason or "").startswith("retry=")
+    assert not manager.admits("room") and manager.admits("other")
+    snapshot = manager.snapshot()
+    assert snapshot["room_full_refused"] == 2
+    assert snapshot["largest_rooms"] == [2]
+
+    await manager.disconnect("room", first.websocket)
+    assert manager.admits("room")
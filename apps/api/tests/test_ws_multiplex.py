@@ -0,0 +1,67 @@
+import asyncio
+from collections.abc import Iterable
+
+import orjson
+import pytest
+from fastapi import WebSocket
+from starlette.types import Message
+
+from app.core.config import settings
+from app.services import realtime
+from app.ws.manager import ConnectionManager
+
+
+async def _asgi_receive() -> Message:
+    raise AssertionError("FakeWebSocket does not talk ASGI")
+
+
+async def _asgi_send(message: Message) -> None:
+    raise AssertionError("FakeWebSocket does not talk ASGI")
+
+
+class FakeWebSocket(WebSocket):
+    def __init__(self) -> None:
+        super().__init__({"type": "websocket"}, _asgi_receive, _asgi_send)
+        self.sent: list[dict] = []
+
+    async def accept(
+        self,
+        subprotocol: str | None = None,
+        headers: Iterable[tuple[bytes, bytes]] | None = None,
+    ) -> None:
+        return None
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(orjson.loads(data))
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_control_messages_manage_rooms_on_one_socket(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = ConnectionManager(queue_size=8, send_timeout=5)
+    monkeypatch.setattr(realtime, "manager", manager)
+    monkeypatch.setattr(settings, "ws_max_subscriptions", 1)
+    ws = FakeWebSocket()
+    conn = await manager.accept(ws)
+    assert conn is not None
+
+    await realtime.handle_control_message(conn, 7, "pong")
+    await realtime.handle_control_message(conn, 7, '{"action": "subscribe", "room": "user"}')
+    manager.broadcast("user:7", orjson.dumps({"type": "notification.created"}))
+    await realtime.handle_control_message(conn, 7, '{"action": "subscribe", "room": "other"}')
+    await realtime.handle_control_message(conn, None, '{"action": "jump"}')
+    await realtime.handle_control_message(conn, 7, '{"action": "unsubscribe", "room": "user"}')
+    await asyncio.sleep(0.01)
+
+    assert ws.sent == [
+        {"type": "subscribed", "room": "user"},
+        {"type": "notification.created"},
+        {"type": "error", "room": "other", "error": "too_many_subscriptions"},
+        {"type": "error", "room": None, "error": "bad_request"},
+        {"type": "unsubscribed", "room": "user"},
+    ]
+    assert "user:7" not in manager.rooms
+    await manager.close(ws)
+    assert manager.snapshot()["connections"] == 0
@@ -0,0 +1,34 @@
+from app.ws.registry import RoomRegistry
+
+
+def test_join_leave_and_counts() -> None:
+    registry = RoomRegistry()
+    a, b = object(), object()
+
+    assert registry.join("room", a)
+    assert not registry.join("room", a)
+    assert registry.join("room", b)
+    assert registry.count("room") == 2
+    assert registry.subscribers == 2
+
+    assert registry.leave("room", a)
+    assert not registry.leave("room", a)
+    assert registry.leave("room", b)
+    assert "room" not in registry
+    assert registry.count("room") == 0
+    assert registry.subscribers == 0
+
+
+def test_snapshot_is_shared_until_membership_changes() -> None:
+    registry = RoomRegistry()
+    a, b = object(), object()
+    registry.join("room", a)
+
+    first = registry.members("room")
+    assert registry.members("room") is first
+
+    registry.join("room", b)
+    second = registry.members("room")
+    assert second is not first
+    assert first == (a,)
+    assert set(second) == {a, b}
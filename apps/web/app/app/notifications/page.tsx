@@ -1,9 +1,10 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 import { useLocale } from "@/components/locale-provider";
 import { api } from "@/lib/api";
+import { realtimeSocket } from "@/lib/realtime-socket";
 import { NotificationItem } from "@/lib/types";
 
 export default function NotificationsPage() {
@@ -11,12 +12,16 @@ export default function NotificationsPage() {
   const [items, setItems] = useState<NotificationItem[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const latestCursor = useRef<string | null>(null);
 
   async function load() {
     try {
       setError("");
-      const data = await api.get<NotificationItem[]>("/api/notifications");
-      setItems(data);
+      const page = await api.getPage<NotificationItem>("/api/notifications");
+      setItems(page.items);
+      setNextCursor(page.nextCursor);
+      latestCursor.current = page.latestCursor;
     } catch (e) {
       setError((e as Error).message);
     } finally {
@@ -24,6 +29,37 @@ export default function NotificationsPage() {
     }
   }
 
+  // Fetches only notifications newer than the ones shown; a gap larger than one page reloads.
+  async function loadNew() {
+    if (!latestCursor.current) return load();
+    try {
+      const page = await api.getPage<NotificationItem>(
+        `/api/notifications?since=${encodeURIComponent(latestCursor.current)}`
+      );
+      if (page.nextCursor) return load();
+      if (page.latestCursor) latestCursor.current = page.latestCursor;
+      // Collapsed notifications come back under their existing id with a new body: the fetched
+      // copy replaces the shown one and moves to the top with the genuinely new ones.
+      setItems(current => {
+        const fetched = new Set(page.items.map(item => item.id));
+        return [...page.items, ...current.filter(item => !fetched.has(item.id))];
+      });
+    } catch (e) {
+      setError((e as Error).message);
+    }
+  }
+
+  async function loadOlder() {
+    if (!nextCursor) return;
+    try {
+      const page = await api.getPage<NotificationItem>("/api/notifications", nextCursor);
+      setItems(current => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      setError((e as Error).message);
+    }
+  }
+
   useEffect(() => {
     void (async () => {
       await api.post("/api/notifications/read-all", {});
@@ -33,31 +69,19 @@ export default function NotificationsPage() {
   }, []);
 
   useEffect(() => {
-    const wsBase = (process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000").replace("http", "ws");
-    let socket: WebSocket | null = null;
-    let retryTimer: number | null = null;
-
-    const connect = () => {
-      socket = new WebSocket(`${wsBase}/ws/notifications`);
-      socket.onmessage = () => {
-        void load();
-      };
-      socket.onclose = () => {
-        retryTimer = window.setTimeout(connect, 3000);
-      };
-    };
-
-    connect();
-    return () => {
-      if (retryTimer) window.clearTimeout(retryTimer);
-      socket?.close();
-    };
+    return realtimeSocket.subscribe("user", {
+      onMessage: () => {
+        void loadNew();
+      }
+    });
   }, []);
 
   async function clearAll() {
     try {
       await api.delete("/api/notifications");
       setItems([]);
+      setNextCursor(null);
+      latestCursor.current = null;
       window.dispatchEvent(new CustomEvent("profile:refresh"));
     } catch (e) {
       setError((e as Error).message);
@@ -94,6 +118,11 @@ export default function NotificationsPage() {
               </div>
             </article>
           ))}
+          {nextCursor ? (
+            <button className="btn-secondary" type="button" onClick={() => void loadOlder()}>
+              {locale === "ru" ? "Показать ещё" : "Load more"}
+            </button>
+          ) : null}
         </section>
       ) : null}
     </main>
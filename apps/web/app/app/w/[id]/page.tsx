@@ -1,6 +1,6 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { useParams, useRouter } from "next/navigation";
 import { useEffect, useMemo, useState } from "react";
 
@@ -13,6 +13,7 @@ import { WishlistHeader } from "@/components/wishlist-header";
 import { useWishlistRealtime } from "@/hooks/useWishlistRealtime";
 import { api } from "@/lib/api";
 import { formatMoney } from "@/lib/format";
+import { applyRealtimeEvent } from "@/lib/realtime";
 import { Item, Wishlist } from "@/lib/types";
 
 type Currency = "USD" | "EUR" | "GBP" | "RUB";
@@ -77,6 +78,7 @@ export default function OwnerWishlistPage() {
     }
   }, []);
 
+  const queryClient = useQueryClient();
   const queryKey = useMemo(() => ["owner-wishlist", id], [id]);
   const { data, isLoading, refetch } = useQuery({
     queryKey,
@@ -91,9 +93,15 @@ export default function OwnerWishlistPage() {
     setIsPublic(data.is_public);
   }, [data]);
 
-  const { wsConnected } = useWishlistRealtime(data?.public_id ?? "", () => {
-    void refetch();
-  });
+  const { wsConnected } = useWishlistRealtime(data?.public_id ?? "", event => {
+    const current = queryClient.getQueryData<Wishlist>(queryKey);
+    const next = current && event ? applyRealtimeEvent(current, event) : null;
+    if (next) {
+      queryClient.setQueryData(queryKey, next);
+    } else {
+      void refetch();
+    }
+  }, () => queryClient.getQueryData<Wishlist>(queryKey)?.revision);
 
   const activeItems = useMemo(() => data?.items.filter(item => !item.is_archived) ?? [], [data]);
   const archivedItems = useMemo(() => data?.items.filter(item => item.is_archived) ?? [], [data]);
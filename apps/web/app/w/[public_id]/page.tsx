@@ -1,6 +1,6 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { useParams, useRouter } from "next/navigation";
 import { useEffect, useMemo, useState } from "react";
 
@@ -14,6 +14,7 @@ import { Toast } from "@/components/toast";
 import { WishlistHeader } from "@/components/wishlist-header";
 import { useWishlistRealtime } from "@/hooks/useWishlistRealtime";
 import { api } from "@/lib/api";
+import { applyMyContribution, applyRealtimeEvent } from "@/lib/realtime";
 import { getViewerToken } from "@/lib/viewer-token";
 import { Wishlist } from "@/lib/types";
 
@@ -29,6 +30,7 @@ export default function PublicWishlistPage() {
     getViewerToken();
   }, []);
 
+  const queryClient = useQueryClient();
   const queryKey = useMemo(() => ["public-wishlist", public_id], [public_id]);
   const { data, isLoading, refetch } = useQuery({
     queryKey,
@@ -42,9 +44,15 @@ export default function PublicWishlistPage() {
       .catch(() => setIsAuthed(false));
   }, []);
 
-  const { wsConnected } = useWishlistRealtime(public_id, () => {
-    void refetch();
-  });
+  const { wsConnected } = useWishlistRealtime(public_id, event => {
+    const current = queryClient.getQueryData<Wishlist>(queryKey);
+    const next = current && event ? applyRealtimeEvent(current, event) : null;
+    if (next) {
+      queryClient.setQueryData(queryKey, next);
+    } else {
+      void refetch();
+    }
+  }, () => queryClient.getQueryData<Wishlist>(queryKey)?.revision);
 
   useEffect(() => {
     if (wsConnected) return;
@@ -83,14 +91,17 @@ export default function PublicWishlistPage() {
   async function contribute(itemId: number, amountCents: number, message: string) {
     setBusyMap(s => ({ ...s, [itemId]: true }));
     try {
-      await api.post(
+      const result = await api.post<{ my_contribution_cents: number }>(
         `/api/public/items/${itemId}/contribute`,
         { amount_cents: amountCents, message, honeypot: "" },
         true
       );
+      queryClient.setQueryData<Wishlist>(queryKey, current =>
+        current ? applyMyContribution(current, itemId, result.my_contribution_cents) : current
+      );
       setToast(locale === "ru" ? "Вклад добавлен" : "Contribution added");
       window.dispatchEvent(new CustomEvent("profile:refresh"));
-      await refetch();
+      if (!wsConnected) await refetch();
     } catch (e) {
       const msg = (e as Error).message;
       if (msg.toLowerCase().includes("not authenticated")) {
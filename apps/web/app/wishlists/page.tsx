@@ -8,6 +8,16 @@ import { Skeleton } from "@/components/skeleton";
 import { api } from "@/lib/api";
 import { PublicWishlistSummary, WishlistSummary } from "@/lib/types";
 
+const publicRow = (w: PublicWishlistSummary): WishlistListRow => ({
+  public_id: w.public_id,
+  title: w.title,
+  author_name: w.author_name,
+  currency: w.currency,
+  item_count: w.item_count,
+  isMine: false,
+  isPublic: true
+});
+
 type WishlistListRow = {
   public_id: string;
   title: string;
@@ -24,6 +34,8 @@ export default function PublicWishlistsPage() {
   const [authorQuery, setAuthorQuery] = useState("");
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     void (async () => {
@@ -31,24 +43,15 @@ export default function PublicWishlistsPage() {
       setError("");
 
       const [publicResult, mineResult] = await Promise.allSettled([
-        api.get<PublicWishlistSummary[]>("/api/public/wishlists"),
+        api.getPage<PublicWishlistSummary>("/api/public/wishlists"),
         api.get<WishlistSummary[]>("/api/wishlists")
       ]);
 
       const rows = new Map<string, WishlistListRow>();
 
       if (publicResult.status === "fulfilled") {
-        for (const w of publicResult.value) {
-          rows.set(w.public_id, {
-            public_id: w.public_id,
-            title: w.title,
-            author_name: w.author_name,
-            currency: w.currency,
-            item_count: w.item_count,
-            isMine: false,
-            isPublic: true
-          });
-        }
+        for (const w of publicResult.value.items) rows.set(w.public_id, publicRow(w));
+        setNextCursor(publicResult.value.nextCursor);
       }
 
       if (mineResult.status === "fulfilled") {
@@ -75,6 +78,23 @@ export default function PublicWishlistsPage() {
     })();
   }, [locale]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await api.getPage<PublicWishlistSummary>("/api/public/wishlists", nextCursor);
+      setWishlists(current => {
+        const known = new Set(current.map(w => w.public_id));
+        return [...current, ...page.items.filter(w => !known.has(w.public_id)).map(publicRow)];
+      });
+      setNextCursor(page.nextCursor);
+    } catch {
+      // Keep the cursor so the button can be pressed again.
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredWishlists = wishlists.filter(w =>
     w.author_name.toLowerCase().includes(authorQuery.trim().toLowerCase())
   );
@@ -126,6 +146,11 @@ export default function PublicWishlistsPage() {
               <Link className="btn-primary" href={`/w/${w.public_id}`}>{locale === "ru" ? "Открыть" : "Open"}</Link>
             </article>
           ))}
+          {nextCursor ? (
+            <button className="btn-secondary justify-self-center" disabled={loadingMore} onClick={() => void loadMore()}>
+              {locale === "ru" ? "Показать ещё" : "Load more"}
+            </button>
+          ) : null}
         </section>
       )}
     </main>
@@ -10,6 +10,7 @@ import { useTheme } from "@/components/theme-provider";
 import { formatMoney } from "@/lib/format";
 import { Toast } from "@/components/toast";
 import { useLocale } from "@/components/locale-provider";
+import { realtimeSocket } from "@/lib/realtime-socket";
 
 type AuthState = "loading" | "authed" | "guest";
 
@@ -87,29 +88,15 @@ export function TopNav() {
 
   useEffect(() => {
     if (authState !== "authed") return;
-    const wsBase = (process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000").replace("http", "ws");
-    let socket: WebSocket | null = null;
-    let retryTimer: number | null = null;
-
-    const connect = () => {
-      socket = new WebSocket(`${wsBase}/ws/notifications`);
-      socket.onmessage = () => {
+    return realtimeSocket.subscribe("user", {
+      onMessage: () => {
         void refreshProfile();
         void api
           .get<{ unread: number }>("/api/notifications/unread-count")
           .then(data => setUnreadNotifications(data.unread))
           .catch(() => setUnreadNotifications(0));
-      };
-      socket.onclose = () => {
-        retryTimer = window.setTimeout(connect, 3000);
-      };
-    };
-
-    connect();
-    return () => {
-      if (retryTimer) window.clearTimeout(retryTimer);
-      socket?.close();
-    };
+      }
+    });
   }, [authState, refreshProfile]);
 
   useEffect(() => {
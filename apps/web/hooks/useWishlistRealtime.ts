@@ -2,15 +2,22 @@
 
 import { useEffect, useRef, useState } from "react";
 
-export function useWishlistRealtime(publicId: string, onEvent: () => void): { wsConnected: boolean } {
+import { realtimeSocket } from "@/lib/realtime-socket";
+import { RealtimeMessage } from "@/lib/types";
+
+export function useWishlistRealtime(
+  publicId: string,
+  onEvent: (event: RealtimeMessage | null) => void,
+  getRevision?: () => number | undefined
+): { wsConnected: boolean } {
   const [wsConnected, setWsConnected] = useState(false);
-  const attemptsRef = useRef(0);
-  const wsRef = useRef<WebSocket | null>(null);
   const onEventRef = useRef(onEvent);
+  const getRevisionRef = useRef(getRevision);
 
   useEffect(() => {
     onEventRef.current = onEvent;
-  }, [onEvent]);
+    getRevisionRef.current = getRevision;
+  }, [onEvent, getRevision]);
 
   useEffect(() => {
     if (!publicId) {
@@ -18,45 +25,54 @@ export function useWishlistRealtime(publicId: string, onEvent: () => void): { ws
       return;
     }
 
-    let stopped = false;
-    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
-
-    const connect = () => {
-      if (stopped) return;
-      const base = (process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000").replace(
-        /^http/,
-        "ws"
-      );
-      const ws = new WebSocket(`${base}/ws/wishlist/${publicId}`);
-      wsRef.current = ws;
-
-      ws.onopen = () => {
-        attemptsRef.current = 0;
-        setWsConnected(true);
-      };
+    let source: EventSource | null = null;
+    let unsubscribe: (() => void) | null = null;
+    const apiBase = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 
-      ws.onmessage = () => {
-        onEventRef.current();
-      };
-
-      ws.onclose = () => {
-        setWsConnected(false);
-        if (stopped) return;
-        attemptsRef.current += 1;
-        const baseDelay = Math.min(30000, Math.pow(2, attemptsRef.current) * 1000);
-        const jitter = Math.floor(Math.random() * 400);
-        reconnectTimer = setTimeout(connect, baseDelay + jitter);
-      };
+    const deliver = (raw: string) => {
+      let event: RealtimeMessage | null = null;
+      try {
+        event = JSON.parse(raw) as RealtimeMessage;
+      } catch {
+        event = null;
+      }
+      onEventRef.current(event);
+    };
 
-      ws.onerror = () => ws.close();
+    // Used when WebSockets never get through (e.g. a restrictive proxy). EventSource reconnects
+    // on its own and resumes with Last-Event-ID.
+    const listenWithEventSource = () => {
+      // Resume from the last applied revision: the server replays what was missed or sends a resync.
+      const revision = getRevisionRef.current?.();
+      const query = typeof revision === "number" ? `?since=${revision}` : "";
+      source = new EventSource(`${apiBase}/api/public/w/${publicId}/events${query}`, {
+        withCredentials: true
+      });
+      source.onopen = () => setWsConnected(true);
+      source.onerror = () => setWsConnected(false);
+      source.onmessage = message => deliver(message.data as string);
     };
 
-    connect();
+    if (realtimeSocket.unavailable) {
+      listenWithEventSource();
+    } else {
+      unsubscribe = realtimeSocket.subscribe(publicId, {
+        onMessage: deliver,
+        getSince: () => getRevisionRef.current?.(),
+        onStatus: connected => {
+          setWsConnected(connected);
+          if (!connected && realtimeSocket.unavailable && !source) {
+            unsubscribe?.();
+            unsubscribe = null;
+            listenWithEventSource();
+          }
+        }
+      });
+    }
 
     return () => {
-      stopped = true;
-      if (reconnectTimer) clearTimeout(reconnectTimer);
-      wsRef.current?.close();
+      unsubscribe?.();
+      source?.close();
     };
   }, [publicId]);
 
@@ -2,7 +2,7 @@ import { getViewerToken } from "./viewer-token";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 
-async function request<T>(path: string, init?: RequestInit, publicRequest = false): Promise<T> {
+async function send(path: string, init?: RequestInit, publicRequest = false): Promise<Response> {
   const headers = new Headers(init?.headers ?? {});
   headers.set("Content-Type", "application/json");
   if (publicRequest) {
@@ -18,11 +18,28 @@ async function request<T>(path: string, init?: RequestInit, publicRequest = fals
     const body = await res.json().catch(() => ({ detail: "Request failed" }));
     throw new Error(body.detail ?? "Request failed");
   }
+  return res;
+}
+
+async function request<T>(path: string, init?: RequestInit, publicRequest = false): Promise<T> {
+  const res = await send(path, init, publicRequest);
   return res.json();
 }
 
+export type Page<T> = { items: T[]; nextCursor: string | null; latestCursor: string | null };
+
 export const api = {
   get: <T>(path: string, publicRequest = false) => request<T>(path, { method: "GET" }, publicRequest),
+  // Cursor-paginated lists return the cursor of the next page in X-Next-Cursor.
+  getPage: async <T>(path: string, cursor?: string | null): Promise<Page<T>> => {
+    const url = cursor ? `${path}${path.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}` : path;
+    const res = await send(url, { method: "GET" });
+    return {
+      items: await res.json(),
+      nextCursor: res.headers.get("X-Next-Cursor"),
+      latestCursor: res.headers.get("X-Latest-Cursor")
+    };
+  },
   post: <T>(path: string, body: unknown, publicRequest = false) =>
     request<T>(path, { method: "POST", body: JSON.stringify(body) }, publicRequest),
   patch: <T>(path: string, body: unknown) => request<T>(path, { method: "PATCH", body: JSON.stringify(body) }),
@@ -0,0 +1,161 @@
+import { answerPing, retryDelay } from "./ws";
+
+type Subscriber = {
+  onMessage: (raw: string) => void;
+  onStatus?: (connected: boolean) => void;
+  getSince?: () => number | undefined;
+};
+
+const decoder = new TextDecoder();
+
+// One multiplexed socket per tab for every wishlist page and the user room.
+// Rooms are wishlist public ids plus "user" for the signed-in user's notifications.
+class RealtimeSocket {
+  private ws: WebSocket | null = null;
+  private rooms = new Map<string, Set<Subscriber>>();
+  private attempts = 0;
+  private failedOpens = 0;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  private closeTimer: ReturnType<typeof setTimeout> | null = null;
+  connected = false;
+
+  // True once the socket failed to open twice in a row, e.g. behind a proxy that blocks WebSockets.
+  get unavailable(): boolean {
+    return this.failedOpens >= 2;
+  }
+
+  subscribe(room: string, subscriber: Subscriber): () => void {
+    let subscribers = this.rooms.get(room);
+    if (!subscribers) {
+      subscribers = new Set();
+      this.rooms.set(room, subscribers);
+      if (this.connected) this.sendSubscribe(room, subscriber);
+    }
+    subscribers.add(subscriber);
+    if (this.closeTimer) {
+      clearTimeout(this.closeTimer);
+      this.closeTimer = null;
+    }
+    this.open();
+    subscriber.onStatus?.(this.connected);
+
+    return () => {
+      const current = this.rooms.get(room);
+      if (!current?.delete(subscriber) || current.size > 0) return;
+      this.rooms.delete(room);
+      if (this.connected) this.ws?.send(JSON.stringify({ action: "unsubscribe", room }));
+      // Keep the socket briefly so navigating between pages does not reconnect.
+      if (this.rooms.size === 0) this.closeTimer = setTimeout(() => this.close(), 5000);
+    };
+  }
+
+  private sendSubscribe(room: string, subscriber?: Subscriber) {
+    const since = subscriber?.getSince?.();
+    this.ws?.send(JSON.stringify({ action: "subscribe", room, since }));
+  }
+
+  private open() {
+    if (this.ws || this.reconnectTimer || typeof WebSocket === "undefined") return;
+    const base = (process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000").replace(/^http/, "ws");
+    const ws = new WebSocket(`${base}/ws`);
+    ws.binaryType = "arraybuffer";
+    this.ws = ws;
+    let opened = false;
+
+    ws.onopen = () => {
+      opened = true;
+      this.attempts = 0;
+      this.failedOpens = 0;
+      this.setConnected(true);
+      for (const [room, subscribers] of this.rooms) {
+        this.sendSubscribe(room, subscribers.values().next().value);
+      }
+    };
+
+    ws.onmessage = message => {
+      if (answerPing(ws, message)) return;
+      const raw = typeof message.data === "string" ? message.data : decoder.decode(message.data as ArrayBuffer);
+      this.dispatch(raw);
+    };
+
+    ws.onclose = event => {
+      this.ws = null;
+      this.setConnected(false);
+      if (!opened) this.failedOpens += 1;
+      if (this.rooms.size === 0) return;
+      this.attempts += 1;
+      const baseDelay = Math.min(30000, Math.pow(2, this.attempts) * 1000);
+      const jitter = Math.floor(Math.random() * 400);
+      this.reconnectTimer = setTimeout(() => {
+        this.reconnectTimer = null;
+        if (this.rooms.size > 0) this.open();
+      }, retryDelay(event) ?? baseDelay + jitter);
+    };
+
+    ws.onerror = () => ws.close();
+  }
+
+  private close() {
+    this.closeTimer = null;
+    if (this.rooms.size > 0) return;
+    this.ws?.close();
+  }
+
+  private setConnected(connected: boolean) {
+    this.connected = connected;
+    for (const subscribers of this.rooms.values()) {
+      for (const subscriber of subscribers) subscriber.onStatus?.(connected);
+    }
+  }
+
+  private refuse(room: string, error: string | undefined) {
+    const subscribers = this.rooms.get(room);
+    if (!subscribers) return;
+    // Not subscribed on the server: the page falls back to polling for this room.
+    for (const subscriber of subscribers) subscriber.onStatus?.(false);
+    if (error !== "room_full") return;
+    // The room is at its per-worker limit; ask again later, at a randomized time.
+    setTimeout(() => {
+      const current = this.rooms.get(room);
+      if (current && this.connected) this.sendSubscribe(room, current.values().next().value);
+    }, 15000 + Math.floor(Math.random() * 30000));
+  }
+
+  private dispatch(raw: string) {
+    let message: {
+      type?: string;
+      room?: string;
+      error?: string;
+      wishlist_public_id?: string;
+      user_id?: number;
+    } | null;
+    try {
+      message = JSON.parse(raw);
+    } catch {
+      message = null;
+    }
+    if (!message) return;
+    if (message.type === "error") {
+      if (message.room) this.refuse(message.room, message.error);
+      return;
+    }
+    if (message.type === "subscribed") {
+      const subscribers = message.room ? this.rooms.get(message.room) : undefined;
+      for (const subscriber of subscribers ?? []) subscriber.onStatus?.(true);
+      return;
+    }
+    if (message.type === "unsubscribed") return;
+    // A resync has no room: the whole connection fell behind, so every subscriber refetches.
+    const room =
+      message.type === "resync"
+        ? null
+        : message.wishlist_public_id ?? (typeof message.user_id === "number" ? "user" : undefined);
+    if (room === undefined) return;
+    for (const [key, subscribers] of this.rooms) {
+      if (room !== null && key !== room) continue;
+      for (const subscriber of subscribers) subscriber.onMessage(raw);
+    }
+  }
+}
+
+export const realtimeSocket = new RealtimeSocket();
@@ -0,0 +1,88 @@
+import { Item, RealtimeBatch, RealtimeEvent, RealtimeMessage, SharedItemState, Wishlist } from "./types";
+
+function patchItem(prev: Item | undefined, next: SharedItemState, isOwner: boolean): Item {
+  return {
+    ...next,
+    reserved_by_me: next.reserved && prev ? prev.reserved_by_me : false,
+    my_contribution_cents: prev ? prev.my_contribution_cents : isOwner ? null : 0
+  };
+}
+
+// Shared events never carry per-viewer state, so the contributor's own total comes from the
+// POST response instead.
+export function applyMyContribution(wishlist: Wishlist, itemId: number, cents: number): Wishlist {
+  return {
+    ...wishlist,
+    items: wishlist.items.map(item => (item.id === itemId ? { ...item, my_contribution_cents: cents } : item))
+  };
+}
+
+function sortItems(items: Item[]): Item[] {
+  return [...items].sort((a, b) => a.position - b.position || a.created_at.localeCompare(b.created_at));
+}
+
+// Returns the patched wishlist, the same object when the event is already applied,
+// or null when the client must refetch (revision gap or an event it cannot patch).
+export function applyRealtimeEvent(wishlist: Wishlist, message: RealtimeMessage): Wishlist | null {
+  if ("events" in message) return applyRealtimeBatch(wishlist, message);
+  const revision = message.revision;
+  if (typeof revision !== "number") return null;
+  if (revision <= wishlist.revision) return wishlist;
+  if (revision !== wishlist.revision + 1) return null;
+  return patchWishlist(wishlist, message, revision);
+}
+
+function applyRealtimeBatch(wishlist: Wishlist, batch: RealtimeBatch): Wishlist | null {
+  if (batch.revision <= wishlist.revision) return wishlist;
+  if (batch.from_revision > wishlist.revision + 1) return null;
+  // A batch must cover every revision it claims; refetch rather than skip a missing one.
+  if (batch.revision - batch.from_revision + 1 > batch.count) return null;
+  // Events carry full state, so replaying ones the client already applied is harmless.
+  let next: Wishlist | null = wishlist;
+  for (const event of batch.events) {
+    next = patchWishlist(next, event, batch.revision);
+    if (!next) return null;
+  }
+  return next;
+}
+
+function patchWishlist(wishlist: Wishlist, event: RealtimeEvent, revision: number): Wishlist | null {
+  const data = event.data;
+  switch (event.type) {
+    case "wishlist.updated":
+      if (data.is_public === false && !wishlist.is_owner) return null;
+      return {
+        ...wishlist,
+        revision,
+        title: data.title ?? wishlist.title,
+        description: data.description ?? null,
+        currency: data.currency ?? wishlist.currency,
+        is_public: data.is_public ?? wishlist.is_public
+      };
+    case "items.reordered": {
+      const order = new Map((data.item_ids ?? []).map((id, idx) => [id, idx]));
+      const items = wishlist.items.map(item =>
+        order.has(item.id) ? { ...item, position: order.get(item.id) as number } : item
+      );
+      return { ...wishlist, revision, items: sortItems(items) };
+    }
+    case "item.updated":
+    case "item.archived":
+    case "reservation.changed":
+    case "contribution.changed": {
+      if (data.deleted) {
+        return { ...wishlist, revision, items: wishlist.items.filter(item => item.id !== data.item_id) };
+      }
+      const next = data.item;
+      if (!next) return null;
+      const prev = wishlist.items.find(item => item.id === next.id);
+      const patched = patchItem(prev, next, wishlist.is_owner);
+      const items = prev
+        ? wishlist.items.map(item => (item.id === next.id ? patched : item))
+        : [...wishlist.items, patched];
+      return { ...wishlist, revision, items: sortItems(items) };
+    }
+    default:
+      return null;
+  }
+}
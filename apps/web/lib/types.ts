@@ -14,6 +14,7 @@ export type Item = {
   reserved_by_me: boolean;
   reserved_at?: string | null;
   collected_cents: number;
+  contributor_count?: number;
   my_contribution_cents?: number | null;
   created_at: string;
   updated_at: string;
@@ -27,6 +28,7 @@ export type Wishlist = {
   currency: Currency;
   is_public: boolean;
   is_owner: boolean;
+  revision: number;
   created_at: string;
   updated_at: string;
   items: Item[];
@@ -68,6 +70,40 @@ export type NotificationItem = {
   type: string;
   title: string;
   body?: string | null;
+  event_count?: number;
+  amount_cents?: number | null;
   created_at: string;
   read_at?: string | null;
 };
+
+export type SharedItemState = Omit<Item, "reserved_by_me" | "my_contribution_cents">;
+
+export type RealtimeEvent = {
+  event_id: string;
+  type: string;
+  wishlist_public_id?: string;
+  revision?: number | null;
+  server_ts: string;
+  data: {
+    item_id?: number;
+    item?: SharedItemState | null;
+    item_ids?: number[];
+    deleted?: boolean;
+    title?: string;
+    description?: string | null;
+    currency?: Currency;
+    is_public?: boolean;
+  };
+};
+
+// Events coalesced by the server during a burst; merged events keep only the latest item state.
+export type RealtimeBatch = {
+  type: "batch";
+  wishlist_public_id: string;
+  from_revision: number;
+  revision: number;
+  count: number;
+  events: RealtimeEvent[];
+};
+
+export type RealtimeMessage = RealtimeEvent | RealtimeBatch;
@@ -0,0 +1,12 @@
+// The server pings quiet sockets with a text "ping" frame and closes those that never answer.
+export function answerPing(socket: WebSocket, message: MessageEvent): boolean {
+  if (message.data !== "ping") return false;
+  socket.send("pong");
+  return true;
+}
+
+// Close reasons like "retry=4200" (deploy drain, connection admission) say when to reconnect.
+export function retryDelay(event: CloseEvent): number | null {
+  const match = /^retry=(\d+)$/.exec(event.reason);
+  return match ? Number(match[1]) : null;
+}